@@ -0,0 +1,210 @@
+"""Admission control: per-route-class concurrency budgets and per-client rate limits"""
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+from .metrics import Counter, Gauge
+
+# Admission configuration
+ADMISSION_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() in ("1", "true", "yes")
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0"))
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))  # 0 disables rate limiting
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "0")) or max(1.0, RATE_LIMIT_PER_SECOND * 2)
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+ROUTE_CLASS_BUDGETS: Dict[str, Tuple[int, int]] = {
+    # class: (max concurrent, max queued)
+    "light": (
+        int(os.getenv("ADMISSION_LIGHT_CONCURRENCY", "64")),
+        int(os.getenv("ADMISSION_LIGHT_QUEUE", "256")),
+    ),
+    "heavy": (
+        int(os.getenv("ADMISSION_HEAVY_CONCURRENCY", "8")),
+        int(os.getenv("ADMISSION_HEAVY_QUEUE", "32")),
+    ),
+}
+
+# (method or None for any, path pattern) -> route class; first match wins, default is "light"
+ROUTE_CLASSES: List[Tuple[Optional[str], Pattern[str], str]] = [
+    ("GET", re.compile(r"^/api/v1/tasks/?$"), "heavy"),
+    ("GET", re.compile(r"^/api/v1/tasks/(search|batch|calendar|deadlines|status/[^/]+|priority/[^/]+)$"), "heavy"),
+    ("POST", re.compile(r"^/api/v1/tasks/(bulk-[^/]+|batch)$"), "heavy"),
+    ("POST", re.compile(r"^/api/v1/batch$"), "heavy"),
+    ("GET", re.compile(r"^/api/v1/tasks/\d+/(subtree|blockers)$"), "heavy"),
+]
+
+# Never shed probes and scrapes: shedding them makes a busy instance look dead
+EXEMPT_PATHS = {"/metrics", "/api/v1/health"}
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests rejected by admission control",
+    ("route_class", "reason"),
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for a concurrency slot",
+    ("route_class",),
+)
+
+
+class Rejected(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Concurrency budget with a bounded FIFO wait queue"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float = QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Rejected(503, "Server is at capacity, retry later", self.timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), self.name)
+        try:
+            # The releasing request hands its slot over directly, so in_flight is not touched here
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as the timeout fired: pass it on
+                self.release()
+            waiter.cancel()
+            raise Rejected(503, "Timed out waiting for capacity, retry later", self.timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            ADMISSION_QUEUE_DEPTH.set(len(self._waiters), self.name)
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class TokenBucketRateLimiter:
+    """Per-client token buckets held in memory, least recently seen clients evicted first"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # client -> (tokens, timestamp)
+
+    def check(self, client: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            raise Rejected(429, "Rate limit exceeded", (1 - tokens) / self.rate)
+
+        self._buckets[client] = (tokens - 1, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+
+def classify(method: str, path: str) -> str:
+    """Route class for a request"""
+    for rule_method, pattern, route_class in ROUTE_CLASSES:
+        if (rule_method is None or rule_method == method) and pattern.match(path):
+            return route_class
+    return "light"
+
+
+def client_key(scope) -> str:
+    """Identify the caller: explicit client id header, else the peer address"""
+    for name, value in scope.get("headers", []):
+        if name == b"x-client-id":
+            return "id:" + value.decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware shedding load with 429/503 and Retry-After before work starts"""
+
+    def __init__(
+        self,
+        app,
+        budgets: Optional[Dict[str, Tuple[int, int]]] = None,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        queue_timeout: float = QUEUE_TIMEOUT
+    ):
+        self.app = app
+        self.limiters = {
+            name: ConcurrencyLimiter(name, limit, max_queue, queue_timeout)
+            for name, (limit, max_queue) in (budgets or ROUTE_CLASS_BUDGETS).items()
+        }
+        self.rate_limiter = TokenBucketRateLimiter(rate, burst) if rate > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify(scope["method"], scope["path"])
+        limiter = self.limiters.get(route_class)
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.check(client_key(scope))
+            if limiter is not None:
+                await limiter.acquire()
+        except Rejected as rejection:
+            reason = "rate_limited" if rejection.status_code == 429 else "overloaded"
+            ADMISSION_REJECTIONS.inc(route_class, reason)
+            await self._reject(send, rejection)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+    @staticmethod
+    async def _reject(send, rejection: Rejected) -> None:
+        body = json.dumps({"detail": rejection.detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(rejection.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,147 @@
+"""Hot/cold partitioning: move old completed and cancelled tasks out of the live table"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, exists, func, select
+
+from .crud import TaskCRUD
+from .leases import acquire_lease
+from .metrics import Counter
+from .migrations import upgrade
+from .models import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Archiver configuration
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() in ("1", "true", "yes")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+TERMINAL_STATUSES = (TaskStatus.completed, TaskStatus.cancelled)
+
+ARCHIVER_LEASE = "archiver"
+
+ARCHIVED_TASKS = Counter(
+    "archived_tasks_total",
+    "Tasks moved from the live table to the archive",
+)
+
+
+def archive_tasks(
+    bind: Engine,
+    older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS),
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    limit: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """Archive completed/cancelled tasks untouched for ``older_than``, one transaction per batch
+
+    A task qualifies when its last update (or creation) is older than the
+    cutoff and it has no live subtasks; parents follow once their subtasks
+    are archived. Candidates are read in id order from a moving cursor, so a
+    run scans the table once however many batches it takes, and each batch
+    holds the write lock only briefly. ``progress`` is called with the running
+    total after each batch. Returns the number of archived tasks.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    child = aliased(Task)
+    archived = 0
+    cursor = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        with Session(bind) as session:
+            task_ids = list(session.exec(
+                select(Task.id)
+                .where(
+                    Task.id > cursor,
+                    Task.status.in_(TERMINAL_STATUSES),  # type: ignore
+                    func.coalesce(Task.updated_at, Task.created_at) < cutoff,
+                    ~exists().where(child.parent_id == Task.id),
+                )
+                .order_by(Task.id)
+                .limit(size)
+            ))
+            if not task_ids:
+                break
+            cursor = task_ids[-1]
+            moved = TaskCRUD.archive_tasks(session, task_ids)
+        archived += moved
+        ARCHIVED_TASKS.inc(amount=moved)
+        if progress:
+            progress(archived)
+        if len(task_ids) < size:
+            break
+    if archived:
+        logger.info("Archived %d tasks older than %s", archived, cutoff.isoformat())
+    return archived
+
+
+# Leases tell processes apart; this keeps two threads of the holder from archiving together
+_archiving = threading.Lock()
+
+
+def archive_exclusively(
+    bind: Engine,
+    older_than: timedelta = timedelta(days=ARCHIVE_AFTER_DAYS),
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None
+) -> Optional[int]:
+    """Archive as :func:`archive_tasks` does, holding the archiver lease throughout
+
+    Returns None, without archiving, while another process or thread is
+    archiving. The lease outlasts two archiver intervals, so another worker
+    takes over within two intervals if the holder dies, and it is renewed
+    after each batch so a long run keeps it.
+    """
+    ttl = 2 * ARCHIVE_INTERVAL_SECONDS
+    if not _archiving.acquire(blocking=False):
+        return None
+    try:
+        if not acquire_lease(bind, ARCHIVER_LEASE, ttl):
+            return None
+
+        def renew(archived: int) -> None:
+            acquire_lease(bind, ARCHIVER_LEASE, ttl)
+            if progress:
+                progress(archived)
+
+        return archive_tasks(bind, older_than, batch_size, progress=renew)
+    finally:
+        _archiving.release()
+
+
+def run_archiver(bind: Engine) -> int:
+    """One periodic archiving pass, made only by the process holding the archiver lease
+
+    Every worker runs the periodic task; the lease keeps them from archiving
+    the same tasks at the same time.
+    """
+    return archive_exclusively(bind) or 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old completed and cancelled tasks to the archive table")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./task_management.db"))
+    parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS, help="Age threshold in days")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Tasks moved per transaction")
+    parser.add_argument("--limit", type=int, help="Stop after archiving this many tasks")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    upgrade(engine)
+    start = time.perf_counter()
+    archived = archive_tasks(engine, timedelta(days=args.older_than_days), args.batch_size, args.limit)
+    print(f"✅ Archived {archived:,} tasks in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
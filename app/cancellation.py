@@ -0,0 +1,183 @@
+"""Statement timeouts and client-disconnect cancellation for read queries
+
+A list or search query runs in a worker thread on its own connection and
+would run to completion even after its client has gone. ``run_guarded`` gives
+the query a ``QueryGuard`` that stops the statement when the route's timeout
+passes or when the awaiting coroutine is cancelled, which is what
+``cancel_on_disconnect`` does once the client disconnects. PostgreSQL enforces
+the timeout itself through ``SET LOCAL statement_timeout`` and is cancelled
+with a protocol-level cancel request; SQLite has neither, so a progress
+handler aborts the running statement once the guard says so.
+"""
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from .metrics import Counter
+
+# Statement timeout configuration, in seconds; 0 disables the timeout
+STATEMENT_TIMEOUT_SECONDS = float(os.getenv("STATEMENT_TIMEOUT_SECONDS", "30"))
+
+STATEMENT_TIMEOUTS: Dict[str, float] = {
+    # route: timeout
+    "list_tasks": float(os.getenv("STATEMENT_TIMEOUT_LIST_SECONDS", str(STATEMENT_TIMEOUT_SECONDS))),
+    "search_tasks": float(os.getenv("STATEMENT_TIMEOUT_SEARCH_SECONDS", str(STATEMENT_TIMEOUT_SECONDS))),
+    "task_calendar": float(os.getenv("STATEMENT_TIMEOUT_CALENDAR_SECONDS", str(STATEMENT_TIMEOUT_SECONDS))),
+    "task_deadlines": float(os.getenv("STATEMENT_TIMEOUT_DEADLINES_SECONDS", str(STATEMENT_TIMEOUT_SECONDS))),
+}
+
+# SQLite virtual machine instructions between two checks of the guard
+SQLITE_PROGRESS_INTERVAL = 20000
+
+QUERIES_STOPPED = Counter(
+    "queries_stopped_total",
+    "Read queries stopped before completion",
+    ("route", "reason"),
+)
+
+T = TypeVar("T")
+
+
+class StatementTimeout(Exception):
+    """Raised when a query runs past its route's statement timeout"""
+
+
+class QueryCancelled(Exception):
+    """Raised in the worker thread when its query was cancelled"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the response was ready"""
+
+
+class QueryGuard:
+    """Timeout and cancellation state shared by the queries of one request"""
+
+    def __init__(self, route: str, timeout: float):
+        self.route = route
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout > 0 else None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._connections: List[Tuple[str, Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def cancel(self) -> None:
+        """Stop the running statement; safe to call from any thread"""
+        self._cancelled.set()
+        with self._lock:
+            connections = list(self._connections)
+        for dialect, dbapi_connection in connections:
+            # SQLite notices the flag in its progress handler
+            if dialect == "postgresql":
+                dbapi_connection.cancel()
+
+    def attach(self, connection: Connection) -> None:
+        """Apply the guard to a connection at the start of its transaction"""
+        dialect = connection.dialect.name
+        dbapi_connection = connection.connection.dbapi_connection
+        if dialect == "sqlite":
+            dbapi_connection.set_progress_handler(self._should_stop, SQLITE_PROGRESS_INTERVAL)
+        elif dialect == "postgresql" and self.deadline is not None:
+            remaining_ms = max(1, int((self.deadline - time.monotonic()) * 1000))
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining_ms}")
+        with self._lock:
+            self._connections.append((dialect, dbapi_connection))
+
+    def detach(self) -> None:
+        """Remove the guard from every connection it was applied to"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for dialect, dbapi_connection in connections:
+            if dialect == "sqlite":
+                dbapi_connection.set_progress_handler(None, 0)
+
+    def _should_stop(self) -> int:
+        # A non-zero return aborts the running SQLite statement
+        return int(self.cancelled or self.expired)
+
+
+@event.listens_for(Session, "after_begin")
+def _attach_query_guard(session: Session, transaction, connection: Connection) -> None:
+    guard = session.info.get("query_guard")
+    if guard is not None:
+        guard.attach(connection)
+
+
+@contextmanager
+def guarded(session: Session, guard: QueryGuard) -> Iterator[None]:
+    """Apply the guard to the queries the session runs inside the block
+
+    The guard is attached when the session begins its transaction, so a block
+    that never touches the database never checks out a connection.
+    """
+    if session.in_transaction():
+        guard.attach(session.connection())
+    session.info["query_guard"] = guard
+    try:
+        yield
+    except Exception as exc:
+        if guard.cancelled:
+            raise QueryCancelled() from exc
+        if guard.expired:
+            QUERIES_STOPPED.inc(guard.route, "timeout")
+            raise StatementTimeout(f"Query exceeded the {guard.timeout:g}s statement timeout") from exc
+        raise
+    finally:
+        session.info.pop("query_guard", None)
+        guard.detach()
+
+
+def statement_timeout(route: str) -> float:
+    return STATEMENT_TIMEOUTS.get(route, STATEMENT_TIMEOUT_SECONDS)
+
+
+async def run_guarded(route: str, func: Callable[..., T], *args: Any) -> T:
+    """Run func(guard, *args) in a worker thread, stopping its queries if this coroutine is cancelled"""
+    guard = QueryGuard(route, statement_timeout(route))
+    # The thread cannot be cancelled and run_in_threadpool holds off cancellation until it returns,
+    # so wait through a shield and stop the thread's query instead
+    future = asyncio.ensure_future(run_in_threadpool(func, guard, *args))
+    future.add_done_callback(lambda done: done.cancelled() or done.exception())
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        guard.cancel()
+        QUERIES_STOPPED.inc(route, "cancelled")
+        raise
+
+
+async def _disconnected(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """Await work, cancelling it if the client disconnects first"""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_disconnected(request))
+    try:
+        await asyncio.wait((task, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not task.done():
+            task.cancel()
+        watcher.cancel()
+    if not task.done():
+        raise ClientDisconnected()
+    return task.result()
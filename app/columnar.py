@@ -0,0 +1,581 @@
+"""Columnar in-memory read engine for task list queries (optional, requires NumPy)"""
+import bisect
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import Integer, select, type_coerce
+from sqlalchemy.engine import Engine
+
+from .models import (
+    Assignee, Tag, Task, TaskTag, TaskStatus, TaskPriority, SortField, SortOrder, FacetCount, FacetField,
+    datetime_to_epoch, epoch_to_datetime
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy installed
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Columnar engine configuration
+COLUMNAR_ENABLED = os.getenv("COLUMNAR_ENABLED", "false").lower() in ("1", "true", "yes")
+COLUMNAR_REFRESH_SECONDS = float(os.getenv("COLUMNAR_REFRESH_SECONDS", "0"))  # 0 disables periodic reloads
+# Set by app.server for its workers: with more than one, only periodic reloads see the others' writes
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+LOAD_CHUNK_SIZE = 50000
+
+_NULL_TIME = -(2 ** 63)
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_ARRAYS = (
+    "_ids", "_alive", "_status", "_priority", "_created_at", "_updated_at",
+    "_due_date", "_assignee", "_parent", "_title", "_description", "_title_folded", "_description_folded", "_tags",
+)
+_STATE = _ARRAYS + ("_size", "_row_of", "_assignees", "_assignee_ids", "_tag_rows", "_postings", "_orders")
+_COLUMNS = (
+    "id", "title", "description", "status", "priority", "created_at", "updated_at", "due_date", "assignee_id", "parent_id",
+)
+# Already stored as ranks and epoch microseconds: read them raw instead of decoding and re-encoding
+_RAW_COLUMNS = {"status", "priority", "created_at", "updated_at", "due_date"}
+
+
+def _enum_codes(enum_cls) -> Dict:
+    """Small-int codes in definition order, the same ranks RankedEnum stores"""
+    return {member: code for code, member in enumerate(enum_cls)}
+
+
+STATUS_CODES = _enum_codes(TaskStatus)
+PRIORITY_CODES = _enum_codes(TaskPriority)
+_STATUS_BY_CODE = {code: member for member, code in STATUS_CODES.items()}
+_PRIORITY_BY_CODE = {code: member for member, code in PRIORITY_CODES.items()}
+
+
+def _encode_time(value: Optional[datetime]) -> int:
+    """UTC epoch microseconds as stored by UTCEpoch, NULL as the smallest value"""
+    if value is None:
+        return _NULL_TIME
+    return datetime_to_epoch(value)
+
+
+def _decode_time(value: int) -> Optional[datetime]:
+    if value == _NULL_TIME:
+        return None
+    return epoch_to_datetime(int(value))
+
+
+def _fold(value: Optional[str]) -> Optional[str]:
+    """Lower-case ASCII letters only, as SQLite's lower() and LIKE do"""
+    return value.translate(_ASCII_LOWER) if value is not None else None
+
+
+def _like_matcher(search: str) -> Callable[[Optional[str]], bool]:
+    """Match folded text against ILIKE '%search%' with % and _ as wildcards"""
+    needle = _fold(search)
+    if "%" not in needle and "_" not in needle:
+        return lambda text: text is not None and needle in text
+    pattern = "".join(".*" if char == "%" else "." if char == "_" else re.escape(char) for char in needle)
+    regex = re.compile(pattern, re.DOTALL)
+    return lambda text: text is not None and regex.search(text) is not None
+
+
+class ColumnarTaskStore:
+    """Task table held as NumPy columns, answering TaskCRUD.get_tasks queries
+
+    Enum ranks and epoch timestamps are copied as stored into int8 and int64
+    columns (NULL time as the smallest value, matching SQL NULL ordering), and
+    assignees as their int32 assignee ids (-1 for none). Tags are kept as an
+    inverted index from tag name to task ids, intersected smallest first.
+    Filters become vectorized masks; for each sort field an ascending
+    (value, id) order is computed once and then kept sorted as rows change, so
+    a query is a mask, a gather and a slice. Writes reach the store through
+    CRUD write hooks, which only note the changed ids: an applier thread
+    reloads those rows by id off the request path, and a read first applies
+    any changes still pending, so clients always see their own writes.
+    """
+
+    def __init__(self, bind: Engine):
+        if np is None:
+            raise RuntimeError("The columnar engine requires numpy")
+        self.bind = bind
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loading = False
+        self._changed: Set[int] = set()  # ids written since they were last applied
+        self._changed_lock = threading.Lock()
+        self._apply_lock = threading.Lock()  # one reload of changed rows at a time
+        self._wakeup = threading.Event()
+        self._applier: Optional[threading.Thread] = None
+        self._stopping = False
+        self._reset(0)
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._row_of: Dict[int, int] = {}
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._status = np.zeros(capacity, dtype=np.int8)
+        self._priority = np.zeros(capacity, dtype=np.int8)
+        self._created_at = np.zeros(capacity, dtype=np.int64)
+        self._updated_at = np.zeros(capacity, dtype=np.int64)
+        self._due_date = np.zeros(capacity, dtype=np.int64)
+        self._assignee = np.zeros(capacity, dtype=np.int32)
+        self._parent = np.zeros(capacity, dtype=np.int64)
+        self._title = np.empty(capacity, dtype=object)
+        self._description = np.empty(capacity, dtype=object)
+        self._title_folded = np.empty(capacity, dtype=object)
+        self._description_folded = np.empty(capacity, dtype=object)
+        self._tags = np.empty(capacity, dtype=object)
+        self._assignees: Dict[int, Assignee] = {}  # detached, shared by every task of the assignee
+        self._assignee_ids: Dict[str, int] = {}
+        self._tag_rows: Dict[int, Tag] = {}  # detached, shared like the assignees
+        self._postings: Dict[str, Set[int]] = {}
+        self._orders: Dict[SortField, "np.ndarray"] = {}
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in _ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if old.dtype != object else np.empty(capacity, dtype=object)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _assignee_code(self, assignee_id: Optional[int], name: Optional[str]) -> int:
+        if assignee_id is None:
+            return -1
+        if assignee_id not in self._assignees:
+            self._assignees[assignee_id] = Assignee(id=assignee_id, name=name)
+            self._assignee_ids[name] = assignee_id
+        return assignee_id
+
+    def _shared_tag(self, tag_id: int, name: str) -> Tag:
+        tag = self._tag_rows.get(tag_id)
+        if tag is None:
+            tag = self._tag_rows[tag_id] = Tag(id=tag_id, name=name)
+        return tag
+
+    def _unindex_tags(self, row: int) -> None:
+        for tag in self._tags[row] or ():
+            self._postings[tag.name].discard(int(self._ids[row]))
+
+    def _write_row(self, row: int, values, tags=()) -> None:
+        task_id, title, description, status, priority, created_at, updated_at, due_date, assignee_id, parent_id, name = values
+        self._ids[row] = task_id
+        self._alive[row] = True
+        self._title[row] = title
+        self._description[row] = description
+        self._title_folded[row] = _fold(title)
+        self._description_folded[row] = _fold(description)
+        self._status[row] = status
+        self._priority[row] = priority
+        self._created_at[row] = created_at
+        self._updated_at[row] = _NULL_TIME if updated_at is None else updated_at
+        self._due_date[row] = _NULL_TIME if due_date is None else due_date
+        self._assignee[row] = self._assignee_code(assignee_id, name)
+        self._parent[row] = -1 if parent_id is None else parent_id
+        self._tags[row] = tuple(self._shared_tag(tag_id, tag_name) for tag_id, tag_name in tags)
+        for tag_id, tag_name in tags:
+            self._postings.setdefault(tag_name, set()).add(task_id)
+
+    def _upsert(self, values, tags) -> None:
+        row = self._row_of.get(values[0])
+        if row is None:
+            self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._row_of[values[0]] = row
+        else:
+            self._unindex_tags(row)
+        self._write_row(row, values, tags)
+
+    def _select(self):
+        table = Task.__table__  # type: ignore
+        assignees = Assignee.__table__  # type: ignore
+        return select(*[
+            type_coerce(table.c[name], Integer()) if name in _RAW_COLUMNS else table.c[name]
+            for name in _COLUMNS
+        ], assignees.c.name).select_from(table.outerjoin(assignees, table.c.assignee_id == assignees.c.id))
+
+    @staticmethod
+    def _select_tags():
+        """(task id, tag id, tag name) rows, each task's tags in name order"""
+        return (
+            select(TaskTag.task_id, Tag.id, Tag.name)
+            .join(Tag, TaskTag.tag_id == Tag.id)  # type: ignore
+            .order_by(TaskTag.task_id, Tag.name)
+        )
+
+    @staticmethod
+    def _group_tags(rows) -> Dict[int, list]:
+        tags: Dict[int, list] = {}
+        for task_id, tag_id, name in rows:
+            tags.setdefault(task_id, []).append((tag_id, name))
+        return tags
+
+    def load(self) -> None:
+        """(Re)load every task from the database
+
+        The snapshot is built off to the side and swapped in, so queries keep
+        being served meanwhile; writes noted during the load are applied after
+        the swap.
+        """
+        with self._apply_lock:
+            self._loading = True
+        try:
+            staging = ColumnarTaskStore(self.bind)
+            table = Task.__table__  # type: ignore
+            with self.bind.connect() as connection:
+                tags = self._group_tags(connection.execute(self._select_tags()))
+                result = connection.execute(self._select().order_by(table.c.id))
+                while True:
+                    rows = result.fetchmany(LOAD_CHUNK_SIZE)
+                    if not rows:
+                        break
+                    staging._grow(staging._size + len(rows))
+                    for values in rows:
+                        staging._row_of[values[0]] = staging._size
+                        staging._write_row(staging._size, values, tags.get(values[0], ()))
+                        staging._size += 1
+            # Sort the orders in use now rather than on the next read
+            for sort_field in set(self._orders) | {SortField.created_at}:
+                staging._ascending_order(sort_field)
+
+            with self._lock:
+                for name in _STATE:
+                    setattr(self, name, getattr(staging, name))
+                self._loaded = True
+        finally:
+            self._loading = False
+        self.apply_pending()
+        logger.info("Columnar task store loaded %d tasks", len(self))
+
+    def apply_changes(self, task_ids: Set[int]) -> None:
+        """Write hook: note the changed tasks for the applier thread; runs on the writer's thread, so no I/O"""
+        with self._changed_lock:
+            self._changed.update(task_ids)
+        self._wakeup.set()
+
+    def apply_pending(self) -> None:
+        """Reload the tasks changed since the last call, dropping the ones that no longer exist"""
+        with self._apply_lock:
+            if self._loading or not self._loaded:
+                # Kept for after the load, whose snapshot may predate them
+                return
+            with self._changed_lock:
+                task_ids, self._changed = self._changed, set()
+            if task_ids:
+                self._reload_rows(task_ids)
+
+    def start(self) -> None:
+        """Apply noted changes on a background thread as they come in"""
+        self._stopping = False
+        self._applier = threading.Thread(target=self._apply_continuously, name="columnar-applier", daemon=True)
+        self._applier.start()
+
+    def stop(self) -> None:
+        if self._applier is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._applier.join()
+            self._applier = None
+
+    def _apply_continuously(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                self.apply_pending()
+            except Exception:
+                logger.exception("Applying task changes to the columnar store failed")
+
+    def _reload_rows(self, task_ids: Set[int]) -> None:
+        table = Task.__table__  # type: ignore
+        ids = sorted(task_ids)
+        found = []
+        tags: Dict[int, list] = {}
+        with self.bind.connect() as connection:
+            for start in range(0, len(ids), 900):
+                chunk = ids[start:start + 900]
+                found.extend(connection.execute(self._select().where(table.c.id.in_(chunk))).all())
+                tags.update(self._group_tags(connection.execute(
+                    self._select_tags().where(TaskTag.task_id.in_(chunk))  # type: ignore
+                )))
+
+        with self._lock:
+            for values in found:
+                self._upsert(values, tags.get(values[0], ()))
+            for task_id in task_ids.difference(values[0] for values in found):
+                row = self._row_of.pop(task_id, None)
+                if row is not None:
+                    # Dead rows keep their place in the sort orders; the alive mask hides them
+                    self._unindex_tags(row)
+                    self._alive[row] = False
+            self._reorder([self._row_of[values[0]] for values in found])
+            if self._size - len(self._row_of) > max(1024, self._size // 4):
+                self._compact()
+
+    def _compact(self) -> None:
+        """Drop deleted rows, keeping the remaining rows in place order and the sort orders valid"""
+        alive = self._alive[:self._size]
+        keep = np.flatnonzero(alive)
+        position = np.full(self._size, -1, dtype=np.int64)
+        position[keep] = np.arange(len(keep))
+        for sort_field, order in self._orders.items():
+            self._orders[sort_field] = position[order[alive[order]]]
+        for name in _ARRAYS:
+            setattr(self, name, getattr(self, name)[keep].copy())
+        self._size = len(keep)
+        self._row_of = {int(task_id): row for row, task_id in enumerate(self._ids)}
+
+    def _row_key(self, sort_field: SortField) -> Callable[[int], tuple]:
+        """A row's (field, id) sort key as Python values, ordered like the cached orders"""
+        ids = self._ids
+        if sort_field == SortField.id:
+            return lambda row: (int(ids[row]),)
+        if sort_field == SortField.title:
+            return lambda row: (self._title[row], int(ids[row]))
+        if sort_field == SortField.assigned_to:
+            def assignee_key(row):
+                assignee = self._assignees.get(int(self._assignee[row]))
+                return (0, "", int(ids[row])) if assignee is None else (1, assignee.name, int(ids[row]))
+            return assignee_key
+        column = getattr(self, f"_{sort_field.value}")
+        return lambda row: (int(column[row]), int(ids[row]))
+
+    def _reorder(self, rows: List[int]) -> None:
+        """Move rewritten and new rows to their place in every cached sort order
+
+        A binary search per row and one copy of the order, instead of sorting
+        the whole table again on the next read.
+        """
+        if not rows:
+            return
+        changed = np.asarray(rows, dtype=np.int64)
+        for sort_field, order in self._orders.items():
+            key = self._row_key(sort_field)
+            kept = order[~np.isin(order, changed)]
+            moved = sorted(rows, key=key)
+            positions = [bisect.bisect_left(kept, key(row), key=key) for row in moved]
+            self._orders[sort_field] = np.insert(kept, positions, moved)
+
+    def _sort_key(self, sort_field: SortField):
+        n = self._size
+        if sort_field == SortField.id:
+            return None
+        if sort_field == SortField.title:
+            return np.unique(self._title[:n], return_inverse=True)[1]
+        if sort_field == SortField.assigned_to:
+            ranks = np.zeros(max(self._assignees, default=0) + 2, dtype=np.int32)
+            ranks[-1] = -1  # code -1 (no assignee) sorts first, like NULL
+            for rank, assignee_id in enumerate(sorted(self._assignees, key=lambda key: self._assignees[key].name)):
+                ranks[assignee_id] = rank
+            return ranks[self._assignee[:n]]
+        return getattr(self, f"_{sort_field.value}")[:n]
+
+    def _ascending_order(self, sort_field: SortField):
+        """Row positions sorted by (field, id), computed on first use and then kept current by _reorder"""
+        order = self._orders.get(sort_field)
+        if order is None:
+            ids = self._ids[:self._size]
+            key = self._sort_key(sort_field)
+            order = np.argsort(ids, kind="stable") if key is None else np.lexsort((ids, key))
+            self._orders[sort_field] = order
+        return order
+
+    def _tagged_ids(self, tags_all, tags_any) -> Set[int]:
+        """Ids of tasks matching the tag filters, intersecting the shortest postings first"""
+        matches: Optional[Set[int]] = None
+        if tags_all:
+            postings = sorted((self._postings.get(name, set()) for name in set(tags_all)), key=len)
+            matches = set(postings[0])
+            for posting in postings[1:]:
+                if not matches:
+                    break
+                matches &= posting
+        if tags_any:
+            union = set().union(*(self._postings.get(name, ()) for name in tags_any))
+            matches = union if matches is None else matches & union
+        return matches or set()
+
+    def _mask(self, status, priority, assigned_to, search, due_date_from, due_date_to, created_from, created_to,
+              tags_all=None, tags_any=None):
+        n = self._size
+        if tags_all or tags_any:
+            tagged = self._tagged_ids(tags_all, tags_any)
+            mask = np.zeros(n, dtype=bool)
+            mask[np.fromiter((self._row_of[task_id] for task_id in tagged), dtype=np.int64, count=len(tagged))] = True
+        else:
+            mask = self._alive[:n].copy()
+        if status:
+            mask &= self._status[:n] == STATUS_CODES[status]
+        if priority:
+            mask &= self._priority[:n] == PRIORITY_CODES[priority]
+        if assigned_to:
+            code = self._assignee_ids.get(assigned_to)
+            if code is None:
+                return np.zeros(n, dtype=bool)
+            mask &= self._assignee[:n] == code
+        for column, lower, upper in (
+            (self._due_date, due_date_from, due_date_to),
+            (self._created_at, created_from, created_to),
+        ):
+            if lower:
+                mask &= column[:n] >= _encode_time(lower)
+            if upper:
+                mask &= (column[:n] <= _encode_time(upper)) & (column[:n] != _NULL_TIME)
+        if search:
+            matches = _like_matcher(search)
+            rows = np.flatnonzero(mask)
+            hits = np.fromiter(
+                (matches(self._title_folded[row]) or matches(self._description_folded[row]) for row in rows),
+                dtype=bool,
+                count=len(rows),
+            )
+            mask[:] = False
+            mask[rows[hits]] = True
+        return mask
+
+    def _task(self, row: int) -> Task:
+        assignee = int(self._assignee[row])
+        return Task(
+            id=int(self._ids[row]),
+            title=self._title[row],
+            description=self._description[row],
+            status=_STATUS_BY_CODE[int(self._status[row])],
+            priority=_PRIORITY_BY_CODE[int(self._priority[row])],
+            created_at=_decode_time(self._created_at[row]),
+            updated_at=_decode_time(self._updated_at[row]),
+            due_date=_decode_time(self._due_date[row]),
+            assignee_id=assignee if assignee >= 0 else None,
+            assignee=self._assignees.get(assignee),
+            tag_rows=list(self._tags[row]),
+            parent_id=int(self._parent[row]) if self._parent[row] >= 0 else None,
+        )
+
+    def get_tasks(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[TaskPriority] = None,
+        assigned_to: Optional[str] = None,
+        search: Optional[str] = None,
+        due_date_from: Optional[datetime] = None,
+        due_date_to: Optional[datetime] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        sort_field: SortField = SortField.created_at,
+        sort_order: SortOrder = SortOrder.desc,
+        tags_all: Optional[List[str]] = None,
+        tags_any: Optional[List[str]] = None
+    ) -> tuple[List[Task], int]:
+        """Same filters, ordering and pagination as TaskCRUD.get_tasks"""
+        self.apply_pending()
+        with self._lock:
+            mask = self._mask(
+                status, priority, assigned_to, search, due_date_from, due_date_to, created_from, created_to,
+                tags_all, tags_any
+            )
+            return self._page(mask, skip, limit, sort_field, sort_order)
+
+    def get_tasks_with_facets(
+        self,
+        facets: Sequence[FacetField],
+        skip: int = 0,
+        limit: int = 100,
+        sort_field: SortField = SortField.created_at,
+        sort_order: SortOrder = SortOrder.desc,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[TaskPriority] = None,
+        assigned_to: Optional[str] = None,
+        search: Optional[str] = None,
+        due_date_from: Optional[datetime] = None,
+        due_date_to: Optional[datetime] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        tags_all: Optional[List[str]] = None,
+        tags_any: Optional[List[str]] = None
+    ) -> tuple[List[Task], int, Dict[str, List[FacetCount]]]:
+        """Same as TaskCRUD.get_tasks_with_facets, counting values under the same mask"""
+        self.apply_pending()
+        with self._lock:
+            mask = self._mask(
+                status, priority, assigned_to, search, due_date_from, due_date_to, created_from, created_to,
+                tags_all, tags_any
+            )
+            tasks, total = self._page(mask, skip, limit, sort_field, sort_order)
+            return tasks, total, {facet.value: self._facet(facet, mask) for facet in facets}
+
+    def _page(self, mask, skip: int, limit: int, sort_field: SortField, sort_order: SortOrder):
+        order = self._ascending_order(sort_field)
+        selected = order[mask[order]]
+        if sort_order == SortOrder.desc:
+            selected = selected[::-1]
+        return [self._task(row) for row in selected[skip:skip + limit]], len(selected)
+
+    def _facet(self, facet: FacetField, mask) -> List[FacetCount]:
+        from .crud import _facet_list
+
+        n = self._size
+        if facet == FacetField.status:
+            column, label = self._status, lambda code: _STATUS_BY_CODE[code].value
+        elif facet == FacetField.priority:
+            column, label = self._priority, lambda code: _PRIORITY_BY_CODE[code].value
+        else:
+            column, label = self._assignee, lambda code: self._assignees[code].name if code >= 0 else None
+        codes, counts = np.unique(column[:n][mask], return_counts=True)
+        return _facet_list({label(int(code)): int(count) for code, count in zip(codes, counts)})
+
+
+columnar_store: Optional[ColumnarTaskStore] = None
+
+
+def start_columnar_store(bind: Engine) -> Optional[ColumnarTaskStore]:
+    """Load the store and subscribe it to task writes
+
+    None when numpy is unavailable, or when several server workers would each
+    serve only their own writes because no periodic reload is configured.
+    """
+    global columnar_store
+    from .crud import register_write_hook
+
+    if np is None:
+        logger.warning("COLUMNAR_ENABLED is set but numpy is not installed; serving lists through SQL")
+        return None
+    if SERVER_WORKERS > 1 and COLUMNAR_REFRESH_SECONDS <= 0:
+        logger.warning(
+            "COLUMNAR_ENABLED with %d workers needs COLUMNAR_REFRESH_SECONDS to see other workers' writes; "
+            "serving lists through SQL", SERVER_WORKERS
+        )
+        return None
+    store = ColumnarTaskStore(bind)
+    register_write_hook(store.apply_changes)
+    store.start()
+    store.load()
+    columnar_store = store
+    return store
+
+
+def stop_columnar_store() -> None:
+    global columnar_store
+    from .crud import unregister_write_hook
+
+    if columnar_store is not None:
+        unregister_write_hook(columnar_store.apply_changes)
+        columnar_store.stop()
+        columnar_store = None
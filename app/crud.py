@@ -1,17 +1,545 @@
-from datetime import datetime, timezone
-from typing import List, Optional
-from sqlmodel import Session, select, func, desc, asc, or_
-from .models import Task, TaskStatus, TaskPriority, SortField, SortOrder
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+from pydantic import ValidationError
+from sqlalchemy import BigInteger, bindparam, case, delete, event, insert, literal, true, type_coerce, union, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, func, desc, asc, or_, exists
+from .database import begin_explicit
+from .search import TRIGRAM_SIMILARITY_THRESHOLD, fuzzy_matches, index_tasks
+from .models import (
+    ArchivedTask, Assignee, Tag, TaskTag, Task, TaskClosure, TaskDependency, TaskStatus, TaskPriority, SortField, SortOrder,
+    TaskCreate, TaskUpdate, BatchOperation, BatchOperationType, FacetCount, FacetField,
+    CalendarBucketResponse, DeadlineGroup, TaskSummary, datetime_to_epoch
+)
+
+logger = logging.getLogger(__name__)
+
+# (status, task, error) for one batch operation
+BatchOutcome = tuple[int, Optional[Task], Optional[str]]
+
+# Ids per IN (...) list, below SQLite's historical 999 bound-parameter limit
+IN_CHUNK_SIZE = 900
+
+
+def _chunks(values: Sequence[int], size: int = IN_CHUNK_SIZE) -> Iterator[Sequence[int]]:
+    """Split a list of ids into IN-list sized chunks"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# Write hooks are called with the ids of tasks created, changed or deleted by a
+# committed transaction, so in-process read models can refresh those rows
+WriteHook = Callable[[Set[int]], None]
+_write_hooks: List[WriteHook] = []
+
+
+def register_write_hook(hook: WriteHook) -> None:
+    """Call hook after every commit that changed tasks"""
+    if hook not in _write_hooks:
+        _write_hooks.append(hook)
+
+
+def unregister_write_hook(hook: WriteHook) -> None:
+    """Stop calling a registered write hook"""
+    if hook in _write_hooks:
+        _write_hooks.remove(hook)
+
+
+def _record_writes(session: Session, task_ids: Iterable[Optional[int]]) -> None:
+    """Remember changed task ids until the session's transaction ends"""
+    session.info.setdefault("changed_task_ids", set()).update(i for i in task_ids if i is not None)
+
+
+@event.listens_for(Session, "before_commit")
+def _index_changed_tasks(session) -> None:
+    """Update the trigram postings of changed tasks in the same transaction"""
+    # Also fired on each savepoint release; the outermost commit indexes every changed task once
+    if not session.info.get("changed_task_ids") or session.in_nested_transaction():
+        return
+    session.flush()
+    connection = session.connection()
+    if connection.dialect.name == "sqlite":
+        # PostgreSQL indexes the task table itself with pg_trgm
+        index_tasks(connection, session.info["changed_task_ids"])
+
+
+@event.listens_for(Session, "after_commit")
+def _run_write_hooks(session) -> None:
+    changed = session.info.pop("changed_task_ids", None)
+    if not changed:
+        return
+    for hook in list(_write_hooks):
+        try:
+            hook(changed)
+        except Exception:
+            logger.exception("Task write hook %r failed", hook)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session) -> None:
+    session.info.pop("changed_task_ids", None)
+
+
+def _intern(session: Session, model, name: str):
+    """Get the assignee or tag row for a name, creating it on first use"""
+    statement = select(model).where(model.name == name)
+    row = session.exec(statement).first()
+    if row is not None:
+        return row
+
+    row = model(name=name)
+    begin_explicit(session)
+    try:
+        with session.begin_nested():
+            session.add(row)
+    except IntegrityError:
+        # Another transaction created the same name first
+        return session.exec(statement).one()
+    return row
+
+
+def _intern_tags(session: Session, names: List[str]) -> List[Tag]:
+    """Get the tag rows for names with one query, creating the missing ones"""
+    found = {tag.name: tag for tag in session.exec(select(Tag).where(Tag.name.in_(names)))} if names else {}  # type: ignore
+    return [found.get(name) or _intern(session, Tag, name) for name in names]
+
+
+def _adjust_task_counts(session: Session, deltas: Dict[Optional[int], int], model=Assignee) -> None:
+    """Apply task_count changes per assignee (or tag) id with one executemany UPDATE"""
+    rows = [{"row_id": key, "delta": delta} for key, delta in deltas.items() if key is not None and delta]
+    if not rows:
+        return
+    table = model.__table__
+    session.connection().execute(
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(task_count=table.c.task_count + bindparam("delta")),
+        rows
+    )
+
+
+def _assignee_id_of(name: str):
+    """Scalar subquery resolving an assignee name, so filters compare integer ids"""
+    return select(Assignee.id).where(Assignee.name == name).scalar_subquery()
+
+
+def _set_task_tags(session: Session, task: Task, names: List[str], tag_deltas: Dict[Optional[int], int]) -> None:
+    """Replace a task's tags, noting tag count changes"""
+    tags = _intern_tags(session, names)
+    for tag in task.tag_rows:
+        tag_deltas[tag.id] = tag_deltas.get(tag.id, 0) - 1
+    for tag in tags:
+        tag_deltas[tag.id] = tag_deltas.get(tag.id, 0) + 1
+    task.tag_rows = sorted(tags, key=lambda tag: tag.name)
+
+
+def _tag_filters(session: Session, tags_all: Optional[List[str]], tags_any: Optional[List[str]]) -> Optional[list]:
+    """WHERE clauses for tag filters, or None when no task can match
+
+    For tags_all the rarest tag (lowest task_count) drives the query: its
+    postings are read from the (tag_id, task_id) index and every other tag
+    is probed on the (task_id, tag_id) primary key, most selective first, so
+    the work is bounded by the rarest tag rather than the most common one.
+    """
+    clauses = []
+    names = set(tags_all or ()) | set(tags_any or ())
+    if not names:
+        return clauses
+    tags = {tag.name: tag for tag in session.exec(select(Tag).where(Tag.name.in_(sorted(names))))}  # type: ignore
+
+    if tags_all:
+        if any(name not in tags for name in tags_all):
+            return None
+        wanted = {tags[name].id: tags[name] for name in tags_all}.values()
+        rarest, *others = sorted(wanted, key=lambda tag: (tag.task_count, tag.id))
+        postings = select(TaskTag.task_id).where(TaskTag.tag_id == rarest.id)
+        for tag in others:
+            probe = aliased(TaskTag)
+            postings = postings.where(exists().where(probe.task_id == TaskTag.task_id, probe.tag_id == tag.id))
+        clauses.append(Task.id.in_(postings))  # type: ignore
+    if tags_any:
+        tag_ids = [tags[name].id for name in tags_any if name in tags]
+        if not tag_ids:
+            return None
+        clauses.append(Task.id.in_(select(TaskTag.task_id).where(TaskTag.tag_id.in_(tag_ids))))  # type: ignore
+    return clauses
+
+
+class CycleError(ValueError):
+    """Raised when a parent or blocker change would make a task its own ancestor or blocker"""
+
+
+class TaskNotFoundError(LookupError):
+    """Raised when a task that a change refers to, other than the one changed, does not exist"""
+
+
+# Bound on dependency chain length followed by the recursive blocker query
+MAX_DEPENDENCY_DEPTH = 1000
+
+
+def _attach_subtree(session: Session, task_id: int, parent_id: int) -> None:
+    """Add closure rows from parent and its ancestors to task and its descendants"""
+    closure = TaskClosure.__table__  # type: ignore
+    above = union_all(
+        select(literal(parent_id).label("ancestor_id"), literal(0).label("depth")),
+        select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == parent_id),
+    ).subquery()
+    below = union_all(
+        select(literal(task_id).label("descendant_id"), literal(0).label("depth")),
+        select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == task_id),
+    ).subquery()
+    session.connection().execute(insert(closure).from_select(
+        ["ancestor_id", "descendant_id", "depth"],
+        select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+        .select_from(above.join(below, true()))
+    ))
+
+
+def _detach_subtree(session: Session, task_id: int) -> None:
+    """Remove the closure rows linking task and its descendants to task's ancestors"""
+    closure = TaskClosure.__table__  # type: ignore
+    subtree = union(
+        select(literal(task_id)),
+        select(closure.c.descendant_id).where(closure.c.ancestor_id == task_id),
+    )
+    ancestors = select(closure.c.ancestor_id).where(closure.c.descendant_id == task_id)
+    session.connection().execute(
+        delete(closure).where(closure.c.descendant_id.in_(subtree), closure.c.ancestor_id.in_(ancestors))
+    )
+
+
+def _remove_from_graph(session: Session, task_id: int) -> List[int]:
+    """Unlink a task about to be deleted; its children move up to its parent
+
+    Returns the ids of the promoted children.
+    """
+    closure = TaskClosure.__table__  # type: ignore
+    dependencies = TaskDependency.__table__  # type: ignore
+    connection = session.connection()
+    parent_id = connection.execute(
+        select(closure.c.ancestor_id).where(closure.c.descendant_id == task_id, closure.c.depth == 1)
+    ).scalar()
+    children = list(session.exec(select(Task.id).where(Task.parent_id == task_id)))
+    # Every descendant gets one level closer to the deleted task's ancestors
+    connection.execute(
+        update(closure)
+        .where(
+            closure.c.descendant_id.in_(select(closure.c.descendant_id).where(closure.c.ancestor_id == task_id)),
+            closure.c.ancestor_id.in_(select(closure.c.ancestor_id).where(closure.c.descendant_id == task_id)),
+        )
+        .values(depth=closure.c.depth - 1)
+    )
+    connection.execute(delete(closure).where(or_(closure.c.ancestor_id == task_id, closure.c.descendant_id == task_id)))
+    connection.execute(delete(dependencies).where(
+        or_(dependencies.c.blocker_id == task_id, dependencies.c.blocked_id == task_id)
+    ))
+    if children:
+        session.execute(update(Task).where(Task.parent_id == task_id).values(parent_id=parent_id))  # type: ignore
+    return children
+
+
+def _blocker_depths(task_id: int, transitive: bool = True):
+    """Subquery of (blocker_id, depth) for the tasks blocking task_id, depth 1 being direct blockers"""
+    dependencies = TaskDependency.__table__  # type: ignore
+    blockers = (
+        select(dependencies.c.blocker_id, literal(1).label("depth"))
+        .where(dependencies.c.blocked_id == task_id)
+    )
+    if not transitive:
+        return blockers.subquery()
+    blockers = blockers.cte("blockers", recursive=True)
+    blockers = blockers.union(
+        select(dependencies.c.blocker_id, blockers.c.depth + 1)
+        .join(blockers, dependencies.c.blocked_id == blockers.c.blocker_id)
+        .where(blockers.c.depth < MAX_DEPENDENCY_DEPTH)
+    )
+    # A blocker reachable along several paths is reported at its shortest distance
+    return (
+        select(blockers.c.blocker_id, func.min(blockers.c.depth).label("depth"))
+        .group_by(blockers.c.blocker_id)
+        .subquery()
+    )
+
+
+def _apply_task_changes(
+    session: Session,
+    task: Task,
+    changes: dict,
+    deltas: Dict[Optional[int], int],
+    tag_deltas: Dict[Optional[int], int]
+) -> None:
+    """Set non-None fields on a task, interning new assignee and tag names and noting count changes"""
+    for field, value in changes.items():
+        if value is None:
+            continue
+        if field == "tags":
+            _set_task_tags(session, task, value, tag_deltas)
+        elif field == "assigned_to":
+            assignee = _intern(session, Assignee, value)
+            if assignee.id != task.assignee_id:
+                deltas[task.assignee_id] = deltas.get(task.assignee_id, 0) - 1
+                deltas[assignee.id] = deltas.get(assignee.id, 0) + 1
+            task.assignee = assignee
+        else:
+            setattr(task, field, value)
+    task.updated_at = datetime.now(timezone.utc)
+
+
+def _column_filters(
+    model,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    assigned_to: Optional[str] = None,
+    search: Optional[str] = None,
+    due_date_from: Optional[datetime] = None,
+    due_date_to: Optional[datetime] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> list:
+    """WHERE clauses for the list filters on the task or the archive table"""
+    clauses = []
+    if status:
+        clauses.append(model.status == status)
+    if priority:
+        clauses.append(model.priority == priority)
+    if assigned_to:
+        clauses.append(model.assignee_id == _assignee_id_of(assigned_to))
+    if search:
+        search_term = f"%{search}%"
+        clauses.append(or_(
+            model.title.ilike(search_term),
+            model.description.ilike(search_term)
+        ))
+    if due_date_from:
+        clauses.append(model.due_date >= due_date_from)
+    if due_date_to:
+        clauses.append(model.due_date <= due_date_to)
+    if created_from:
+        clauses.append(model.created_at >= created_from)
+    if created_to:
+        clauses.append(model.created_at <= created_to)
+    return clauses
+
+
+def _archived_tag_filters(tags_all: Optional[List[str]], tags_any: Optional[List[str]]) -> list:
+    """Tag filters on ArchivedTask.tag_names, a delimited ",name1,name2," string"""
+    clauses = [ArchivedTask.tag_names.contains(f",{name},", autoescape=True) for name in tags_all or ()]  # type: ignore
+    if tags_any:
+        clauses.append(or_(*(
+            ArchivedTask.tag_names.contains(f",{name},", autoescape=True) for name in tags_any  # type: ignore
+        )))
+    return clauses
+
+
+def _get_tasks_with_archive(
+    session: Session,
+    live_filters: list,
+    archive_filters: list,
+    skip: int,
+    limit: int,
+    sort_field: SortField,
+    sort_order: SortOrder,
+    total: Optional[int] = None
+) -> tuple[list, int]:
+    """Page through live and archived tasks as one list
+
+    The union only carries (id, sort key, source), so ordering and paging
+    stay cheap; the rows of the requested page are then loaded from each table.
+    The count is skipped when the caller already knows the total.
+    """
+    def keys(model, filters, archived: int):
+        if sort_field == SortField.assigned_to:
+            sort_key = select(Assignee.name).where(Assignee.id == model.assignee_id).scalar_subquery()
+        else:
+            sort_key = getattr(model, sort_field.value)
+        return select(
+            model.id.label("id"), sort_key.label("sort_key"), literal(archived).label("archived")
+        ).where(*filters)
+
+    rows = union_all(keys(Task, live_filters, 0), keys(ArchivedTask, archive_filters, 1)).subquery()
+    if total is None:
+        total = session.exec(select(func.count()).select_from(rows)).one()
+    direction = asc if sort_order == SortOrder.asc else desc
+    page = session.exec(
+        select(rows.c.id, rows.c.archived)
+        .order_by(direction(rows.c.sort_key), direction(rows.c.id))
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+    found = {}
+    for model, archived in ((Task, 0), (ArchivedTask, 1)):
+        ids = [task_id for task_id, source in page if source == archived]
+        if ids:
+            found.update({(task.id, archived): task for task in session.exec(select(model).where(model.id.in_(ids)))})
+    return [found[(task_id, source)] for task_id, source in page], total
+
+
+_FACET_COLUMNS = {
+    FacetField.status: "status",
+    FacetField.priority: "priority",
+    FacetField.assigned_to: "assignee_id",
+}
+
+
+def _task_sources(
+    session: Session,
+    include_archived: bool,
+    tags_all: Optional[List[str]],
+    tags_any: Optional[List[str]],
+    **filters
+) -> Optional[List[tuple]]:
+    """(model, WHERE clauses) for the live table and, if asked, the archive; None when nothing can match"""
+    tag_filters = _tag_filters(session, tags_all, tags_any)
+    if tag_filters is None:
+        return None
+    sources = [(Task, [*tag_filters, *_column_filters(Task, **filters)])]
+    if include_archived:
+        sources.append(
+            (ArchivedTask, [*_archived_tag_filters(tags_all, tags_any), *_column_filters(ArchivedTask, **filters)])
+        )
+    return sources
+
+
+def _task_page(
+    session: Session,
+    sources: List[tuple],
+    skip: int,
+    limit: int,
+    sort_field: SortField,
+    sort_order: SortOrder,
+    total: Optional[int] = None
+) -> tuple[List[Task], int]:
+    """One page of the filtered tasks, with the total count unless it is already known"""
+    if len(sources) > 1:
+        return _get_tasks_with_archive(
+            session, sources[0][1], sources[1][1], skip, limit, sort_field, sort_order, total
+        )
+    live_filters = sources[0][1]
+    statement = select(Task).where(*live_filters)
+
+    # Get total count with same filters
+    if total is None:
+        count_statement = select(func.count(Task.id)).where(*live_filters)  # type: ignore
+        total = session.exec(count_statement).first() or 0
+
+    # Apply sorting, ties broken by id so pages are stable
+    if sort_field == SortField.assigned_to:
+        statement = statement.outerjoin(Assignee, Task.assignee_id == Assignee.id)  # type: ignore
+        sort_column = Assignee.name
+    else:
+        sort_column = getattr(Task, sort_field.value)  # type: ignore
+    direction = asc if sort_order == SortOrder.asc else desc
+    statement = statement.order_by(direction(sort_column), direction(Task.id))  # type: ignore
+
+    # Apply pagination
+    statement = statement.offset(skip).limit(limit)
+    return list(session.exec(statement).all()), total
+
+
+def _facet_list(counts: Dict[Optional[str], int]) -> List[FacetCount]:
+    """Facet values, most frequent first"""
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0] is None, item[0] or ""))
+    return [FacetCount(value=value, count=count) for value, count in ordered]
+
+
+def _facet_counts(
+    session: Session,
+    facets: Sequence[FacetField],
+    sources: Sequence[tuple]
+) -> tuple[Dict[str, List[FacetCount]], int]:
+    """Count matching tasks per value of each facet, plus the total, in one grouped scan
+
+    SQLite has no GROUPING SETS, so the rows are grouped by every requested
+    facet column at once; the groups are few (a handful of statuses times
+    priorities times assignees) and are rolled up per facet here.
+    """
+    columns = [_FACET_COLUMNS[facet] for facet in facets]
+    grouped = [
+        select(*[getattr(model, column) for column in columns], func.count().label("count"))
+        .where(*filters)
+        .group_by(*[getattr(model, column) for column in columns])
+        for model, filters in sources
+    ]
+    statement = grouped[0] if len(grouped) == 1 else union_all(*grouped)
+    rows = session.exec(statement).all()  # type: ignore
+
+    counts: Dict[FacetField, Dict] = {facet: {} for facet in facets}
+    total = 0
+    for row in rows:
+        *values, count = row
+        total += count
+        for facet, value in zip(facets, values):
+            counts[facet][value] = counts[facet].get(value, 0) + count
+
+    named: Dict[str, List[FacetCount]] = {}
+    for facet, by_value in counts.items():
+        if facet == FacetField.assigned_to:
+            ids = [key for key in by_value if key is not None]
+            names = dict(session.exec(
+                select(Assignee.id, Assignee.name).where(Assignee.id.in_(ids))  # type: ignore
+            ).all()) if ids else {}
+            by_value = {names.get(key) if key is not None else None: count for key, count in by_value.items()}
+        else:
+            by_value = {key.value: count for key, count in by_value.items()}
+        named[facet.value] = _facet_list(by_value)
+    return named, total
+
+
+OPEN_STATUSES = (TaskStatus.pending, TaskStatus.in_progress)
+
+
+def _first_due_by_group(session: Session, group, filters: list, per_group: int) -> Dict[int, List[TaskSummary]]:
+    """The earliest due tasks of each group, as summaries, in one ROW_NUMBER query"""
+    ranked = select(
+        Task.id, Task.title, Task.status, Task.priority, Task.due_date, Task.assignee_id,
+        group.label("grp"),
+        func.row_number().over(partition_by=group, order_by=(Task.due_date, Task.id)).label("rank"),
+    ).where(*filters).subquery()
+    rows = session.exec(
+        select(ranked, Assignee.name)
+        .outerjoin(Assignee, Assignee.id == ranked.c.assignee_id)
+        .where(ranked.c.rank <= per_group)
+        .order_by(ranked.c.grp, ranked.c.rank)
+    )
+    summaries: Dict[int, List[TaskSummary]] = {}
+    for row in rows:
+        summaries.setdefault(row.grp, []).append(TaskSummary(
+            id=row.id, title=row.title, status=row.status, priority=row.priority,
+            due_date=row.due_date, assigned_to=row.name
+        ))
+    return summaries
 
 
 class TaskCRUD:
     """CRUD operations for Task model"""
 
     @staticmethod
-    def create_task(session: Session, task_data: dict) -> Task:
-        """Create a new task"""
+    def create_task(session: Session, task_data: dict, commit: bool = True) -> Task:
+        """Create a new task (commit=False only flushes, leaving the transaction to the caller)"""
+        task_data = dict(task_data)
+        assigned_to = task_data.pop("assigned_to", None)
+        tags = _intern_tags(session, task_data.pop("tags", None) or [])
+        parent_id = task_data.get("parent_id")
+        if parent_id is not None and TaskCRUD.get_task(session, parent_id) is None:
+            raise ValueError(f"Parent task {parent_id} not found")
         task = Task(**task_data)
+        if assigned_to:
+            task.assignee = _intern(session, Assignee, assigned_to)
+        task.tag_rows = sorted(tags, key=lambda tag: tag.name)
         session.add(task)
+        session.flush()
+        if parent_id is not None:
+            _attach_subtree(session, task.id, parent_id)
+        _adjust_task_counts(session, {task.assignee_id: 1})
+        _adjust_task_counts(session, {tag.id: 1 for tag in tags}, Tag)
+        _record_writes(session, [task.id])
+        if not commit:
+            return task
         session.commit()
         session.refresh(task)
         return task
@@ -22,6 +550,15 @@ class TaskCRUD:
         statement = select(Task).where(Task.id == task_id)
         return session.exec(statement).first()
 
+    @staticmethod
+    def get_tasks_by_ids(session: Session, task_ids: List[int]) -> List[Optional[Task]]:
+        """Get many tasks by ID in request order, None where a task does not exist"""
+        found = {}
+        for chunk in _chunks(list(dict.fromkeys(task_ids))):
+            for task in session.exec(select(Task).where(Task.id.in_(chunk))):  # type: ignore
+                found[task.id] = task
+        return [found.get(task_id) for task_id in task_ids]
+
     @staticmethod
     def get_tasks(
         session: Session,
@@ -36,103 +573,88 @@ class TaskCRUD:
         created_from: Optional[datetime] = None,
         created_to: Optional[datetime] = None,
         sort_field: SortField = SortField.created_at,
-        sort_order: SortOrder = SortOrder.desc
+        sort_order: SortOrder = SortOrder.desc,
+        tags_all: Optional[List[str]] = None,
+        tags_any: Optional[List[str]] = None,
+        include_archived: bool = False
     ) -> tuple[List[Task], int]:
-        """Get tasks with advanced filtering, sorting, and pagination"""
-        statement = select(Task)
-        
-        # Apply filters
-        if status:
-            statement = statement.where(Task.status == status)
-        if priority:
-            statement = statement.where(Task.priority == priority)
-        if assigned_to:
-            statement = statement.where(Task.assigned_to == assigned_to)
-        if search:
-            search_term = f"%{search}%"
-            statement = statement.where(
-                or_(
-                    Task.title.ilike(search_term),  # type: ignore
-                    Task.description.ilike(search_term)  # type: ignore
-                )
-            )
-        if due_date_from:
-            statement = statement.where(Task.due_date >= due_date_from)  # type: ignore
-        if due_date_to:
-            statement = statement.where(Task.due_date <= due_date_to)  # type: ignore
-        if created_from:
-            statement = statement.where(Task.created_at >= created_from)
-        if created_to:
-            statement = statement.where(Task.created_at <= created_to)
-        
-        # Get total count with same filters
-        count_statement = select(func.count(Task.id))  # type: ignore
-        if status:
-            count_statement = count_statement.where(Task.status == status)
-        if priority:
-            count_statement = count_statement.where(Task.priority == priority)
-        if assigned_to:
-            count_statement = count_statement.where(Task.assigned_to == assigned_to)
-        if search:
-            search_term = f"%{search}%"
-            count_statement = count_statement.where(
-                or_(
-                    Task.title.ilike(search_term),  # type: ignore
-                    Task.description.ilike(search_term)  # type: ignore
-                )
-            )
-        if due_date_from:
-            count_statement = count_statement.where(Task.due_date >= due_date_from)  # type: ignore
-        if due_date_to:
-            count_statement = count_statement.where(Task.due_date <= due_date_to)  # type: ignore
-        if created_from:
-            count_statement = count_statement.where(Task.created_at >= created_from)
-        if created_to:
-            count_statement = count_statement.where(Task.created_at <= created_to)
-        
-        total = session.exec(count_statement).first() or 0
-        
-        # Apply sorting
-        sort_column = getattr(Task, sort_field.value)  # type: ignore
-        if sort_order == SortOrder.asc:
-            statement = statement.order_by(asc(sort_column))
-        else:
-            statement = statement.order_by(desc(sort_column))
-        
-        # Apply pagination
-        statement = statement.offset(skip).limit(limit)
-        tasks = session.exec(statement).all()
-        
-        return list(tasks), total
+        """Get tasks with advanced filtering, sorting, and pagination
+
+        Only live tasks by default; with include_archived, archived tasks are
+        merged in (as ArchivedTask rows) under the same filters and ordering.
+        """
+        sources = _task_sources(
+            session, include_archived, tags_all, tags_any,
+            status=status, priority=priority, assigned_to=assigned_to, search=search,
+            due_date_from=due_date_from, due_date_to=due_date_to, created_from=created_from, created_to=created_to
+        )
+        if sources is None:
+            return [], 0
+        return _task_page(session, sources, skip, limit, sort_field, sort_order)
 
     @staticmethod
-    def update_task(session: Session, task_id: int, task_data: dict) -> Optional[Task]:
-        """Update an existing task"""
+    def get_tasks_with_facets(
+        session: Session,
+        facets: Sequence[FacetField],
+        skip: int = 0,
+        limit: int = 100,
+        sort_field: SortField = SortField.created_at,
+        sort_order: SortOrder = SortOrder.desc,
+        tags_all: Optional[List[str]] = None,
+        tags_any: Optional[List[str]] = None,
+        include_archived: bool = False,
+        **filters
+    ) -> tuple[List[Task], int, Dict[str, List[FacetCount]]]:
+        """Same as get_tasks, plus value counts for each facet over all matching tasks
+
+        The facet query groups the whole filtered set, so it also yields the
+        total and replaces the separate count query.
+        """
+        sources = _task_sources(session, include_archived, tags_all, tags_any, **filters)
+        if sources is None:
+            return [], 0, {facet.value: [] for facet in facets}
+        facet_counts, total = _facet_counts(session, facets, sources)
+        tasks, _ = _task_page(session, sources, skip, limit, sort_field, sort_order, total)
+        return tasks, total, facet_counts
+
+    @staticmethod
+    def update_task(session: Session, task_id: int, task_data: dict, commit: bool = True) -> Optional[Task]:
+        """Update an existing task (commit=False only flushes, leaving the transaction to the caller)"""
         task = TaskCRUD.get_task(session, task_id)
         if not task:
             return None
         
-        # Update fields
-        for field, value in task_data.items():
-            if value is not None:
-                setattr(task, field, value)
-        
-        # Update the updated_at timestamp
-        task.updated_at = datetime.now(timezone.utc)
+        # Update fields and the updated_at timestamp
+        deltas: Dict[Optional[int], int] = {}
+        tag_deltas: Dict[Optional[int], int] = {}
+        _apply_task_changes(session, task, task_data, deltas, tag_deltas)
         
         session.add(task)
+        session.flush()
+        _adjust_task_counts(session, deltas)
+        _adjust_task_counts(session, tag_deltas, Tag)
+        _record_writes(session, [task_id])
+        if not commit:
+            return task
         session.commit()
         session.refresh(task)
         return task
 
     @staticmethod
-    def delete_task(session: Session, task_id: int) -> bool:
-        """Delete a task"""
+    def delete_task(session: Session, task_id: int, commit: bool = True) -> bool:
+        """Delete a task (commit=False only flushes, leaving the transaction to the caller)"""
         task = TaskCRUD.get_task(session, task_id)
         if not task:
             return False
         
+        children = _remove_from_graph(session, task_id)
         session.delete(task)
+        _adjust_task_counts(session, {task.assignee_id: -1})
+        _adjust_task_counts(session, {tag.id: -1 for tag in task.tag_rows}, Tag)
+        _record_writes(session, [task_id, *children])
+        if not commit:
+            session.flush()
+            return True
         session.commit()
         return True
 
@@ -157,17 +679,18 @@ class TaskCRUD:
             return 0, 0
         
         updated_count = 0
+        deltas: Dict[Optional[int], int] = {}
+        tag_deltas: Dict[Optional[int], int] = {}
         for task in tasks:
-            # Update fields
-            for field, value in updates.items():
-                if value is not None:
-                    setattr(task, field, value)
-            
-            # Update the updated_at timestamp
-            task.updated_at = datetime.now(timezone.utc)
+            # Update fields and the updated_at timestamp
+            _apply_task_changes(session, task, updates, deltas, tag_deltas)
             session.add(task)
             updated_count += 1
         
+        session.flush()
+        _adjust_task_counts(session, deltas)
+        _adjust_task_counts(session, tag_deltas, Tag)
+        _record_writes(session, (task.id for task in tasks))
         session.commit()
         return updated_count, len(task_ids)
 
@@ -182,14 +705,484 @@ class TaskCRUD:
             return 0, 0
         
         deleted_count = 0
+        children: List[int] = []
         for task in tasks:
+            children.extend(_remove_from_graph(session, task.id))
             session.delete(task)
             deleted_count += 1
         
+        _adjust_task_counts(session, {key: -count for key, count in Counter(task.assignee_id for task in tasks).items()})
+        _adjust_task_counts(session, {key: -count for key, count in Counter(
+            tag.id for task in tasks for tag in task.tag_rows
+        ).items()}, Tag)
+        _record_writes(session, [*(task.id for task in tasks), *children])
         session.commit()
         return deleted_count, len(task_ids)
 
+    @staticmethod
+    def bulk_patch_tasks(session: Session, patches: List[tuple[int, dict]]) -> tuple[int, List[int]]:
+        """Apply different changes to each task
+
+        Patches are grouped by the set of fields they change and each group is
+        sent as one executemany UPDATE, so thousands of patches cost a handful
+        of statements. Returns the number of updated tasks and the missing ids.
+        """
+        task_ids = [task_id for task_id, _ in patches]
+        existing: Dict[int, Optional[int]] = {}  # task id -> current assignee id
+        for chunk in _chunks(task_ids):
+            existing.update(session.exec(select(Task.id, Task.assignee_id).where(Task.id.in_(chunk))).all())  # type: ignore
+
+        now = datetime.now(timezone.utc)
+        assignee_ids: Dict[str, Optional[int]] = {}
+        deltas: Dict[Optional[int], int] = {}
+        retagged: Dict[int, List[str]] = {}
+        groups: dict[tuple[str, ...], List[dict]] = {}
+        for task_id, changes in patches:
+            if task_id not in existing:
+                continue
+            changes = dict(changes)
+            if "tags" in changes:
+                retagged[task_id] = changes.pop("tags")
+            if "assigned_to" in changes:
+                name = changes.pop("assigned_to")
+                if name not in assignee_ids:
+                    assignee_ids[name] = _intern(session, Assignee, name).id
+                changes["assignee_id"] = assignee_ids[name]
+                if changes["assignee_id"] != existing[task_id]:
+                    deltas[existing[task_id]] = deltas.get(existing[task_id], 0) - 1
+                    deltas[changes["assignee_id"]] = deltas.get(changes["assignee_id"], 0) + 1
+            groups.setdefault(tuple(sorted(changes)), []).append({**changes, "updated_at": now, "task_id": task_id})
+
+        table = Task.__table__  # type: ignore
+        connection = session.connection()
+        for fields, rows in groups.items():
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("task_id"))
+                .values({field: bindparam(field) for field in (*fields, "updated_at")})
+            )
+            connection.execute(statement, rows)
+
+        # Tag changes replace association rows, so they go through the ORM relationship
+        tag_deltas: Dict[Optional[int], int] = {}
+        for chunk in _chunks(list(retagged)):
+            for task in session.exec(select(Task).where(Task.id.in_(chunk))):  # type: ignore
+                _set_task_tags(session, task, retagged[task.id], tag_deltas)
+        session.flush()
+
+        _adjust_task_counts(session, deltas)
+        _adjust_task_counts(session, tag_deltas, Tag)
+        _record_writes(session, existing)
+        session.commit()
+        return len(existing), [task_id for task_id in task_ids if task_id not in existing]
+
+    @staticmethod
+    def claim_tasks(
+        session: Session,
+        assigned_to: str,
+        limit: int = 1,
+        min_priority: Optional[TaskPriority] = None,
+        tags_all: Optional[List[str]] = None,
+        tags_any: Optional[List[str]] = None,
+        commit: bool = True
+    ) -> List[Task]:
+        """Atomically take the next pending tasks: mark them in_progress for an assignee and return them
+
+        Only unassigned tasks whose blockers are all done can be claimed, most
+        urgent first, then earliest due, then oldest. Selection and update are
+        one UPDATE ... WHERE id IN (SELECT ...) RETURNING statement: SQLite
+        runs it under its single write lock, and on PostgreSQL the subquery
+        uses FOR UPDATE SKIP LOCKED so concurrent claimers pass over each
+        other's rows instead of waiting or claiming them twice.
+        """
+        clauses = _tag_filters(session, tags_all, tags_any)
+        if clauses is None:
+            return []
+        blocker = aliased(Task)
+        candidates = (
+            select(Task.id)
+            .where(
+                Task.status == TaskStatus.pending,
+                Task.assignee_id.is_(None),  # type: ignore
+                ~exists().where(
+                    TaskDependency.blocked_id == Task.id,
+                    blocker.id == TaskDependency.blocker_id,
+                    blocker.status.notin_((TaskStatus.completed, TaskStatus.cancelled)),  # type: ignore
+                ),
+                *clauses,
+            )
+            .order_by(desc(Task.priority), Task.due_date.asc().nulls_last(), Task.id)  # type: ignore
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if min_priority is not None:
+            candidates = candidates.where(Task.priority >= min_priority)
+
+        assignee = _intern(session, Assignee, assigned_to)
+        session.flush()
+        table = Task.__table__
+        claimed = [row.id for row in session.connection().execute(
+            update(table)
+            .where(table.c.id.in_(candidates), table.c.status == TaskStatus.pending)
+            .values(status=TaskStatus.in_progress, assignee_id=assignee.id, updated_at=datetime.now(timezone.utc))
+            .returning(table.c.id)
+        )]
+        if not claimed:
+            if commit:
+                session.commit()
+            return []
+
+        # Every claimed task was unassigned, so only the claimer's count changes
+        _adjust_task_counts(session, {assignee.id: len(claimed)})
+        _record_writes(session, claimed)
+        if commit:
+            session.commit()
+        return list(session.exec(
+            select(Task)
+            .where(Task.id.in_(claimed))  # type: ignore
+            .order_by(desc(Task.priority), Task.due_date.asc().nulls_last(), Task.id)  # type: ignore
+            .execution_options(populate_existing=True)
+        ))
+
+    @staticmethod
+    def get_archived_task(session: Session, task_id: int) -> Optional[ArchivedTask]:
+        """Get an archived task by ID"""
+        return session.get(ArchivedTask, task_id)
+
+    @staticmethod
+    def archive_tasks(session: Session, task_ids: List[int]) -> int:
+        """Move tasks to the archive table in the current transaction and commit
+
+        Their dependencies and closure rows are dropped and assignee and tag
+        counts decremented, since those only cover live tasks. Callers pick
+        tasks without subtasks, so no live task is left pointing at an
+        archived parent. The write lock is taken before the tasks are read
+        (BEGIN IMMEDIATE on SQLite, FOR UPDATE elsewhere), so a task archived
+        concurrently by another process is no longer found and is skipped
+        rather than copied twice.
+        """
+        begin_explicit(session, immediate=True)
+        tasks = session.exec(
+            select(Task)
+            .where(Task.id.in_(task_ids))  # type: ignore
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).all()
+        if not tasks:
+            return 0
+        now = datetime.now(timezone.utc)
+        for task in tasks:
+            session.add(ArchivedTask(
+                id=task.id,
+                title=task.title,
+                description=task.description,
+                status=task.status,
+                priority=task.priority,
+                created_at=task.created_at,
+                updated_at=task.updated_at,
+                due_date=task.due_date,
+                assignee_id=task.assignee_id,
+                parent_id=task.parent_id,
+                tag_names="".join(f",{name}" for name in task.tags) + "," if task.tag_rows else "",
+                archived_at=now,
+            ))
+            _remove_from_graph(session, task.id)
+            session.delete(task)
+
+        _adjust_task_counts(session, {key: -count for key, count in Counter(task.assignee_id for task in tasks).items()})
+        _adjust_task_counts(session, {key: -count for key, count in Counter(
+            tag.id for task in tasks for tag in task.tag_rows
+        ).items()}, Tag)
+        _record_writes(session, (task.id for task in tasks))
+        session.commit()
+        return len(tasks)
+
+    @staticmethod
+    def set_parent(session: Session, task_id: int, parent_id: Optional[int]) -> Optional[Task]:
+        """Move a task, with its subtree, under another task (None: make it top-level)
+
+        Raises TaskNotFoundError if the parent does not exist and CycleError if
+        it is the task itself or one of its descendants.
+        """
+        # Hold the write transaction from the cycle check to the closure update
+        begin_explicit(session)
+        ids = [task_id] if parent_id is None else [task_id, parent_id]
+        rows = {task.id: task for task in session.exec(select(Task).where(Task.id.in_(ids)).with_for_update())}  # type: ignore
+        task = rows.get(task_id)
+        if task is None:
+            return None
+        if parent_id is not None:
+            if parent_id not in rows:
+                raise TaskNotFoundError(f"Parent task {parent_id} not found")
+            closure = TaskClosure.__table__  # type: ignore
+            descendant = session.connection().execute(select(closure.c.depth).where(
+                closure.c.ancestor_id == task_id, closure.c.descendant_id == parent_id
+            )).first()
+            if parent_id == task_id or descendant is not None:
+                raise CycleError(f"Task {parent_id} is task {task_id} or one of its subtasks")
+
+        if task.parent_id != parent_id:
+            if task.parent_id is not None:
+                _detach_subtree(session, task_id)
+            if parent_id is not None:
+                _attach_subtree(session, task_id, parent_id)
+            task.parent_id = parent_id
+            task.updated_at = datetime.now(timezone.utc)
+            session.add(task)
+            session.flush()
+            _record_writes(session, [task_id])
+        session.commit()
+        session.refresh(task)
+        return task
+
+    @staticmethod
+    def get_subtree(session: Session, task_id: int, max_depth: Optional[int] = None) -> List[tuple[int, Task]]:
+        """Get all descendants of a task as (depth, task), in breadth-first order"""
+        statement = (
+            select(TaskClosure.depth, Task)
+            .join(TaskClosure, TaskClosure.descendant_id == Task.id)  # type: ignore
+            .where(TaskClosure.ancestor_id == task_id)
+        )
+        if max_depth is not None:
+            statement = statement.where(TaskClosure.depth <= max_depth)
+        return list(session.exec(statement.order_by(TaskClosure.depth, Task.id)).all())  # type: ignore
+
+    @staticmethod
+    def get_ancestors(session: Session, task_id: int) -> List[tuple[int, Task]]:
+        """Get the ancestors of a task as (depth, task), from its parent up to the root"""
+        statement = (
+            select(TaskClosure.depth, Task)
+            .join(TaskClosure, TaskClosure.ancestor_id == Task.id)  # type: ignore
+            .where(TaskClosure.descendant_id == task_id)
+            .order_by(TaskClosure.depth)
+        )
+        return list(session.exec(statement).all())  # type: ignore
+
+    @staticmethod
+    def add_blocker(session: Session, task_id: int, blocker_id: int) -> bool:
+        """Record that blocker_id must be done before task_id; False if either task does not exist
+
+        Raises CycleError if the two are the same task or task_id already blocks
+        blocker_id, directly or transitively.
+        """
+        if task_id == blocker_id:
+            raise CycleError("A task cannot block itself")
+        begin_explicit(session)
+        found = session.exec(
+            select(Task.id).where(Task.id.in_([task_id, blocker_id])).with_for_update()  # type: ignore
+        ).all()
+        if len(set(found)) != 2:
+            return False
+        blockers = _blocker_depths(blocker_id)
+        if session.exec(select(blockers.c.blocker_id).where(
+            blockers.c.blocker_id == task_id
+        )).first() is not None:
+            raise CycleError(f"Task {task_id} already blocks task {blocker_id}")
+
+        existing = session.get(TaskDependency, (task_id, blocker_id))
+        if existing is None:
+            session.add(TaskDependency(blocked_id=task_id, blocker_id=blocker_id))
+        session.commit()
+        return True
+
+    @staticmethod
+    def remove_blocker(session: Session, task_id: int, blocker_id: int) -> bool:
+        """Remove a dependency; False if it did not exist"""
+        dependency = session.get(TaskDependency, (task_id, blocker_id))
+        if dependency is None:
+            return False
+        session.delete(dependency)
+        session.commit()
+        return True
+
+    @staticmethod
+    def get_blockers(session: Session, task_id: int, transitive: bool = True) -> List[tuple[int, Task]]:
+        """Get the tasks blocking a task as (depth, task), nearest first
+
+        With transitive, blockers of blockers are followed with one recursive query.
+        """
+        blockers = _blocker_depths(task_id, transitive)
+        statement = (
+            select(blockers.c.depth, Task)
+            .join(blockers, blockers.c.blocker_id == Task.id)
+            .order_by(blockers.c.depth, Task.id)
+        )
+        return list(session.exec(statement).all())  # type: ignore
+
+    @staticmethod
+    def get_assignees(session: Session) -> List[Assignee]:
+        """Get all assignees with their task counts, ordered by name"""
+        return list(session.exec(select(Assignee).order_by(Assignee.name)).all())
+
+    @staticmethod
+    def get_tags(session: Session) -> List[Tag]:
+        """Get all tags with their task counts, ordered by name"""
+        return list(session.exec(select(Tag).order_by(Tag.name)).all())
+
     @staticmethod
     def search_tasks(session: Session, search_term: str, skip: int = 0, limit: int = 100) -> tuple[List[Task], int]:
         """Search tasks by title and description"""
-        return TaskCRUD.get_tasks(session, skip, limit, search=search_term) 
\ No newline at end of file
+        return TaskCRUD.get_tasks(session, skip, limit, search=search_term)
+
+    @staticmethod
+    def get_calendar(
+        session: Session,
+        start: datetime,
+        end: datetime,
+        width: timedelta,
+        per_bucket: int = 0,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[TaskPriority] = None,
+        assigned_to: Optional[str] = None
+    ) -> List[CalendarBucketResponse]:
+        """Count tasks due in each [start + k * width, start + (k + 1) * width) bucket up to end
+
+        Buckets are aligned to start, so a start at local midnight gives local
+        days. Both queries read only the due_date index range of the window
+        and group by the bucket number computed in SQL from the stored epoch.
+        Every bucket is returned, empty ones with a zero count.
+        """
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+        width_us = width // timedelta(microseconds=1)
+        bucket = (type_coerce(Task.due_date, BigInteger) - datetime_to_epoch(start)) // width_us
+        filters = [
+            Task.due_date >= start,  # type: ignore
+            Task.due_date < end,  # type: ignore
+            *_column_filters(Task, status=status, priority=priority, assigned_to=assigned_to),
+        ]
+        counts = dict(session.exec(select(bucket, func.count()).where(*filters).group_by(bucket)).all())
+        summaries = _first_due_by_group(session, bucket, filters, per_bucket) if per_bucket else {}
+        return [
+            CalendarBucketResponse(
+                start=start + index * width,
+                end=min(start + (index + 1) * width, end),
+                count=counts.get(index, 0),
+                tasks=summaries.get(index, []),
+            )
+            for index in range(math.ceil((end - start) / width))
+        ]
+
+    @staticmethod
+    def get_deadlines(
+        session: Session,
+        now: datetime,
+        within: timedelta,
+        limit: int = 10,
+        priority: Optional[TaskPriority] = None,
+        assigned_to: Optional[str] = None
+    ) -> Dict[str, DeadlineGroup]:
+        """Open tasks that are overdue and that fall due before now + within, most urgent deadline first"""
+        overdue = case((Task.due_date < now, 0), else_=1)  # type: ignore
+        filters = [
+            Task.status.in_(OPEN_STATUSES),  # type: ignore
+            Task.due_date < now + within,  # type: ignore
+            *_column_filters(Task, priority=priority, assigned_to=assigned_to),
+        ]
+        counts = dict(session.exec(select(overdue, func.count()).where(*filters).group_by(overdue)).all())
+        summaries = _first_due_by_group(session, overdue, filters, limit) if limit else {}
+        return {
+            name: DeadlineGroup(count=counts.get(group, 0), tasks=summaries.get(group, []))
+            for name, group in (("overdue", 0), ("due_soon", 1))
+        }
+
+    @staticmethod
+    def fuzzy_search_tasks(
+        session: Session,
+        search_term: str,
+        skip: int = 0,
+        limit: int = 100,
+        threshold: float = TRIGRAM_SIMILARITY_THRESHOLD,
+        facets: Sequence[FacetField] = ()
+    ) -> tuple[List[Task], int, Dict[str, List[FacetCount]]]:
+        """Typo-tolerant search ranked by trigram similarity, most similar first
+
+        Facet counts, if asked for, cover every match; the returned dict is
+        empty otherwise.
+        """
+        matches = fuzzy_matches(session, search_term, threshold)
+        if matches is None:
+            return [], 0, {facet.value: [] for facet in facets}
+        facet_counts: Dict[str, List[FacetCount]] = {}
+        if facets:
+            facet_counts, total = _facet_counts(session, facets, [(Task, [Task.id.in_(select(matches.c.task_id))])])  # type: ignore
+        else:
+            total = session.exec(select(func.count()).select_from(matches)).one()
+        tasks = session.exec(
+            select(Task)
+            .join(matches, Task.id == matches.c.task_id)
+            .order_by(matches.c.score.desc(), desc(Task.id))
+            .offset(skip)
+            .limit(limit)
+        ).all()
+        return list(tasks), total, facet_counts
+
+    @staticmethod
+    def execute_batch(session: Session, operations: List[BatchOperation], atomic: bool = False) -> tuple[List[BatchOutcome], bool]:
+        """Run create/update/delete/get operations in order within one transaction
+
+        Without atomic, each operation runs in its own savepoint so a failure only
+        undoes that operation. With atomic, the first failure rolls back the whole
+        batch and the remaining operations are skipped.
+        Returns the per-operation outcomes and whether the batch was committed.
+        """
+        if not atomic:
+            begin_explicit(session)
+
+        outcomes: List[BatchOutcome] = []
+        for index, operation in enumerate(operations):
+            try:
+                if atomic:
+                    outcome = TaskCRUD._apply_batch_operation(session, operation)
+                else:
+                    with session.begin_nested():
+                        outcome = TaskCRUD._apply_batch_operation(session, operation)
+            except ValidationError as e:
+                outcome = (422, None, str(e))
+            except Exception as e:
+                outcome = (400, None, str(e))
+
+            status, task, _ = outcome
+            if task is not None:
+                # Detach a snapshot so later operations and the commit do not expire it
+                session.expunge(task)
+            outcomes.append(outcome)
+
+            if atomic and status >= 400:
+                session.rollback()
+                rolled_back = f"Rolled back: operation {index} failed"
+                skipped = f"Not executed: operation {index} failed"
+                return [
+                    *[(424, None, rolled_back) for _ in outcomes[:index]],
+                    outcome,
+                    *[(424, None, skipped) for _ in operations[index + 1:]],
+                ], False
+
+        session.commit()
+        return outcomes, True
+
+    @staticmethod
+    def _apply_batch_operation(session: Session, operation: BatchOperation) -> BatchOutcome:
+        """Apply one batch operation, flushing but not committing"""
+        if operation.op == BatchOperationType.create:
+            task_data = TaskCreate(**(operation.data or {})).dict()
+            return 201, TaskCRUD.create_task(session, task_data, commit=False), None
+
+        task_id = operation.task_id
+        if operation.op == BatchOperationType.get:
+            task = TaskCRUD.get_task(session, task_id)
+        elif operation.op == BatchOperationType.update:
+            update_data = TaskUpdate(**(operation.data or {})).dict(exclude_none=True)
+            if not update_data:
+                return 400, None, "No valid fields to update"
+            task = TaskCRUD.update_task(session, task_id, update_data, commit=False)
+        else:
+            if not TaskCRUD.delete_task(session, task_id, commit=False):
+                return 404, None, "Task not found"
+            return 204, None, None
+
+        if not task:
+            return 404, None, "Task not found"
+        return 200, task, None
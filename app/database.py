@@ -1,7 +1,9 @@
-from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel import create_engine, Session
 from typing import Generator
 import os
 
+from .migrations import upgrade
+
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./task_management.db")
 
@@ -13,9 +15,37 @@ engine = create_engine(
 )
 
 
+def _dispose_engine_after_fork():
+    """Drop pooled connections inherited from the parent process"""
+    # close=False: the parent still owns those connections, the child must only forget them
+    engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_engine_after_fork)
+
+
+def schema_initialized_externally() -> bool:
+    """Whether a supervisor already prepared the schema before starting this process"""
+    return os.getenv("SCHEMA_INITIALIZED", "").lower() in ("1", "true", "yes")
+
+
 def create_db_and_tables():
-    """Create database tables"""
-    SQLModel.metadata.create_all(engine)
+    """Bring the database schema up to date by applying pending migrations"""
+    upgrade(engine)
+
+
+def begin_explicit(session: Session, immediate: bool = False) -> None:
+    """Open the session's transaction with an explicit BEGIN before using savepoints
+
+    pysqlite defers BEGIN until the first INSERT/UPDATE/DELETE, so a SAVEPOINT
+    issued first opens a transaction of its own that its RELEASE then commits.
+    With immediate, SQLite takes the write lock at BEGIN, so rows read next
+    cannot change before the transaction writes; SQLite ignores FOR UPDATE.
+    """
+    connection = session.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -0,0 +1,329 @@
+"""In-process background jobs for bulk and maintenance operations
+
+Jobs are rows in the ``job`` table, so status and progress are visible to
+every worker process and survive restarts. A runner in each process executes
+them on a small thread pool: a job is claimed with a conditional UPDATE, so
+when several processes pick up the same queued job only one runs it. Handlers
+process their work in chunks, one transaction each, and report progress
+between chunks; reporting is also where a cancel request or shutdown stops the
+job. Every handler must be safe to re-run from the start, because a job
+interrupted by shutdown (or a crash) is queued again and restarted.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, col, select
+
+from .archive import archive_exclusively
+from .crud import TaskCRUD
+from .database import engine
+from .maintenance import StorageMaintainer, storage_maintainer
+from .metrics import Counter, Gauge
+from .models import Job, JobStatus, TaskUpdate
+
+logger = logging.getLogger(__name__)
+
+# Job runner configuration
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+JOBS_CHUNK_SIZE = int(os.getenv("JOBS_CHUNK_SIZE", "500"))
+JOBS_STALE_SECONDS = float(os.getenv("JOBS_STALE_SECONDS", "300"))
+JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "5"))
+
+FINISHED_STATUSES = (JobStatus.succeeded, JobStatus.failed, JobStatus.cancelled)
+
+JOBS_FINISHED = Counter(
+    "jobs_finished_total",
+    "Background jobs that reached a final status",
+    ("kind", "status"),
+)
+JOBS_RUNNING = Gauge(
+    "jobs_running",
+    "Background jobs currently executing in this process",
+)
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled"""
+
+
+class JobInterrupted(Exception):
+    """Raised inside a handler when the runner shuts down; the job is queued again"""
+
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress"""
+
+    def __init__(self, runner: "JobRunner", job_id: int):
+        self.runner = runner
+        self.job_id = job_id
+
+    def report(self, processed: int, total: Optional[int] = None) -> None:
+        """Persist progress, then stop the job if it was cancelled or the runner is stopping"""
+        values: Dict[str, Any] = {"processed": processed, "heartbeat_at": datetime.now(timezone.utc)}
+        if total is not None:
+            values["total"] = total
+        with Session(self.runner.bind) as session:
+            session.exec(update(Job).where(col(Job.id) == self.job_id).values(**values))  # type: ignore
+            cancel_requested = session.exec(select(Job.cancel_requested).where(Job.id == self.job_id)).one()
+            session.commit()
+        if cancel_requested:
+            raise JobCancelled()
+        if self.runner.stopping:
+            raise JobInterrupted()
+
+
+Handler = Callable[[Engine, dict, JobContext], Optional[dict]]
+
+JOB_KINDS: Dict[str, Handler] = {}
+
+
+def job_kind(kind: str) -> Callable[[Handler], Handler]:
+    """Register a handler for a job kind"""
+    def register(handler: Handler) -> Handler:
+        JOB_KINDS[kind] = handler
+        return handler
+    return register
+
+
+class JobRunner:
+    """Executes queued jobs on a thread pool"""
+
+    def __init__(self, bind: Engine, max_workers: int = JOBS_MAX_WORKERS):
+        self.bind = bind
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[int, Future] = {}
+        self._poller: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    def start(self) -> None:
+        """Start the worker pool, resume jobs left queued or abandoned, and keep polling for more"""
+        if self.running:
+            return
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self.poll()
+        self._poller = threading.Thread(target=self._poll_periodically, name="job-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """Interrupt running jobs at their next progress report and shut the pool down"""
+        if self._executor is None:
+            return
+        self._stopping.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        self._futures.clear()
+
+    def poll(self) -> None:
+        """Queue jobs again whose process died, then dispatch every queued job not already dispatched here
+
+        Runs at start and every ``JOBS_POLL_SECONDS``, so jobs put back in the
+        queue by another runner shutting down (a reload draining the old
+        workers) are picked up by the runners still alive.
+        """
+        stale = datetime.now(timezone.utc) - timedelta(seconds=JOBS_STALE_SECONDS)
+        with Session(self.bind) as session:
+            session.exec(
+                update(Job)  # type: ignore
+                .where(col(Job.status) == JobStatus.running, col(Job.heartbeat_at) < stale)
+                .values(status=JobStatus.queued)
+            )
+            session.commit()
+            queued = list(session.exec(
+                select(Job.id).where(Job.status == JobStatus.queued).order_by(Job.id)  # type: ignore
+            ))
+        for job_id in queued:
+            if job_id not in self._futures and not self.stopping:
+                self._dispatch(job_id)
+
+    def submit(self, kind: str, params: dict) -> Job:
+        """Persist a new job and schedule it"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if not self.running:
+            raise RuntimeError("Job runner is not running")
+        with Session(self.bind, expire_on_commit=False) as session:
+            job = Job(kind=kind, params=params)
+            session.add(job)
+            session.commit()
+        self._dispatch(job.id)  # type: ignore
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with Session(self.bind, expire_on_commit=False) as session:
+            return session.get(Job, job_id)
+
+    def list(self, status: Optional[JobStatus] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs first"""
+        statement = select(Job).order_by(col(Job.id).desc()).limit(limit)
+        if status is not None:
+            statement = statement.where(Job.status == status)
+        with Session(self.bind, expire_on_commit=False) as session:
+            return list(session.exec(statement))
+
+    def cancel(self, job_id: int) -> Optional[Job]:
+        """Request cancellation; queued jobs stop at once, running ones at their next progress report"""
+        with Session(self.bind, expire_on_commit=False) as session:
+            session.exec(
+                update(Job)  # type: ignore
+                .where(col(Job.id) == job_id, col(Job.status).notin_(FINISHED_STATUSES))
+                .values(cancel_requested=True)
+            )
+            cancelled = session.exec(
+                update(Job)  # type: ignore
+                .where(col(Job.id) == job_id, col(Job.status) == JobStatus.queued)
+                .values(status=JobStatus.cancelled, finished_at=datetime.now(timezone.utc))
+            ).rowcount
+            session.commit()
+            job = session.get(Job, job_id)
+        if cancelled and job is not None:
+            JOBS_FINISHED.inc(job.kind, JobStatus.cancelled.value)
+        return job
+
+    def wait(self, job_id: int, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until a job dispatched by this runner finishes; mainly for tests and scripts"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+        return self.get(job_id)
+
+    def _poll_periodically(self) -> None:
+        while not self._stopping.wait(JOBS_POLL_SECONDS):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Polling for queued jobs failed")
+
+    def _dispatch(self, job_id: int) -> None:
+        assert self._executor is not None
+        with self._lock:
+            future = self._executor.submit(self._run, job_id)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+
+    def _claim(self, job_id: int) -> Optional[Job]:
+        """Move a queued job to running; None when another worker got it first or it was cancelled"""
+        now = datetime.now(timezone.utc)
+        with Session(self.bind, expire_on_commit=False) as session:
+            claimed = session.exec(
+                update(Job)  # type: ignore
+                .where(col(Job.id) == job_id, col(Job.status) == JobStatus.queued)
+                .values(status=JobStatus.running, started_at=now, heartbeat_at=now)
+            ).rowcount
+            session.commit()
+            return session.get(Job, job_id) if claimed else None
+
+    def _finish(self, job: Job, status: JobStatus, **values: Any) -> None:
+        with Session(self.bind) as session:
+            session.exec(
+                update(Job)  # type: ignore
+                .where(col(Job.id) == job.id)
+                .values(status=status, finished_at=datetime.now(timezone.utc), **values)
+            )
+            session.commit()
+        JOBS_FINISHED.inc(job.kind, status.value)
+
+    def _run(self, job_id: int) -> None:
+        if self.stopping:
+            return
+        job = self._claim(job_id)
+        if job is None:
+            return
+        handler = JOB_KINDS.get(job.kind)
+        if handler is None:
+            self._finish(job, JobStatus.failed, error=f"Unknown job kind: {job.kind}")
+            return
+
+        JOBS_RUNNING.inc()
+        try:
+            result = handler(self.bind, job.params, JobContext(self, job_id))
+        except JobCancelled:
+            self._finish(job, JobStatus.cancelled)
+        except JobInterrupted:
+            with Session(self.bind) as session:
+                session.exec(update(Job).where(col(Job.id) == job_id).values(status=JobStatus.queued))  # type: ignore
+                session.commit()
+        except Exception as exc:
+            logger.exception("Job %d (%s) failed", job_id, job.kind)
+            self._finish(job, JobStatus.failed, error=str(exc))
+        else:
+            self._finish(job, JobStatus.succeeded, result=result)
+        finally:
+            JOBS_RUNNING.dec()
+
+
+def _chunks(items: Sequence[int], size: int) -> Iterator[Sequence[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@job_kind("bulk_update")
+def bulk_update(bind: Engine, params: dict, context: JobContext) -> dict:
+    """Apply one update to many tasks, one transaction per chunk"""
+    task_ids = params["task_ids"]
+    updates = TaskUpdate(**params["updates"]).dict(exclude_none=True)
+    updated = processed = 0
+    context.report(0, len(task_ids))
+    for chunk in _chunks(task_ids, JOBS_CHUNK_SIZE):
+        with Session(bind) as session:
+            updated += TaskCRUD.bulk_update_tasks(session, list(chunk), updates)[0]
+        processed += len(chunk)
+        context.report(processed)
+    return {"updated_count": updated, "total_count": len(task_ids)}
+
+
+@job_kind("bulk_delete")
+def bulk_delete(bind: Engine, params: dict, context: JobContext) -> dict:
+    """Delete many tasks, one transaction per chunk"""
+    task_ids = params["task_ids"]
+    deleted = processed = 0
+    context.report(0, len(task_ids))
+    for chunk in _chunks(task_ids, JOBS_CHUNK_SIZE):
+        with Session(bind) as session:
+            deleted += TaskCRUD.bulk_delete_tasks(session, list(chunk))[0]
+        processed += len(chunk)
+        context.report(processed)
+    return {"deleted_count": deleted, "total_count": len(task_ids)}
+
+
+@job_kind("archive")
+def archive(bind: Engine, params: dict, context: JobContext) -> dict:
+    """Archive old completed and cancelled tasks; the total is unknown up front"""
+    archived = archive_exclusively(
+        bind, timedelta(days=params["older_than_days"]), JOBS_CHUNK_SIZE, progress=context.report
+    )
+    if archived is None:
+        raise RuntimeError("Archiving is already running")
+    return {"archived_count": archived}
+
+
+@job_kind("compact")
+def compact(bind: Engine, params: dict, context: JobContext) -> dict:
+    """Release every free page regardless of load, then refresh planner statistics"""
+    maintainer = storage_maintainer if bind is storage_maintainer.bind else StorageMaintainer(bind, busy=lambda: False)
+    reclaimed = maintainer.reclaim(budget_seconds=None, progress=context.report)
+    maintainer.analyze()
+    status = maintainer.status()
+    return {"reclaimed_pages": reclaimed, "free_pages": status.get("free_pages"), "size_bytes": status.get("size_bytes")}
+
+
+job_runner = JobRunner(engine)
@@ -0,0 +1,55 @@
+"""Leases: elect one process, among all workers and hosts, to run a periodic task
+
+A lease is a row in the ``lease`` table naming its holder and an expiry. A
+process takes it with a conditional update that only succeeds when the lease
+is free, expired or already its own, and renews it the same way. A holder
+that dies without releasing it is replaced once the lease expires.
+"""
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col
+
+from .models import Lease
+
+
+def lease_holder() -> str:
+    """Identity of this process; the pid is read on each call so forked workers differ"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(bind: Engine, name: str, ttl_seconds: float) -> bool:
+    """Take or renew a lease for ``ttl_seconds``; False while another process holds it"""
+    holder = lease_holder()
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    with Session(bind) as session:
+        taken = session.exec(
+            update(Lease)  # type: ignore
+            .where(col(Lease.name) == name, or_(col(Lease.holder) == holder, col(Lease.expires_at) < now))
+            .values(holder=holder, expires_at=expires_at)
+        ).rowcount
+        if not taken:
+            session.add(Lease(name=name, holder=holder, expires_at=expires_at))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Held by another live process, or it won the race to create the row
+                session.rollback()
+                return False
+            return True
+        session.commit()
+    return True
+
+
+def release_lease(bind: Engine, name: str) -> None:
+    """Give a lease up early, if this process holds it, so another can take over at once"""
+    with Session(bind) as session:
+        session.exec(
+            delete(Lease).where(col(Lease.name) == name, col(Lease.holder) == lease_holder())  # type: ignore
+        )
+        session.commit()
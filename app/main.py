@@ -1,20 +1,90 @@
+import asyncio
+import logging
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 
-from .database import create_db_and_tables
+from .admission import ADMISSION_ENABLED, AdmissionControlMiddleware
+from .archive import ARCHIVE_ENABLED, ARCHIVE_INTERVAL_SECONDS, ARCHIVER_LEASE, run_archiver
+from .columnar import COLUMNAR_ENABLED, COLUMNAR_REFRESH_SECONDS, start_columnar_store, stop_columnar_store
+from .database import create_db_and_tables, engine, schema_initialized_externally
+from .jobs import job_runner
+from .leases import release_lease
+from .maintenance import MAINTENANCE_ENABLED, MAINTENANCE_INTERVAL_SECONDS, MAINTENANCE_LEASE, storage_maintainer
+from .metrics import (
+    CONTENT_TYPE, METRICS_ENABLED, HTTP_UNHANDLED_EXCEPTIONS,
+    MetricsMiddleware, instrument_engine, render_metrics
+)
+from .profiling import PROFILING_ENABLED, ProfilingMiddleware, profile_engine
 from .routes import router
+from .writer import WRITE_PIPELINE_ENABLED, write_pipeline
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
-    create_db_and_tables()
+    if not schema_initialized_externally():
+        create_db_and_tables()
+    if WRITE_PIPELINE_ENABLED:
+        await write_pipeline.start()
+    refresher = None
+    if COLUMNAR_ENABLED:
+        store = await run_in_threadpool(start_columnar_store, engine)
+        if store is not None and COLUMNAR_REFRESH_SECONDS > 0:
+            refresher = asyncio.create_task(_refresh_columnar_store(store))
+    archiver = asyncio.create_task(_archive_periodically()) if ARCHIVE_ENABLED else None
+    maintainer = asyncio.create_task(_maintain_storage_periodically()) if MAINTENANCE_ENABLED else None
+    await run_in_threadpool(job_runner.start)
     yield
     # Shutdown
-    pass
+    if refresher is not None:
+        refresher.cancel()
+    if archiver is not None:
+        archiver.cancel()
+        # Hand the archiver over to a surviving worker without waiting for the lease to expire
+        await run_in_threadpool(release_lease, engine, ARCHIVER_LEASE)
+    if maintainer is not None:
+        maintainer.cancel()
+        await run_in_threadpool(release_lease, engine, MAINTENANCE_LEASE)
+    await run_in_threadpool(job_runner.stop)
+    stop_columnar_store()
+    await write_pipeline.stop()
+
+
+async def _refresh_columnar_store(store):
+    """Periodically reload the columnar store to pick up writes made by other processes"""
+    while True:
+        await asyncio.sleep(COLUMNAR_REFRESH_SECONDS)
+        try:
+            await run_in_threadpool(store.load)
+        except Exception:
+            logger.exception("Columnar store reload failed")
+
+
+async def _archive_periodically():
+    """Move old completed and cancelled tasks to the archive table at a fixed interval, in one process at a time"""
+    while True:
+        try:
+            await run_in_threadpool(run_archiver, engine)
+        except Exception:
+            logger.exception("Task archiving failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+async def _maintain_storage_periodically():
+    """Reclaim free pages in small steps and refresh planner statistics between requests, in one process at a time"""
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(storage_maintainer.run_once)
+        except Exception:
+            logger.exception("Storage maintenance failed")
 
 
 # Create FastAPI application
@@ -27,6 +97,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Add request profiling (innermost, so only admitted requests are profiled)
+if PROFILING_ENABLED:
+    profile_engine(engine)
+    app.add_middleware(ProfilingMiddleware)
+
+# Add admission control (inside CORS and metrics, so rejections still carry CORS headers and are measured)
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -36,11 +115,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add request timing and query instrumentation
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled exceptions"""
+    HTTP_UNHANDLED_EXCEPTIONS.inc(type(exc).__name__)
+    logger.exception("Unhandled exception on %s %s", request.method, request.url.path, exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
@@ -51,6 +137,12 @@ async def global_exception_handler(request, exc):
 app.include_router(router, prefix="/api/v1")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
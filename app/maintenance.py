@@ -0,0 +1,239 @@
+"""Storage maintenance: returning deleted space and refreshing planner statistics
+
+Deleted rows leave their pages on SQLite's freelist: the file keeps its size
+and scans still read through the gaps. Migration 11 puts SQLite databases in
+incremental auto-vacuum mode, and the maintainer then releases free pages with
+``PRAGMA incremental_vacuum`` once they exceed ``VACUUM_FREE_RATIO`` of the
+file, until none are left. Each step frees a bounded number of pages in its
+own short write transaction, a run stops when its time budget is spent, and
+steps are skipped while the API is busy, so a writer never waits for more than
+one step. Planner statistics are refreshed with a sampled ANALYZE at a fixed
+interval and after each purge is detected. On PostgreSQL autovacuum reclaims
+space itself; the maintainer only refreshes statistics and reports dead rows.
+Every worker runs the periodic pass, but only the holder of the maintenance
+lease does any work, so the database is maintained by one process at a time.
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from .database import engine
+from .leases import acquire_lease
+from .metrics import HTTP_REQUESTS_IN_FLIGHT, Counter, Gauge
+from .migrations import upgrade
+
+logger = logging.getLogger(__name__)
+
+# Maintenance configuration
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() in ("1", "true", "yes")
+MAINTENANCE_INTERVAL_SECONDS = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "30"))
+MAINTENANCE_BUSY_REQUESTS = int(os.getenv("MAINTENANCE_BUSY_REQUESTS", "8"))
+VACUUM_FREE_RATIO = float(os.getenv("VACUUM_FREE_RATIO", "0.1"))
+VACUUM_STEP_PAGES = int(os.getenv("VACUUM_STEP_PAGES", "256"))
+VACUUM_STEP_PAUSE_MS = float(os.getenv("VACUUM_STEP_PAUSE_MS", "10"))
+VACUUM_TIME_BUDGET_MS = float(os.getenv("VACUUM_TIME_BUDGET_MS", "250"))
+ANALYZE_INTERVAL_SECONDS = float(os.getenv("ANALYZE_INTERVAL_SECONDS", "3600"))
+ANALYZE_SAMPLE_ROWS = int(os.getenv("ANALYZE_SAMPLE_ROWS", "1000"))
+# Set by app.server for its workers, which share the incoming requests evenly
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+
+MAINTENANCE_LEASE = "storage-maintenance"
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+STORAGE_FREE_RATIO = Gauge(
+    "storage_free_page_ratio",
+    "Share of database file pages on the freelist",
+)
+STORAGE_SIZE_BYTES = Gauge(
+    "storage_size_bytes",
+    "Database file size",
+)
+STORAGE_PAGES_RECLAIMED = Counter(
+    "storage_pages_reclaimed_total",
+    "Free pages returned to the file system by incremental vacuum",
+)
+STORAGE_ANALYZE_RUNS = Counter(
+    "storage_analyze_runs_total",
+    "Planner statistics refreshes",
+)
+
+
+def _api_busy() -> bool:
+    """Whether the whole API is busy, estimated from this worker's share of the requests in flight"""
+    return HTTP_REQUESTS_IN_FLIGHT.total() * SERVER_WORKERS > MAINTENANCE_BUSY_REQUESTS
+
+
+class StorageMaintainer:
+    """Tracks free space and runs vacuum and ANALYZE steps for one database"""
+
+    def __init__(self, bind: Engine, busy: Callable[[], bool] = _api_busy):
+        self.bind = bind
+        self.busy = busy
+        self.reclaiming = False
+        self.reclaimed_pages = 0
+        self.last_vacuum_at: Optional[datetime] = None
+        self.last_analyze_at: Optional[datetime] = None
+        self.last_analyze_ms: Optional[float] = None
+        self._analyze_due = True
+        self._lock = threading.Lock()
+
+    @property
+    def dialect(self) -> str:
+        return self.bind.dialect.name
+
+    def status(self) -> dict:
+        """Current page usage and the maintainer's recent activity"""
+        status = {
+            "dialect": self.dialect,
+            "reclaiming": self.reclaiming,
+            "reclaimed_pages": self.reclaimed_pages,
+            "last_vacuum_at": self.last_vacuum_at,
+            "last_analyze_at": self.last_analyze_at,
+            "last_analyze_ms": self.last_analyze_ms,
+        }
+        with self.bind.connect() as conn:
+            if self.dialect == "sqlite":
+                page_size, page_count, free_pages, auto_vacuum = (
+                    conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                    for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum")
+                )
+                status.update(
+                    auto_vacuum=AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+                    page_size=page_size,
+                    page_count=page_count,
+                    free_pages=free_pages,
+                    free_ratio=round(free_pages / page_count, 4) if page_count else 0.0,
+                    size_bytes=page_size * page_count,
+                    free_bytes=page_size * free_pages,
+                )
+            elif self.dialect == "postgresql":
+                live, dead, size = conn.exec_driver_sql(
+                    "SELECT sum(n_live_tup), sum(n_dead_tup), pg_database_size(current_database()) "
+                    "FROM pg_stat_user_tables"
+                ).one()
+                status.update(
+                    live_rows=int(live or 0),
+                    dead_rows=int(dead or 0),
+                    free_ratio=round(dead / (live + dead), 4) if live and dead else 0.0,
+                    size_bytes=int(size),
+                )
+        STORAGE_FREE_RATIO.set(status.get("free_ratio", 0.0))
+        if "size_bytes" in status:
+            STORAGE_SIZE_BYTES.set(status["size_bytes"])
+        return status
+
+    def reclaim(
+        self,
+        budget_seconds: Optional[float] = VACUUM_TIME_BUDGET_MS / 1000,
+        step_pages: int = VACUUM_STEP_PAGES,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """Release free pages step by step until none are left, the budget is spent or the API gets busy
+
+        A budget of None runs to the end regardless of load. ``progress`` is
+        called after each step with the pages reclaimed so far and the free
+        pages there were at the start. Returns the number of pages reclaimed.
+        """
+        if self.dialect != "sqlite":
+            return 0
+        deadline = time.monotonic() + budget_seconds if budget_seconds is not None else None
+        reclaimed = 0
+        initial: Optional[int] = None
+        with self._lock:
+            try:
+                while True:
+                    with self.bind.connect() as conn:
+                        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+                        initial = free_pages if initial is None else initial
+                        if not free_pages:
+                            self.reclaiming = False
+                            break
+                        # pysqlite's execute() steps the pragma once, freeing a single page; a script runs it to the end
+                        conn.connection.dbapi_connection.executescript(f"PRAGMA incremental_vacuum({step_pages})")
+                        freed = free_pages - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+                    if freed <= 0:
+                        # Not in incremental mode (migration 11 not applied), so nothing can be released
+                        break
+                    reclaimed += freed
+                    STORAGE_PAGES_RECLAIMED.inc(amount=freed)
+                    if progress is not None:
+                        progress(reclaimed, initial)
+                    if deadline is not None and (time.monotonic() >= deadline or self.busy()):
+                        break
+                    time.sleep(VACUUM_STEP_PAUSE_MS / 1000)
+            finally:
+                if reclaimed:
+                    self.reclaimed_pages += reclaimed
+                    self.last_vacuum_at = datetime.now(timezone.utc)
+        return reclaimed
+
+    def analyze(self) -> None:
+        """Refresh planner statistics; on SQLite from a sample of each index"""
+        started = time.perf_counter()
+        with self.bind.connect() as conn:
+            if self.dialect == "sqlite":
+                conn.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYZE_SAMPLE_ROWS}")
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+        self.last_analyze_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.last_analyze_at = datetime.now(timezone.utc)
+        self._analyze_due = False
+        STORAGE_ANALYZE_RUNS.inc()
+
+    def run_once(self) -> Optional[dict]:
+        """One maintenance pass: reclaim a budget's worth of free pages if needed, then ANALYZE if due
+
+        Does nothing and returns None while another process holds the
+        maintenance lease.
+        """
+        if not acquire_lease(self.bind, MAINTENANCE_LEASE, 3 * MAINTENANCE_INTERVAL_SECONDS):
+            return None
+        status = self.status()
+        if status.get("auto_vacuum") == "incremental" and status["free_ratio"] > VACUUM_FREE_RATIO:
+            if not self.reclaiming:
+                self.reclaiming = True
+                # Something purged many rows, so the statistics are stale too
+                self._analyze_due = True
+        if self.reclaiming and not self.busy():
+            self.reclaim()
+        if self.last_analyze_at is not None:
+            elapsed = (datetime.now(timezone.utc) - self.last_analyze_at).total_seconds()
+            self._analyze_due = self._analyze_due or elapsed >= ANALYZE_INTERVAL_SECONDS
+        if self._analyze_due and not self.busy():
+            self.analyze()
+        return status
+
+
+storage_maintainer = StorageMaintainer(engine)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reclaim free database pages and refresh planner statistics")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./task_management.db"))
+    parser.add_argument("--step-pages", type=int, default=VACUUM_STEP_PAGES, help="Pages freed per transaction")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    upgrade(engine)
+    maintainer = StorageMaintainer(engine, busy=lambda: False)
+    before = maintainer.status()
+    start = time.perf_counter()
+    reclaimed = maintainer.reclaim(budget_seconds=None, step_pages=args.step_pages)
+    maintainer.analyze()
+    after = maintainer.status()
+    print(
+        f"✅ Reclaimed {reclaimed:,} pages ({before['size_bytes'] - after['size_bytes']:,} bytes) "
+        f"and refreshed statistics in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
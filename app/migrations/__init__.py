@@ -0,0 +1,282 @@
+"""
+Versioned schema migrations
+
+Each module in ``app/migrations/versions`` named ``v<NNNN>_<slug>.py`` defines:
+
+    revision: int             -- strictly increasing version number
+    description: str          -- one line summary
+    def upgrade(ctx): ...     -- applies the change through a MigrationContext
+
+Applied versions are recorded in the ``schema_version`` table. Operations that
+must not hold locks on a busy table (concurrent index builds, chunked backfills)
+run outside the migration's transaction, so they are written to be idempotent:
+re-running a migration that was interrupted half way is always safe.
+"""
+import importlib
+import logging
+import pkgutil
+import time
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import List, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+_metadata = sa.MetaData()
+schema_version = sa.Table(
+    SCHEMA_VERSION_TABLE,
+    _metadata,
+    sa.Column("version", sa.Integer, primary_key=True),
+    sa.Column("description", sa.String(200), nullable=False),
+    sa.Column("applied_at", sa.DateTime, nullable=False),
+)
+
+# Arbitrary key serializing concurrent upgrades on PostgreSQL
+_ADVISORY_LOCK_KEY = 73_310_042
+
+
+class MigrationError(Exception):
+    """Raised when the migration history is inconsistent"""
+
+
+class MigrationContext:
+    """Operations available to migration scripts"""
+
+    def __init__(self, engine: Engine, conn: Connection):
+        self.engine = engine
+        self.conn = conn
+
+    @property
+    def dialect(self) -> str:
+        return self.conn.dialect.name
+
+    def execute(self, sql: str, params: Optional[dict] = None):
+        """Execute SQL inside the migration's transaction"""
+        return self.conn.execute(sa.text(sql), params or {})
+
+    def has_table(self, table: str) -> bool:
+        return sa.inspect(self.conn).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(col["name"] == column for col in sa.inspect(self.conn).get_columns(table))
+
+    def has_index(self, table: str, name: str) -> bool:
+        return any(index["name"] == name for index in sa.inspect(self.conn).get_indexes(table))
+
+    def create_table(self, table: sa.Table) -> None:
+        """Create a table unless it already exists"""
+        table.create(self.conn, checkfirst=True)
+
+    def add_column(self, table: str, column: sa.Column) -> None:
+        """Add a column unless it already exists
+
+        New columns should be nullable without a server default, which is a
+        metadata-only change on both SQLite and PostgreSQL; fill them with
+        :meth:`backfill` afterwards.
+        """
+        if self.has_column(table, column.name):
+            return
+        column_type = column.type.compile(dialect=self.conn.dialect)
+        nullable = "" if column.nullable else " NOT NULL"
+        references = "".join(
+            " REFERENCES {} ({})".format(*foreign_key.target_fullname.split(".")) for foreign_key in column.foreign_keys
+        )
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}{nullable}{references}")
+
+    def create_index(
+        self,
+        name: str,
+        table: str,
+        columns: Sequence[str],
+        unique: bool = False,
+        concurrently: bool = True,
+        using: Optional[str] = None
+    ) -> None:
+        """Create an index; on PostgreSQL it is built CONCURRENTLY so writes are not blocked
+
+        ``columns`` may also be expressions, and ``using`` names a PostgreSQL
+        index method such as ``gin``.
+        """
+        unique_sql = "UNIQUE " if unique else ""
+        column_sql = ", ".join(columns)
+        target_sql = f"{table} USING {using}" if using else table
+        if concurrently and self.dialect == "postgresql":
+            with self._autocommit() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {target_sql} ({column_sql})"
+                )
+            return
+        self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {target_sql} ({column_sql})")
+
+    def drop_index(self, name: str, concurrently: bool = True) -> None:
+        """Drop an index if it exists"""
+        if concurrently and self.dialect == "postgresql":
+            with self._autocommit() as conn:
+                conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            return
+        self.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def rebuild_table(self, table: sa.Table, expressions: Optional[dict] = None) -> None:
+        """Replace a table by ``table``'s definition, copying rows with INSERT ... SELECT
+
+        For changes SQLite cannot make in place, such as a column type change.
+        ``expressions`` maps new column names to SQL over the old row (default:
+        the same column). Runs in the migration's transaction; the old table's
+        indexes are recreated on the new one unless they cover a dropped column.
+        """
+        indexes = sa.inspect(self.conn).get_indexes(table.name)
+        staging = table.to_metadata(table.metadata, name=f"{table.name}__new")
+        # Left over if an earlier attempt died before its transaction started
+        self.execute(f"DROP TABLE IF EXISTS {staging.name}")
+        staging.create(self.conn)
+        columns = [column.name for column in table.columns]
+        selected = ", ".join((expressions or {}).get(name, name) for name in columns)
+        self.execute(
+            f"INSERT INTO {staging.name} ({', '.join(columns)}) SELECT {selected} FROM {table.name}"
+        )
+        self.execute(f"DROP TABLE {table.name}")
+        self.execute(f"ALTER TABLE {staging.name} RENAME TO {table.name}")
+        for index in indexes:
+            if all(name in table.columns for name in index["column_names"]):
+                self.create_index(index["name"], table.name, index["column_names"], unique=bool(index["unique"]))
+
+    def backfill(
+        self,
+        table: str,
+        assignments: str,
+        where: Optional[str] = None,
+        params: Optional[dict] = None,
+        chunk_size: int = 5000,
+        pause: float = 0.0
+    ) -> int:
+        """Run ``UPDATE table SET assignments`` over id ranges, committing each chunk
+
+        Each chunk only locks the rows it touches for a short transaction, so
+        the table stays writable while a large backfill runs. ``where`` should
+        exclude already-migrated rows to keep re-runs cheap.
+        """
+        self.conn.commit()
+        bounds = self.conn.execute(sa.text(f"SELECT min(id), max(id) FROM {table}")).first()
+        self.conn.commit()
+        if not bounds or bounds[0] is None:
+            return 0
+
+        low, high = bounds
+        condition = f" AND ({where})" if where else ""
+        statement = sa.text(
+            f"UPDATE {table} SET {assignments} WHERE id >= :_low AND id < :_high{condition}"
+        )
+        updated = 0
+        for start in range(low, high + 1, chunk_size):
+            with self.engine.begin() as conn:
+                result = conn.execute(statement, {**(params or {}), "_low": start, "_high": start + chunk_size})
+                updated += result.rowcount or 0
+            if pause:
+                time.sleep(pause)
+        logger.info("Backfilled %d rows of %s", updated, table)
+        return updated
+
+    def vacuum(self, auto_vacuum: Optional[str] = None) -> None:
+        """Rewrite a SQLite database file with VACUUM, first switching ``auto_vacuum`` if given
+
+        Changing ``auto_vacuum`` on a database that already has tables only
+        takes effect through a VACUUM. It rewrites the whole file and cannot
+        run inside a transaction, so the migration's transaction is committed
+        first.
+        """
+        if self.dialect != "sqlite":
+            return
+        with self._autocommit() as conn:
+            if auto_vacuum is not None:
+                conn.exec_driver_sql(f"PRAGMA auto_vacuum = {auto_vacuum}")
+            conn.exec_driver_sql("VACUUM")
+
+    def _autocommit(self):
+        # Statements such as CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        self.conn.commit()
+        return self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def load_migrations() -> List[ModuleType]:
+    """Import every migration script, ordered by revision"""
+    from . import versions
+
+    modules = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+        if info.name.startswith("v")
+    ]
+    modules.sort(key=lambda module: module.revision)
+    revisions = [module.revision for module in modules]
+    if len(set(revisions)) != len(revisions):
+        raise MigrationError(f"Duplicate migration revisions: {revisions}")
+    return modules
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied revision, 0 for an unmanaged database"""
+    with engine.connect() as conn:
+        if not sa.inspect(conn).has_table(SCHEMA_VERSION_TABLE):
+            return 0
+        return conn.execute(sa.select(sa.func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest); returns applied revisions"""
+    migrations = load_migrations()
+    applied: List[int] = []
+
+    with engine.connect() as conn:
+        locked = conn.dialect.name == "postgresql"
+        if locked:
+            conn.execute(sa.text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            conn.commit()
+        try:
+            schema_version.create(conn, checkfirst=True)
+            conn.commit()
+            version = conn.execute(sa.select(sa.func.max(schema_version.c.version))).scalar() or 0
+            conn.commit()
+
+            for migration in migrations:
+                if migration.revision <= version or (target is not None and migration.revision > target):
+                    continue
+                logger.info("Applying migration %04d: %s", migration.revision, migration.description)
+                started = time.perf_counter()
+                migration.upgrade(MigrationContext(engine, conn))
+                conn.execute(schema_version.insert().values(
+                    version=migration.revision,
+                    description=migration.description,
+                    applied_at=datetime.now(timezone.utc),
+                ))
+                conn.commit()
+                applied.append(migration.revision)
+                logger.info("Applied migration %04d in %.2fs", migration.revision, time.perf_counter() - started)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if locked:
+                conn.execute(sa.text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+def history(engine: Engine) -> List[dict]:
+    """Every known migration with its applied timestamp (None if pending)"""
+    applied = {}
+    with engine.connect() as conn:
+        if sa.inspect(conn).has_table(SCHEMA_VERSION_TABLE):
+            applied = {row.version: row.applied_at for row in conn.execute(sa.select(schema_version))}
+    return [
+        {
+            "revision": migration.revision,
+            "description": migration.description,
+            "applied_at": applied.get(migration.revision),
+        }
+        for migration in load_migrations()
+    ]
@@ -0,0 +1,46 @@
+"""
+Schema migration CLI
+
+Usage:
+    python -m app.migrations upgrade [--to REVISION]
+    python -m app.migrations current
+    python -m app.migrations history
+"""
+import argparse
+import logging
+import os
+
+from sqlmodel import create_engine
+
+from . import current_version, history, upgrade
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the Task Management API schema")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./task_management.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, help="Stop at this revision")
+    commands.add_parser("current", help="Show the applied revision")
+    commands.add_parser("history", help="List migrations and when they were applied")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    engine = create_engine(args.database_url)
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, target=args.to)
+        if applied:
+            print(f"✅ Applied revisions: {', '.join(str(revision) for revision in applied)}")
+        else:
+            print("✅ Schema is up to date")
+    elif args.command == "current":
+        print(current_version(engine))
+    else:
+        for entry in history(engine):
+            status = entry["applied_at"].isoformat() if entry["applied_at"] else "pending"
+            print(f"{entry['revision']:04d}  {status:<32}  {entry['description']}")
+
+
+if __name__ == "__main__":
+    main()
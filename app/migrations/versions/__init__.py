@@ -0,0 +1 @@
+# Migration scripts, applied in revision order
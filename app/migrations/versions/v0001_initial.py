@@ -0,0 +1,23 @@
+"""Initial task table, as originally created by SQLModel.metadata.create_all"""
+import sqlalchemy as sa
+
+revision = 1
+description = "Create task table"
+
+
+def upgrade(ctx):
+    # Databases created before migrations existed already have this table
+    task = sa.Table(
+        "task",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("status", sa.Enum("pending", "in_progress", "completed", "cancelled", name="taskstatus"), nullable=False),
+        sa.Column("priority", sa.Enum("low", "medium", "high", "urgent", name="taskpriority"), nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=True),
+        sa.Column("due_date", sa.DateTime, nullable=True),
+        sa.Column("assigned_to", sa.String, nullable=True),
+    )
+    ctx.create_table(task)
@@ -0,0 +1,15 @@
+"""Secondary indexes backing the list filters and default sort order"""
+
+revision = 2
+description = "Add task filter and sort indexes"
+
+
+def upgrade(ctx):
+    # Default listing is ORDER BY created_at DESC, usually combined with a status filter
+    ctx.create_index("ix_task_status_created_at", "task", ["status", "created_at"])
+    ctx.create_index("ix_task_created_at", "task", ["created_at"])
+    ctx.create_index("ix_task_priority", "task", ["priority"])
+    if ctx.has_column("task", "assigned_to"):
+        # Replaced by assignee_id in revision 4; absent when the table comes from the current models
+        ctx.create_index("ix_task_assigned_to", "task", ["assigned_to"])
+    ctx.create_index("ix_task_due_date", "task", ["due_date"])
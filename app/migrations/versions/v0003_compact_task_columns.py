@@ -0,0 +1,69 @@
+"""Store status/priority as ranked small integers and timestamps as UTC epoch microseconds"""
+import sqlalchemy as sa
+
+revision = 3
+description = "Compact task enum and timestamp columns"
+
+# Frozen copies of the enum orders at the time of this migration
+STATUS_RANKS = {"pending": 0, "in_progress": 1, "completed": 2, "cancelled": 3}
+PRIORITY_RANKS = {"low": 0, "medium": 1, "high": 2, "urgent": 3}
+TIMESTAMPS = ("created_at", "updated_at", "due_date")
+
+
+def _rank_case(column, ranks):
+    whens = " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in ranks.items())
+    return f"CASE {column} {whens} END"
+
+
+def upgrade(ctx):
+    # Databases created by create_all from the current models already use the compact types
+    status = next(column for column in sa.inspect(ctx.conn).get_columns("task") if column["name"] == "status")
+    if isinstance(status["type"], sa.Integer):
+        return
+
+    if ctx.dialect == "sqlite":
+        _rebuild_sqlite(ctx)
+        return
+
+    # Other databases change the column types in place; indexes are rebuilt with them
+    for column, ranks in (("status", STATUS_RANKS), ("priority", PRIORITY_RANKS)):
+        ctx.execute(
+            f"ALTER TABLE task ALTER COLUMN {column} TYPE SMALLINT "
+            f"USING {_rank_case(f'{column}::text', ranks)}"
+        )
+    for column in TIMESTAMPS:
+        ctx.execute(
+            f"ALTER TABLE task ALTER COLUMN {column} TYPE BIGINT "
+            f"USING (EXTRACT(EPOCH FROM {column}) * 1000000)::bigint"
+        )
+    if ctx.dialect == "postgresql":
+        ctx.execute("DROP TYPE IF EXISTS taskstatus")
+        ctx.execute("DROP TYPE IF EXISTS taskpriority")
+
+
+def _rebuild_sqlite(ctx):
+    task = sa.Table(
+        "task",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("status", sa.SmallInteger, nullable=False),
+        sa.Column("priority", sa.SmallInteger, nullable=False),
+        sa.Column("created_at", sa.BigInteger, nullable=False),
+        sa.Column("updated_at", sa.BigInteger, nullable=True),
+        sa.Column("due_date", sa.BigInteger, nullable=True),
+        sa.Column("assigned_to", sa.String, nullable=True),
+    )
+    # Stored as 'YYYY-MM-DD HH:MM:SS[.ffffff]' UTC wall-clock strings; keep full microsecond precision
+    expressions = {
+        column: (
+            f"CAST(strftime('%s', {column}) AS INTEGER) * 1000000"
+            f" + CAST(substr(substr({column}, 21, 6) || '000000', 1, 6) AS INTEGER)"
+        )
+        for column in TIMESTAMPS
+    }
+    expressions["status"] = _rank_case("status", STATUS_RANKS)
+    expressions["priority"] = _rank_case("priority", PRIORITY_RANKS)
+
+    ctx.rebuild_table(task, expressions)
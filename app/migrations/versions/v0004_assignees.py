@@ -0,0 +1,51 @@
+"""Move assignee names into their own table, referenced from task by integer id"""
+import sqlalchemy as sa
+
+revision = 4
+description = "Normalize task assignees"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    assignee = sa.Table(
+        "assignee",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("task_count", sa.Integer, nullable=False),
+    )
+    ctx.create_table(assignee)
+    ctx.create_index("ix_assignee_name", "assignee", ["name"], unique=True, concurrently=False)
+    if not ctx.has_column("task", "assigned_to"):
+        # Created by create_all from the current models
+        return
+
+    ctx.execute(
+        "INSERT INTO assignee (name, task_count) "
+        "SELECT assigned_to, count(*) FROM task WHERE assigned_to IS NOT NULL "
+        "AND assigned_to NOT IN (SELECT name FROM assignee) GROUP BY assigned_to"
+    )
+    assignee_id = "(SELECT assignee.id FROM assignee WHERE assignee.name = task.assigned_to)"
+
+    if ctx.dialect == "sqlite":
+        task = sa.Table(
+            "task",
+            metadata,
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("title", sa.String, nullable=False),
+            sa.Column("description", sa.String, nullable=True),
+            sa.Column("status", sa.SmallInteger, nullable=False),
+            sa.Column("priority", sa.SmallInteger, nullable=False),
+            sa.Column("created_at", sa.BigInteger, nullable=False),
+            sa.Column("updated_at", sa.BigInteger, nullable=True),
+            sa.Column("due_date", sa.BigInteger, nullable=True),
+            sa.Column("assignee_id", sa.Integer, sa.ForeignKey(assignee.c.id), nullable=True),
+        )
+        # ix_task_assigned_to goes away with its column
+        ctx.rebuild_table(task, {"assignee_id": assignee_id})
+    else:
+        ctx.execute("ALTER TABLE task ADD COLUMN IF NOT EXISTS assignee_id INTEGER REFERENCES assignee (id)")
+        ctx.backfill("task", f"assignee_id = {assignee_id}", where="assigned_to IS NOT NULL AND assignee_id IS NULL")
+        ctx.drop_index("ix_task_assigned_to")
+        ctx.execute("ALTER TABLE task DROP COLUMN assigned_to")
+    ctx.create_index("ix_task_assignee_id", "task", ["assignee_id"])
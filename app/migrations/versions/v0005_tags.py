@@ -0,0 +1,29 @@
+"""Tags and the task/tag association table indexed in both directions"""
+import sqlalchemy as sa
+
+revision = 5
+description = "Add task tags"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    sa.Table("task", metadata, sa.Column("id", sa.Integer, primary_key=True))
+    tag = sa.Table(
+        "tag",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("task_count", sa.Integer, nullable=False),
+    )
+    # The (task_id, tag_id) primary key serves "tags of a task" and membership probes
+    task_tag = sa.Table(
+        "task_tag",
+        metadata,
+        sa.Column("task_id", sa.Integer, sa.ForeignKey("task.id"), primary_key=True),
+        sa.Column("tag_id", sa.Integer, sa.ForeignKey("tag.id"), primary_key=True),
+    )
+    ctx.create_table(tag)
+    ctx.create_index("ix_tag_name", "tag", ["name"], unique=True, concurrently=False)
+    ctx.create_table(task_tag)
+    # Postings list per tag, the inverted index the tag filters read
+    ctx.create_index("ix_task_tag_tag_id_task_id", "task_tag", ["tag_id", "task_id"], concurrently=False)
@@ -0,0 +1,34 @@
+"""Subtask hierarchy with a closure table, and task dependencies"""
+import sqlalchemy as sa
+
+revision = 6
+description = "Add task hierarchy and dependencies"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    sa.Table("task", metadata, sa.Column("id", sa.Integer, primary_key=True))
+    # Proper ancestors only; the primary key serves subtree reads, the index ancestor reads
+    task_closure = sa.Table(
+        "task_closure",
+        metadata,
+        sa.Column("ancestor_id", sa.Integer, sa.ForeignKey("task.id"), primary_key=True),
+        sa.Column("descendant_id", sa.Integer, sa.ForeignKey("task.id"), primary_key=True),
+        sa.Column("depth", sa.Integer, nullable=False),
+    )
+    task_dependency = sa.Table(
+        "task_dependency",
+        metadata,
+        sa.Column("blocked_id", sa.Integer, sa.ForeignKey("task.id"), primary_key=True),
+        sa.Column("blocker_id", sa.Integer, sa.ForeignKey("task.id"), primary_key=True),
+    )
+
+    # Every existing task is top-level, so the closure table starts empty
+    ctx.add_column("task", sa.Column("parent_id", sa.Integer, sa.ForeignKey("task.id"), nullable=True))
+    ctx.create_index("ix_task_parent_id", "task", ["parent_id"])
+    ctx.create_table(task_closure)
+    ctx.create_index("ix_task_closure_descendant_id_depth", "task_closure", ["descendant_id", "depth"], concurrently=False)
+    ctx.create_table(task_dependency)
+    ctx.create_index(
+        "ix_task_dependency_blocker_id_blocked_id", "task_dependency", ["blocker_id", "blocked_id"], concurrently=False
+    )
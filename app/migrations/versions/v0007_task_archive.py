@@ -0,0 +1,29 @@
+"""Archive table for completed and cancelled tasks moved out of the live table"""
+import sqlalchemy as sa
+
+revision = 7
+description = "Add task archive"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    sa.Table("assignee", metadata, sa.Column("id", sa.Integer, primary_key=True))
+    task_archive = sa.Table(
+        "task_archive",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String, nullable=False),
+        sa.Column("description", sa.String, nullable=True),
+        sa.Column("status", sa.SmallInteger, nullable=False),
+        sa.Column("priority", sa.SmallInteger, nullable=False),
+        sa.Column("created_at", sa.BigInteger, nullable=False),
+        sa.Column("updated_at", sa.BigInteger, nullable=True),
+        sa.Column("due_date", sa.BigInteger, nullable=True),
+        sa.Column("assignee_id", sa.Integer, sa.ForeignKey("assignee.id"), nullable=True),
+        sa.Column("parent_id", sa.Integer, nullable=True),
+        sa.Column("tag_names", sa.String, nullable=False),
+        sa.Column("archived_at", sa.BigInteger, nullable=False),
+    )
+    ctx.create_table(task_archive)
+    ctx.create_index("ix_task_archive_created_at", "task_archive", ["created_at"], concurrently=False)
+    ctx.create_index("ix_task_archive_assignee_id", "task_archive", ["assignee_id"], concurrently=False)
@@ -0,0 +1,28 @@
+"""Job table backing the background job runner"""
+import sqlalchemy as sa
+
+revision = 8
+description = "Add background jobs"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    job = sa.Table(
+        "job",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("kind", sa.String, nullable=False),
+        sa.Column("status", sa.SmallInteger, nullable=False),
+        sa.Column("params", sa.JSON, nullable=False),
+        sa.Column("result", sa.JSON, nullable=True),
+        sa.Column("error", sa.String, nullable=True),
+        sa.Column("processed", sa.Integer, nullable=False),
+        sa.Column("total", sa.Integer, nullable=True),
+        sa.Column("cancel_requested", sa.Boolean, nullable=False),
+        sa.Column("created_at", sa.BigInteger, nullable=False),
+        sa.Column("started_at", sa.BigInteger, nullable=True),
+        sa.Column("finished_at", sa.BigInteger, nullable=True),
+        sa.Column("heartbeat_at", sa.BigInteger, nullable=True),
+    )
+    ctx.create_table(job)
+    ctx.create_index("ix_job_status", "job", ["status"], concurrently=False)
@@ -0,0 +1,8 @@
+"""Index serving the work-queue claim order: pending tasks by priority, then due date"""
+
+revision = 9
+description = "Add task claim index"
+
+
+def upgrade(ctx):
+    ctx.create_index("ix_task_status_priority_due_date", "task", ["status", "priority", "due_date"])
@@ -0,0 +1,67 @@
+"""Trigram index for fuzzy task search: a posting table on SQLite, pg_trgm on PostgreSQL"""
+import re
+
+import sqlalchemy as sa
+
+revision = 10
+description = "Add trigram search index"
+
+BATCH_SIZE = 5000
+
+_WORD = re.compile(r"\w+")
+
+
+def _trigrams(text):
+    # Frozen copy of app.search.trigrams as of this revision, so later tokenizer changes cannot alter it
+    grams = set()
+    for word in _WORD.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    task_trigram = sa.Table(
+        "task_trigram",
+        metadata,
+        sa.Column("trigram", sa.String, primary_key=True),
+        sa.Column("task_id", sa.Integer, primary_key=True),
+        sqlite_with_rowid=False,
+    )
+    ctx.create_table(task_trigram)
+    ctx.create_index("ix_task_trigram_task_id", "task_trigram", ["task_id"], concurrently=False)
+
+    if ctx.dialect == "postgresql":
+        ctx.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # Must match the expression fuzzy_matches searches in app/search.py
+        ctx.create_index(
+            "ix_task_search_trgm", "task", ["(title || ' ' || coalesce(description, '')) gin_trgm_ops"], using="gin"
+        )
+        return
+
+    # Index existing tasks in id ranges, one transaction each
+    task = sa.table(
+        "task", sa.column("id", sa.Integer), sa.column("title", sa.String), sa.column("description", sa.String)
+    )
+    # The table may already exist with postings, on databases created from the models
+    ctx.execute("DELETE FROM task_trigram")
+    ctx.conn.commit()
+    bounds = ctx.conn.execute(sa.select(sa.func.min(task.c.id), sa.func.max(task.c.id))).first()
+    ctx.conn.commit()
+    if not bounds or bounds[0] is None:
+        return
+    low, high = bounds
+    for start in range(low, high + 1, BATCH_SIZE):
+        with ctx.engine.begin() as conn:
+            rows = conn.execute(
+                sa.select(task.c.id, task.c.title, task.c.description)
+                .where(task.c.id >= start, task.c.id < start + BATCH_SIZE)
+            ).all()
+            postings = sorted(
+                (gram, task_id)
+                for task_id, title, description in rows
+                for gram in _trigrams(title) | _trigrams(description)
+            )
+            if postings:
+                conn.exec_driver_sql("INSERT INTO task_trigram (trigram, task_id) VALUES (?, ?)", postings)
@@ -0,0 +1,16 @@
+"""Switch SQLite databases to incremental auto-vacuum so deleted space can be returned in small steps"""
+revision = 11
+description = "Enable incremental auto-vacuum on SQLite"
+
+# PRAGMA auto_vacuum values
+INCREMENTAL = 2
+
+
+def upgrade(ctx):
+    # PostgreSQL's autovacuum already reclaims dead rows
+    if ctx.dialect != "sqlite":
+        return
+    if ctx.conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == INCREMENTAL:
+        return
+    # One full rewrite; afterwards app.maintenance releases free pages with PRAGMA incremental_vacuum
+    ctx.vacuum(auto_vacuum="INCREMENTAL")
@@ -0,0 +1,42 @@
+"""Never hand out a task id twice, including ids moved to the archive"""
+import sqlalchemy as sa
+
+revision = 12
+description = "Make task ids AUTOINCREMENT on SQLite"
+
+
+def upgrade(ctx):
+    # PostgreSQL sequences never go back, so archived ids are never reused there
+    if ctx.dialect != "sqlite":
+        return
+
+    # Without AUTOINCREMENT SQLite hands out max(id) + 1, reusing archived and deleted ids
+    sql = ctx.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'task'").scalar()
+    if "AUTOINCREMENT" not in sql.upper():
+        metadata = sa.MetaData()
+        sa.Table("assignee", metadata, sa.Column("id", sa.Integer, primary_key=True))
+        task = sa.Table(
+            "task",
+            metadata,
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("title", sa.String, nullable=False),
+            sa.Column("description", sa.String, nullable=True),
+            sa.Column("status", sa.SmallInteger, nullable=False),
+            sa.Column("priority", sa.SmallInteger, nullable=False),
+            sa.Column("created_at", sa.BigInteger, nullable=False),
+            sa.Column("updated_at", sa.BigInteger, nullable=True),
+            sa.Column("due_date", sa.BigInteger, nullable=True),
+            sa.Column("assignee_id", sa.Integer, sa.ForeignKey("assignee.id"), nullable=True),
+            sa.Column("parent_id", sa.Integer, sa.ForeignKey("task.id"), nullable=True),
+            sqlite_autoincrement=True,
+        )
+        ctx.rebuild_table(task)
+
+    # Start the counter above every id ever used, archived ones included
+    ctx.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'task', 0 WHERE NOT EXISTS "
+                "(SELECT 1 FROM sqlite_sequence WHERE name = 'task')")
+    ctx.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(id), 0) FROM task), (SELECT coalesce(max(id), 0) FROM task_archive)) "
+        "WHERE name = 'task'"
+    )
@@ -0,0 +1,17 @@
+"""Lease table electing one process for periodic work"""
+import sqlalchemy as sa
+
+revision = 13
+description = "Add leases"
+
+
+def upgrade(ctx):
+    metadata = sa.MetaData()
+    lease = sa.Table(
+        "lease",
+        metadata,
+        sa.Column("name", sa.String, primary_key=True),
+        sa.Column("holder", sa.String, nullable=False),
+        sa.Column("expires_at", sa.BigInteger, nullable=False),
+    )
+    ctx.create_table(lease)
@@ -1,8 +1,12 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field, validator
-from sqlmodel import SQLModel, Field as SQLField
+from sqlalchemy import JSON, BigInteger, Index, SmallInteger
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import SQLModel, Field as SQLField, Relationship
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 class TaskStatus(str, Enum):
@@ -33,23 +37,317 @@ class SortField(str, Enum):
     assigned_to = "assigned_to"
 
 
+class FacetField(str, Enum):
+    """Fields that list results can be counted by"""
+    status = "status"
+    priority = "priority"
+    assigned_to = "assigned_to"
+
+
+class CalendarBucket(str, Enum):
+    """Calendar bucket width enumeration"""
+    day = "day"
+    week = "week"
+
+
+class JobStatus(str, Enum):
+    """Background job status enumeration"""
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
 class SortOrder(str, Enum):
     """Sort order enumeration"""
     asc = "asc"
     desc = "desc"
 
 
+def datetime_to_epoch(value: datetime) -> int:
+    """Microseconds since the Unix epoch; naive datetimes are taken to be UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def epoch_to_datetime(value: int) -> datetime:
+    """UTC datetime from microseconds since the Unix epoch"""
+    return EPOCH + timedelta(microseconds=value)
+
+
+class RankedEnum(TypeDecorator):
+    """Enum stored as its small-int rank in definition order
+
+    Comparisons and ORDER BY then follow the enum's order (e.g. low < urgent)
+    and indexes hold 2-byte integers instead of strings.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+        self._members = list(enum_class)
+        self._ranks = {member: rank for rank, member in enumerate(self._members)}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._ranks[self.enum_class(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
+
+
+class UTCEpoch(TypeDecorator):
+    """Datetime stored as integer microseconds since the Unix epoch, returned as aware UTC"""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return datetime_to_epoch(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return epoch_to_datetime(value)
+
+
+class Assignee(SQLModel, table=True):
+    """Assignee database model: each distinct assignee name stored once"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __table_args__ = (
+        Index("ix_assignee_name", "name", unique=True),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    name: str = SQLField(max_length=100, nullable=False)
+    task_count: int = SQLField(default=0, nullable=False)
+
+
+class Tag(SQLModel, table=True):
+    """Tag database model: each distinct tag name stored once"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __table_args__ = (
+        Index("ix_tag_name", "name", unique=True),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    name: str = SQLField(max_length=50, nullable=False)
+    task_count: int = SQLField(default=0, nullable=False)
+
+
+class TaskTag(SQLModel, table=True):
+    """Task/tag association; the (tag_id, task_id) index is the inverted index from tag to tasks"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __tablename__ = "task_tag"  # type: ignore
+    __table_args__ = (
+        Index("ix_task_tag_tag_id_task_id", "tag_id", "task_id"),
+    )
+
+    task_id: int = SQLField(foreign_key="task.id", primary_key=True)
+    tag_id: int = SQLField(foreign_key="tag.id", primary_key=True)
+
+
 class Task(SQLModel, table=True):
     """Task database model"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __table_args__ = (
+        Index("ix_task_status_created_at", "status", "created_at"),
+        Index("ix_task_created_at", "created_at"),
+        Index("ix_task_priority", "priority"),
+        Index("ix_task_assignee_id", "assignee_id"),
+        Index("ix_task_due_date", "due_date"),
+        Index("ix_task_parent_id", "parent_id"),
+        Index("ix_task_status_priority_due_date", "status", "priority", "due_date"),
+        # Archived tasks keep their ids, so SQLite must never hand an id out again
+        {"sqlite_autoincrement": True},
+    )
+
     id: Optional[int] = SQLField(default=None, primary_key=True)
     title: str = SQLField(max_length=200, nullable=False)
     description: Optional[str] = SQLField(max_length=1000, nullable=True)
-    status: TaskStatus = SQLField(default=TaskStatus.pending, nullable=False)
-    priority: TaskPriority = SQLField(default=TaskPriority.medium, nullable=False)
-    created_at: datetime = SQLField(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at: Optional[datetime] = SQLField(default=None, nullable=True)
-    due_date: Optional[datetime] = SQLField(default=None, nullable=True)
-    assigned_to: Optional[str] = SQLField(max_length=100, nullable=True)
+    status: TaskStatus = SQLField(default=TaskStatus.pending, sa_type=RankedEnum(TaskStatus), nullable=False)
+    priority: TaskPriority = SQLField(default=TaskPriority.medium, sa_type=RankedEnum(TaskPriority), nullable=False)
+    created_at: datetime = SQLField(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=UTCEpoch, nullable=False
+    )
+    updated_at: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    due_date: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    assignee_id: Optional[int] = SQLField(default=None, foreign_key="assignee.id", nullable=True)
+    parent_id: Optional[int] = SQLField(default=None, foreign_key="task.id", nullable=True)
+
+    # Loaded in the same query as the task, so reading assigned_to never costs a query
+    assignee: Optional[Assignee] = Relationship(sa_relationship_kwargs={"lazy": "joined"})
+    # One extra IN query per page of tasks rather than one query per task
+    tag_rows: List[Tag] = Relationship(
+        link_model=TaskTag, sa_relationship_kwargs={"lazy": "selectin", "order_by": "Tag.name"}
+    )
+
+    @property
+    def assigned_to(self) -> Optional[str]:
+        """Assignee name, as exposed by the API"""
+        return self.assignee.name if self.assignee is not None else None
+
+    @property
+    def tags(self) -> List[str]:
+        """Tag names in alphabetical order, as exposed by the API"""
+        return [tag.name for tag in self.tag_rows]
+
+
+class ArchivedTask(SQLModel, table=True):
+    """Completed or cancelled task moved out of the live task table by the archiver
+
+    Keeps the task's id. Tags are denormalized into ``tag_names`` as
+    ",name1,name2," so a tag filter is a delimited substring match, and
+    ``parent_id`` is a plain reference since the parent may be deleted later.
+    """
+    # Keep in sync with the migrations in app/migrations/versions
+    __tablename__ = "task_archive"  # type: ignore
+    __table_args__ = (
+        Index("ix_task_archive_created_at", "created_at"),
+        Index("ix_task_archive_assignee_id", "assignee_id"),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    title: str = SQLField(max_length=200, nullable=False)
+    description: Optional[str] = SQLField(max_length=1000, nullable=True)
+    status: TaskStatus = SQLField(sa_type=RankedEnum(TaskStatus), nullable=False)
+    priority: TaskPriority = SQLField(sa_type=RankedEnum(TaskPriority), nullable=False)
+    created_at: datetime = SQLField(sa_type=UTCEpoch, nullable=False)
+    updated_at: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    due_date: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    assignee_id: Optional[int] = SQLField(default=None, foreign_key="assignee.id", nullable=True)
+    parent_id: Optional[int] = SQLField(default=None, nullable=True)
+    tag_names: str = SQLField(default="", nullable=False)
+    archived_at: datetime = SQLField(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=UTCEpoch, nullable=False
+    )
+
+    assignee: Optional[Assignee] = Relationship(sa_relationship_kwargs={"lazy": "joined"})
+
+    @property
+    def assigned_to(self) -> Optional[str]:
+        """Assignee name, as exposed by the API"""
+        return self.assignee.name if self.assignee is not None else None
+
+    @property
+    def tags(self) -> List[str]:
+        """Tag names in alphabetical order, as exposed by the API"""
+        return [name for name in self.tag_names.split(",") if name]
+
+
+class Job(SQLModel, table=True):
+    """Background job database model; the table is the queue, so jobs survive restarts"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __table_args__ = (
+        Index("ix_job_status", "status"),
+    )
+
+    id: Optional[int] = SQLField(default=None, primary_key=True)
+    kind: str = SQLField(max_length=50, nullable=False)
+    status: JobStatus = SQLField(default=JobStatus.queued, sa_type=RankedEnum(JobStatus), nullable=False)
+    params: dict = SQLField(default_factory=dict, sa_type=JSON, nullable=False)
+    result: Optional[dict] = SQLField(default=None, sa_type=JSON, nullable=True)
+    error: Optional[str] = SQLField(default=None, nullable=True)
+    processed: int = SQLField(default=0, nullable=False)
+    total: Optional[int] = SQLField(default=None, nullable=True)
+    cancel_requested: bool = SQLField(default=False, nullable=False)
+    created_at: datetime = SQLField(
+        default_factory=lambda: datetime.now(timezone.utc), sa_type=UTCEpoch, nullable=False
+    )
+    started_at: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    finished_at: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+    heartbeat_at: Optional[datetime] = SQLField(default=None, sa_type=UTCEpoch, nullable=True)
+
+    @property
+    def progress(self) -> Optional[float]:
+        """Percentage done, when the job knows its total"""
+        if self.status == JobStatus.succeeded:
+            return 100.0
+        if not self.total:
+            return None
+        return round(100.0 * min(self.processed, self.total) / self.total, 1)
+
+
+class Lease(SQLModel, table=True):
+    """Named lease held by at most one process at a time, across workers and hosts"""
+    # Keep in sync with the migrations in app/migrations/versions
+    name: str = SQLField(max_length=50, primary_key=True)
+    holder: str = SQLField(max_length=200, nullable=False)
+    expires_at: datetime = SQLField(sa_type=UTCEpoch, nullable=False)
+
+
+class TaskTrigram(SQLModel, table=True):
+    """Trigram posting: the task's title or description contains the trigram (SQLite fuzzy search index)"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __tablename__ = "task_trigram"  # type: ignore
+    __table_args__ = (
+        Index("ix_task_trigram_task_id", "task_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    trigram: str = SQLField(primary_key=True)
+    # No foreign key: postings are maintained at commit, after the task row may be gone
+    task_id: int = SQLField(primary_key=True)
+
+
+class TaskClosure(SQLModel, table=True):
+    """Transitive closure of the task hierarchy: one row per (ancestor, descendant) pair
+
+    Only proper ancestors are stored (depth >= 1), so top-level tasks without
+    children cost no rows. Maintained by TaskCRUD on every parent change.
+    """
+    # Keep in sync with the migrations in app/migrations/versions
+    __tablename__ = "task_closure"  # type: ignore
+    __table_args__ = (
+        Index("ix_task_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
+
+    ancestor_id: int = SQLField(foreign_key="task.id", primary_key=True)
+    descendant_id: int = SQLField(foreign_key="task.id", primary_key=True)
+    depth: int = SQLField(nullable=False)
+
+
+class TaskDependency(SQLModel, table=True):
+    """Dependency edge: blocked_id cannot proceed until blocker_id is done"""
+    # Keep in sync with the migrations in app/migrations/versions
+    __tablename__ = "task_dependency"  # type: ignore
+    __table_args__ = (
+        Index("ix_task_dependency_blocker_id_blocked_id", "blocker_id", "blocked_id"),
+    )
+
+    blocked_id: int = SQLField(foreign_key="task.id", primary_key=True)
+    blocker_id: int = SQLField(foreign_key="task.id", primary_key=True)
+
+
+MAX_TAGS_PER_TASK = 20
+
+
+def normalize_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """Strip tag names and drop duplicates, keeping the first occurrence"""
+    if tags is None:
+        return None
+    names = []
+    for tag in tags:
+        name = tag.strip()
+        if not name:
+            raise ValueError('Tags cannot be empty or whitespace only')
+        if len(name) > 50:
+            raise ValueError('Tags must be at most 50 characters')
+        if "," in name:
+            raise ValueError('Tags cannot contain commas')
+        if name not in names:
+            names.append(name)
+    if len(names) > MAX_TAGS_PER_TASK:
+        raise ValueError(f'Maximum {MAX_TAGS_PER_TASK} tags allowed')
+    return names
 
 
 class TaskCreate(BaseModel):
@@ -60,6 +358,8 @@ class TaskCreate(BaseModel):
     priority: TaskPriority = Field(default=TaskPriority.medium, description="Task priority")
     due_date: Optional[datetime] = Field(None, description="Task deadline")
     assigned_to: Optional[str] = Field(None, max_length=100, description="Assignee name")
+    tags: List[str] = Field(default_factory=list, description="Tag names")
+    parent_id: Optional[int] = Field(None, description="Parent task ID, for subtasks")
 
     @validator('title')
     def validate_title(cls, v):
@@ -80,6 +380,11 @@ class TaskCreate(BaseModel):
                 raise ValueError('Due date must be in the future')
         return v
 
+    @validator('tags')
+    def validate_tags(cls, v):
+        """Validate and sanitize tag names"""
+        return normalize_tags(v)
+
 
 class TaskUpdate(BaseModel):
     """Model for updating an existing task"""
@@ -89,6 +394,7 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = Field(None, description="Task priority")
     due_date: Optional[datetime] = Field(None, description="Task deadline")
     assigned_to: Optional[str] = Field(None, max_length=100, description="Assignee name")
+    tags: Optional[List[str]] = Field(None, description="Tag names, replacing the current tags")
 
     @validator('title')
     def validate_title(cls, v):
@@ -111,6 +417,11 @@ class TaskUpdate(BaseModel):
                 raise ValueError('Due date must be in the future')
         return v
 
+    @validator('tags')
+    def validate_tags(cls, v):
+        """Validate and sanitize tag names"""
+        return normalize_tags(v)
+
 
 class TaskResponse(BaseModel):
     """Model for task API responses"""
@@ -123,11 +434,43 @@ class TaskResponse(BaseModel):
     updated_at: Optional[datetime]
     due_date: Optional[datetime]
     assigned_to: Optional[str]
+    tags: List[str] = []
+    parent_id: Optional[int] = None
+    archived_at: Optional[datetime] = Field(None, description="Set when the task has been moved to the archive")
 
     class Config:
         from_attributes = True
 
 
+class TaskParentUpdate(BaseModel):
+    """Model for moving a task in the hierarchy"""
+    parent_id: Optional[int] = Field(..., description="New parent task ID, null to make it a top-level task")
+
+
+class TaskBlockerCreate(BaseModel):
+    """Model for adding a dependency"""
+    blocker_id: int = Field(..., description="ID of the task that must be done first")
+
+
+class TaskTreeEntry(BaseModel):
+    """Model for a task related to another through the hierarchy or dependencies"""
+    depth: int = Field(..., description="Distance from the requested task")
+    task: TaskResponse
+
+
+class TaskTreeResponse(BaseModel):
+    """Model for subtree, ancestor and blocker responses"""
+    task_id: int
+    tasks: List[TaskTreeEntry]
+    total: int
+
+
+class FacetCount(BaseModel):
+    """Number of matching tasks with one value of a facet field"""
+    value: Optional[str]
+    count: int
+
+
 class TaskListResponse(BaseModel):
     """Model for paginated task list responses"""
     tasks: list[TaskResponse]
@@ -135,6 +478,48 @@ class TaskListResponse(BaseModel):
     skip: int
     limit: int
     has_more: bool
+    facets: Optional[Dict[str, List[FacetCount]]] = Field(
+        None, description="Value counts over all matching tasks, for the requested facets"
+    )
+
+
+class TaskSummary(BaseModel):
+    """Compact task fields for calendar and deadline views"""
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[datetime]
+    assigned_to: Optional[str]
+
+
+class CalendarBucketResponse(BaseModel):
+    """Tasks due within one calendar bucket, [start, end)"""
+    start: datetime
+    end: datetime
+    count: int
+    tasks: List[TaskSummary] = Field(default_factory=list, description="Earliest due tasks of the bucket, if requested")
+
+
+class CalendarResponse(BaseModel):
+    """Model for due-date calendar responses"""
+    bucket: CalendarBucket
+    total: int
+    buckets: List[CalendarBucketResponse]
+
+
+class DeadlineGroup(BaseModel):
+    """Open tasks in one deadline category"""
+    count: int
+    tasks: List[TaskSummary]
+
+
+class DeadlinesResponse(BaseModel):
+    """Model for overdue and due-soon task responses"""
+    as_of: datetime
+    due_soon_until: datetime
+    overdue: DeadlineGroup
+    due_soon: DeadlineGroup
 
 
 class TaskFilters(BaseModel):
@@ -142,11 +527,23 @@ class TaskFilters(BaseModel):
     status: Optional[TaskStatus] = Field(None, description="Filter by task status")
     priority: Optional[TaskPriority] = Field(None, description="Filter by task priority")
     assigned_to: Optional[str] = Field(None, description="Filter by assignee")
+    tags_all: Optional[List[str]] = Field(None, description="Filter tasks having every one of these tags")
+    tags_any: Optional[List[str]] = Field(None, description="Filter tasks having at least one of these tags")
     search: Optional[str] = Field(None, description="Search in title and description")
     due_date_from: Optional[datetime] = Field(None, description="Filter tasks due from this date")
     due_date_to: Optional[datetime] = Field(None, description="Filter tasks due until this date")
     created_from: Optional[datetime] = Field(None, description="Filter tasks created from this date")
     created_to: Optional[datetime] = Field(None, description="Filter tasks created until this date")
+    include_archived: bool = Field(False, description="Also return archived tasks")
+
+
+class TaskClaim(BaseModel):
+    """Model for claiming the next pending tasks from the work queue"""
+    assigned_to: str = Field(..., min_length=1, max_length=100, description="Assignee taking the tasks")
+    limit: int = Field(1, ge=1, le=100, description="Maximum number of tasks to claim")
+    min_priority: Optional[TaskPriority] = Field(None, description="Only claim tasks at least this urgent")
+    tags_all: Optional[List[str]] = Field(None, description="Only claim tasks having every one of these tags")
+    tags_any: Optional[List[str]] = Field(None, description="Only claim tasks having at least one of these tags")
 
 
 class TaskSort(BaseModel):
@@ -184,6 +581,239 @@ class BulkTaskDelete(BaseModel):
         return v
 
 
+class TaskPatch(BaseModel):
+    """Model for the changes to apply to one task in a bulk patch"""
+    id: int = Field(..., description="Task ID")
+    changes: TaskUpdate = Field(..., description="Fields to change on this task")
+
+    @validator('changes')
+    def validate_changes(cls, v):
+        """Validate at least one field is changed"""
+        if not v.dict(exclude_none=True):
+            raise ValueError('At least one field must be changed')
+        return v
+
+
+class BulkTaskPatch(BaseModel):
+    """Model for bulk per-task patches"""
+    patches: List[TaskPatch] = Field(..., description="Per-task changes")
+
+    @validator('patches')
+    def validate_patches(cls, v):
+        """Validate patches list length and unique task IDs"""
+        if len(v) < 1:
+            raise ValueError('At least one patch is required')
+        if len(v) > 5000:
+            raise ValueError('Maximum 5000 patches allowed')
+        if len({patch.id for patch in v}) != len(v):
+            raise ValueError('Each task ID may only be patched once')
+        return v
+
+
+class TaskBatchRequest(BaseModel):
+    """Model for fetching many tasks by ID"""
+    ids: List[int] = Field(..., description="Task IDs, results keep this order")
+
+    @validator('ids')
+    def validate_ids(cls, v):
+        """Validate IDs list length"""
+        if len(v) < 1:
+            raise ValueError('At least one task ID is required')
+        if len(v) > 10000:
+            raise ValueError('Maximum 10000 task IDs allowed')
+        return v
+
+
+class TaskBatchResponse(BaseModel):
+    """Model for batch fetch responses"""
+    tasks: List[Optional[TaskResponse]] = Field(..., description="One entry per requested ID, null when not found")
+    missing_ids: List[int]
+
+
+class BatchOperationType(str, Enum):
+    """Batch operation type enumeration"""
+    create = "create"
+    update = "update"
+    delete = "delete"
+    get = "get"
+
+
+class BatchOperation(BaseModel):
+    """Model for a single operation in a batch request"""
+    op: BatchOperationType = Field(..., description="Operation to perform")
+    task_id: Optional[int] = Field(None, description="Target task ID (update, delete, get)")
+    data: Optional[dict] = Field(None, description="Task fields (create, update)")
+
+    @validator('task_id', always=True)
+    def validate_task_id(cls, v, values):
+        """Validate a target is given for operations on existing tasks"""
+        if v is None and values.get('op') not in (None, BatchOperationType.create):
+            raise ValueError('task_id is required for update, delete and get operations')
+        return v
+
+
+class BatchRequest(BaseModel):
+    """Model for a multi-operation batch request"""
+    operations: List[BatchOperation] = Field(..., description="Operations, executed in order")
+    atomic: bool = Field(default=False, description="Roll back every operation if any of them fails")
+
+    @validator('operations')
+    def validate_operations(cls, v):
+        """Validate operations list length"""
+        if len(v) < 1:
+            raise ValueError('At least one operation is required')
+        if len(v) > 500:
+            raise ValueError('Maximum 500 operations allowed')
+        return v
+
+
+class BatchOperationResult(BaseModel):
+    """Model for the outcome of one batch operation"""
+    index: int
+    op: BatchOperationType
+    status: int = Field(..., description="HTTP status the equivalent single request would return")
+    task: Optional[TaskResponse] = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Model for batch responses"""
+    results: List[BatchOperationResult]
+    committed: bool
+    succeeded: int
+    failed: int
+
+
+class AssigneeResponse(BaseModel):
+    """Model for assignee API responses"""
+    id: int
+    name: str
+    task_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class TagResponse(BaseModel):
+    """Model for tag API responses"""
+    id: int
+    name: str
+    task_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class BulkTaskUpdateJob(BaseModel):
+    """Model for a background bulk update"""
+    task_ids: List[int] = Field(..., description="List of task IDs to update")
+    updates: TaskUpdate = Field(..., description="Updates to apply to all tasks")
+
+    @validator('task_ids')
+    def validate_task_ids(cls, v):
+        """Validate task IDs list length"""
+        if len(v) < 1:
+            raise ValueError('At least one task ID is required')
+        if len(v) > 100000:
+            raise ValueError('Maximum 100000 task IDs allowed')
+        return v
+
+    @validator('updates')
+    def validate_updates(cls, v):
+        """Validate at least one field is changed"""
+        if not v.dict(exclude_none=True):
+            raise ValueError('At least one field must be changed')
+        return v
+
+
+class BulkTaskDeleteJob(BaseModel):
+    """Model for a background bulk deletion"""
+    task_ids: List[int] = Field(..., description="List of task IDs to delete")
+
+    @validator('task_ids')
+    def validate_task_ids(cls, v):
+        """Validate task IDs list length"""
+        if len(v) < 1:
+            raise ValueError('At least one task ID is required')
+        if len(v) > 100000:
+            raise ValueError('Maximum 100000 task IDs allowed')
+        return v
+
+
+class ArchiveJobRequest(BaseModel):
+    """Model for a background archiving run"""
+    older_than_days: float = Field(30, ge=0, description="Archive completed/cancelled tasks unchanged for this long")
+
+
+class JobResponse(BaseModel):
+    """Model for background job API responses"""
+    id: int
+    kind: str
+    status: JobStatus
+    progress: Optional[float] = Field(None, description="Percentage done, null while the total is unknown")
+    processed: int
+    total: Optional[int]
+    result: Optional[dict]
+    error: Optional[str]
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class ProfileStatement(BaseModel):
+    """SQL statement executed by a profiled request"""
+    statement: str
+    started_ms: float = Field(..., description="Milliseconds from the start of the request")
+    duration_ms: float
+
+
+class ProfileSummary(BaseModel):
+    """Model for request profile listings"""
+    id: str
+    worker: str = Field(..., description="Host and pid of the worker process holding the profile")
+    method: str
+    path: str
+    reason: str = Field(..., description="header or sampled")
+    status_code: Optional[int]
+    started_at: datetime
+    duration_ms: Optional[float]
+    samples: int
+    sql_ms: float = Field(..., description="Time spent executing SQL statements")
+    statement_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class ProfileResponse(ProfileSummary):
+    """Model for a request profile with its SQL statements"""
+    statements: List[ProfileStatement]
+    dropped_statements: int
+
+
+class StorageStatus(BaseModel):
+    """Model for database storage usage and maintenance activity"""
+    dialect: str
+    reclaiming: bool
+    reclaimed_pages: int
+    last_vacuum_at: Optional[datetime] = None
+    last_analyze_at: Optional[datetime] = None
+    last_analyze_ms: Optional[float] = None
+    auto_vacuum: Optional[str] = None
+    page_size: Optional[int] = None
+    page_count: Optional[int] = None
+    free_pages: Optional[int] = None
+    free_bytes: Optional[int] = None
+    live_rows: Optional[int] = None
+    dead_rows: Optional[int] = None
+    free_ratio: Optional[float] = None
+    size_bytes: Optional[int] = None
+
+
 class HealthResponse(BaseModel):
     """Model for health check response"""
     status: str
@@ -0,0 +1,298 @@
+"""On-demand profiling of individual requests
+
+With ``PROFILING_ENABLED`` set, a request is profiled when it carries the
+``X-Profile-Token`` header with the configured token, or when it is picked by
+``PROFILING_SAMPLE_RATE``. A profiled request runs as usual while a sampler
+thread records the request's stacks every few milliseconds: the event loop
+thread whenever the request's own task is running on it, and the worker
+threads running its queries for as long as they work on its behalf. Every SQL
+statement the request executes is recorded with its timing. Finished profiles
+stay in memory, per process, in a bounded ring and are read through the
+``/admin/profiles`` endpoints, which require the token; stacks are served in
+the collapsed format that speedscope and flamegraph.pl load directly. Profile
+ids are unique across processes, and each profile names the worker holding it.
+"""
+import asyncio
+import hmac
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import normalize_statement
+
+# Profiling configuration
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # empty: no profiling on demand, admin endpoints closed
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+PROFILING_MAX_STATEMENTS = int(os.getenv("PROFILING_MAX_STATEMENTS", "1000"))
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_WORKER_HEADER = "X-Profile-Worker"
+
+# Requests for profiles are never profiled themselves
+_EXCLUDED_PREFIXES = ("/api/v1/admin/profiles", "/metrics")
+
+# Frames of these modules run a worker thread's loop, not the request's work
+_THREAD_RUNNER_MODULES = ("threading", "concurrent.futures.thread", "anyio._backends._asyncio")
+
+_active_profile: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+_frame_labels: Dict[CodeType, str] = {}
+
+
+def _frame_label(code: CodeType) -> str:
+    label = _frame_labels.get(code)
+    if label is None:
+        path = code.co_filename.replace("\\", "/").split("/")
+        label = f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+        _frame_labels[code] = label
+    return label
+
+
+def _work_root(frame: Optional[FrameType]) -> Optional[FrameType]:
+    """The outermost frame of a worker thread that belongs to the work item rather than the pool"""
+    root = None
+    while frame is not None:
+        if not frame.f_globals.get("__name__", "").startswith(_THREAD_RUNNER_MODULES):
+            root = frame
+        frame = frame.f_back
+    return root
+
+
+class Profile:
+    """Stacks and SQL statements recorded for one request"""
+
+    def __init__(self, method: str, path: str, reason: str):
+        # Every worker process has its own store, so ids must not repeat across them
+        self.id = uuid.uuid4().hex
+        self.worker = worker_id()
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.now(timezone.utc)
+        self.status_code: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.statements: List[dict] = []
+        self.dropped_statements = 0
+        self._start = time.perf_counter()
+        self._worker_roots: Dict[int, FrameType] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def statement_count(self) -> int:
+        return len(self.statements) + self.dropped_statements
+
+    @property
+    def sql_ms(self) -> float:
+        return round(sum(statement["duration_ms"] for statement in self.statements), 3)
+
+    def collapsed(self) -> str:
+        """Stacks as ``root;...;leaf count`` lines"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def add_worker(self, thread_id: int) -> None:
+        """Attribute the current work item of a worker thread to this request"""
+        root = _work_root(sys._getframe(1))
+        if root is not None and self._worker_roots.get(thread_id) is not root:
+            with self._lock:
+                self._worker_roots[thread_id] = root
+
+    def add_statement(self, statement: str, start: float, elapsed: float) -> None:
+        if len(self.statements) >= PROFILING_MAX_STATEMENTS:
+            self.dropped_statements += 1
+            return
+        self.statements.append({
+            "statement": normalize_statement(statement),
+            "started_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3),
+        })
+
+    def sample(self, frames: Dict[int, FrameType], loop_thread: Optional[int]) -> None:
+        if loop_thread is not None and loop_thread in frames:
+            self._record(frames[loop_thread], None)
+        with self._lock:
+            workers = list(self._worker_roots.items())
+        for thread_id, root in workers:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                self._record(frame, root)
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.status_code = status_code
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        with self._lock:
+            # Frames keep their locals alive
+            self._worker_roots.clear()
+
+    def _record(self, frame: Optional[FrameType], root: Optional[FrameType]) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            if frame is root:
+                break
+            frame = frame.f_back
+        else:
+            if root is not None:
+                # The thread has moved on from this request's work item
+                return
+        self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+
+def worker_id() -> str:
+    """The process holding this process's profiles; the pid is read on each call so forked workers differ"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _Sampler(threading.Thread):
+    """Samples the stacks of one request until stopped"""
+
+    def __init__(self, profile: Profile, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task]):
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.loop = loop
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        interval = PROFILING_INTERVAL_MS / 1000
+        while not self._stopped.wait(interval):
+            frames = sys._current_frames()
+            running = asyncio.current_task(self.loop) is self.task
+            self.profile.sample(frames, self.loop_thread if running else None)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class ProfileStore:
+    """The most recent finished profiles of this process"""
+
+    def __init__(self, max_profiles: int = PROFILING_MAX_PROFILES):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        """Most recent profiles first"""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+profile_store = ProfileStore()
+
+
+def token_matches(value: Optional[str]) -> bool:
+    """Whether a header value is the configured profiling token"""
+    return bool(PROFILING_TOKEN) and value is not None and hmac.compare_digest(value, PROFILING_TOKEN)
+
+
+def _profile_reason(scope) -> Optional[str]:
+    if scope["path"].startswith(_EXCLUDED_PREFIXES):
+        return None
+    header = PROFILE_HEADER.lower().encode()
+    for name, value in scope["headers"]:
+        if name == header and token_matches(value.decode("latin-1")):
+            return "header"
+    if PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it or are sampled"""
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        reason = _profile_reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], reason)
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode(), profile.id.encode()))
+                headers.append((PROFILE_WORKER_HEADER.lower().encode(), profile.worker.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler = _Sampler(profile, asyncio.get_running_loop(), asyncio.current_task())
+        token = _active_profile.set(profile)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            _active_profile.reset(token)
+            profile.finish(status_code)
+            self.store.add(profile)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and context is not None:
+        context._profile_start_time = time.perf_counter()
+        # Queries run in worker threads carry the request's context there
+        if not _in_event_loop():
+            profile.add_worker(threading.get_ident())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    start = getattr(context, "_profile_start_time", None)
+    if profile is not None and start is not None:
+        profile.add_statement(statement, start, time.perf_counter() - start)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def profile_engine(engine: Engine) -> None:
+    """Record the statements of profiled requests run on an engine"""
+    if getattr(engine, "_profiling_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    engine._profiling_instrumented = True  # type: ignore[attr-defined]
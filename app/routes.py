@@ -1,18 +1,126 @@
-from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Hashable, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session
 
+from .cancellation import (
+    ClientDisconnected, QueryGuard, StatementTimeout, cancel_on_disconnect, guarded, run_guarded
+)
 from .database import get_session
 from .models import (
     Task, TaskCreate, TaskUpdate, TaskResponse, TaskListResponse,
     TaskStatus, TaskPriority, HealthResponse, APIInfo, TaskFilters,
-    TaskSort, BulkTaskUpdate, BulkTaskDelete, SortField, SortOrder
+    TaskSort, BulkTaskUpdate, BulkTaskDelete, BulkTaskPatch, SortField, SortOrder,
+    BatchRequest, BatchResponse, BatchOperationResult, TaskBatchRequest, TaskBatchResponse,
+    AssigneeResponse, TagResponse, TaskParentUpdate, TaskBlockerCreate, TaskTreeEntry, TaskTreeResponse,
+    BulkTaskUpdateJob, BulkTaskDeleteJob, ArchiveJobRequest, JobResponse, JobStatus, TaskClaim, FacetField,
+    CalendarBucket, CalendarResponse, DeadlinesResponse, ProfileResponse, ProfileSummary, StorageStatus
 )
-from .crud import TaskCRUD
+from .crud import CycleError, TaskCRUD, TaskNotFoundError
+from . import columnar
+from .jobs import job_runner
+from .maintenance import storage_maintainer
+from . import profiling
+from .search import TRIGRAM_SIMILARITY_THRESHOLD
+from .singleflight import SINGLEFLIGHT_ENABLED, SingleFlight
+from .writer import write_pipeline
 
 router = APIRouter()
 
+CALENDAR_BUCKET_WIDTHS = {CalendarBucket.day: timedelta(days=1), CalendarBucket.week: timedelta(weeks=1)}
+CALENDAR_MAX_BUCKETS = 400
+
+# Identical concurrent list/search requests share one query and one serialized body
+task_list_flight = SingleFlight("task_list")
+
+
+def _task_list_body(
+    guard: QueryGuard,
+    session: Session,
+    skip: int,
+    limit: int,
+    fetch: Callable[[Session], "tuple[List[Task], int, Optional[dict]]"]
+) -> bytes:
+    """Run a list query and serialize the response body"""
+    # The query may outlive the request that started it, so it gets its own session
+    with Session(session.get_bind()) as query_session, guarded(query_session, guard):
+        tasks, total, facets = fetch(query_session)
+        return TaskListResponse(
+            tasks=[TaskResponse.from_orm(task) for task in tasks],
+            total=total,
+            skip=skip,
+            limit=limit,
+            has_more=(skip + limit) < total,
+            facets=facets
+        ).model_dump_json(exclude=None if facets is not None else {"facets"}).encode()
+
+
+def _tag_list(value: Optional[str]) -> Optional[tuple]:
+    """Parse a comma-separated tag filter; a tuple so it can be part of a coalescing key"""
+    if value is None:
+        return None
+    return tuple(tag.strip() for tag in value.split(",") if tag.strip()) or None
+
+
+def _facet_list(value: Optional[str]) -> tuple:
+    """Parse a comma-separated facets parameter"""
+    if value is None:
+        return ()
+    try:
+        return tuple(dict.fromkeys(FacetField(name.strip()) for name in value.split(",") if name.strip()))
+    except ValueError:
+        allowed = ", ".join(facet.value for facet in FacetField)
+        raise HTTPException(status_code=400, detail=f"Unknown facet in '{value}'; expected any of: {allowed}")
+
+
+def _list_tasks(
+    query_session: Session,
+    include_archived: bool = False,
+    facets: tuple = (),
+    **query
+) -> "tuple[List[Task], int, Optional[dict]]":
+    """List tasks (and facet counts, if asked) from the columnar store once it is loaded, otherwise through SQL"""
+    store = columnar.columnar_store
+    # The columnar store only holds the live table
+    if not include_archived and store is not None and store.ready:
+        if facets:
+            return store.get_tasks_with_facets(facets, **query)
+        return (*store.get_tasks(**query), None)
+    if facets:
+        return TaskCRUD.get_tasks_with_facets(query_session, facets, include_archived=include_archived, **query)
+    return (*TaskCRUD.get_tasks(query_session, include_archived=include_archived, **query), None)
+
+
+def _guarded_query(guard: QueryGuard, session: Session, query: Callable, *args):
+    """Run a read query on its own session under a query guard"""
+    with Session(session.get_bind()) as query_session, guarded(query_session, guard):
+        return query(query_session, *args)
+
+
+async def _task_list_response(
+    route: str,
+    key: Hashable,
+    request: Request,
+    session: Session,
+    skip: int,
+    limit: int,
+    fetch: Callable[[Session], "tuple[List[Task], int]"]
+) -> Response:
+    """Serve a task list, coalescing with identical in-flight requests
+
+    The query is stopped once every request waiting for it has disconnected.
+    """
+    def run():
+        return run_guarded(route, _task_list_body, session, skip, limit, fetch)
+
+    try:
+        body = await cancel_on_disconnect(request, task_list_flight.do(key, run) if SINGLEFLIGHT_ENABLED else run())
+    except ClientDisconnected:
+        # Nobody is left to read it; 499 is what access logs record for a client that closed the request
+        return Response(status_code=499)
+    return Response(content=body, media_type="application/json")
+
 
 @router.get("/", response_model=APIInfo, tags=["API Information"])
 async def get_api_info():
@@ -31,9 +139,34 @@ async def get_api_info():
             "DELETE /tasks/{task_id}": "Delete a task",
             "GET /tasks/status/{status}": "Get tasks by status",
             "GET /tasks/priority/{priority}": "Get tasks by priority",
-            "GET /tasks/search": "Search tasks by title/description",
+            "GET /tasks/search": "Search tasks by title/description (fuzzy=true tolerates typos)",
+            "GET /tasks/calendar": "Count tasks due per day or week, with the earliest few of each",
+            "GET /tasks/deadlines": "Get open tasks that are overdue or due soon",
             "POST /tasks/bulk-update": "Bulk update multiple tasks",
-            "POST /tasks/bulk-delete": "Bulk delete multiple tasks"
+            "POST /tasks/bulk-delete": "Bulk delete multiple tasks",
+            "POST /tasks/bulk-patch": "Apply different changes to many tasks",
+            "POST /tasks/claim": "Atomically take the next pending tasks for an assignee",
+            "GET /tasks/batch": "Get many tasks by ID (POST for large ID sets)",
+            "POST /batch": "Run a sequence of task operations in one transaction",
+            "PUT /tasks/{task_id}/parent": "Move a task (and its subtasks) under another task",
+            "GET /tasks/{task_id}/subtree": "Get all subtasks of a task in one query",
+            "GET /tasks/{task_id}/ancestors": "Get the parent chain of a task",
+            "GET /tasks/{task_id}/blockers": "Get the tasks blocking a task, transitively by default",
+            "POST /tasks/{task_id}/blockers": "Add a blocking task",
+            "DELETE /tasks/{task_id}/blockers/{blocker_id}": "Remove a blocking task",
+            "GET /assignees": "List assignees with their task counts",
+            "GET /tags": "List tags with their task counts",
+            "POST /jobs/bulk-update": "Bulk update any number of tasks in the background",
+            "POST /jobs/bulk-delete": "Bulk delete any number of tasks in the background",
+            "POST /jobs/archive": "Archive old completed and cancelled tasks in the background",
+            "POST /jobs/compact": "Release all free database pages and refresh planner statistics in the background",
+            "GET /jobs": "List recent background jobs",
+            "GET /jobs/{job_id}": "Get the status and progress of a background job",
+            "POST /jobs/{job_id}/cancel": "Cancel a background job",
+            "GET /admin/profiles": "List recent request profiles",
+            "GET /admin/profiles/{profile_id}": "Get a request profile with its SQL statements",
+            "GET /admin/profiles/{profile_id}/collapsed": "Get a request profile's stacks for flame graph tools",
+            "GET /admin/storage": "Get database free space and maintenance status"
         }
     )
 
@@ -55,7 +188,12 @@ async def create_task(
     """Create a new task"""
     try:
         task_data = task.dict()
-        created_task = TaskCRUD.create_task(session, task_data)
+        if write_pipeline.running:
+            created_task = await write_pipeline.submit(
+                lambda batch: TaskCRUD.create_task(batch, task_data, commit=False)
+            )
+        else:
+            created_task = TaskCRUD.create_task(session, task_data)
         return TaskResponse.from_orm(created_task)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create task: {str(e)}")
@@ -63,11 +201,14 @@ async def create_task(
 
 @router.get("/tasks", response_model=TaskListResponse, tags=["Tasks"])
 async def get_tasks(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
     status: Optional[TaskStatus] = Query(None, description="Filter by task status"),
     priority: Optional[TaskPriority] = Query(None, description="Filter by task priority"),
     assigned_to: Optional[str] = Query(None, description="Filter by assignee"),
+    tags_all: Optional[str] = Query(None, description="Comma-separated tags the task must all have"),
+    tags_any: Optional[str] = Query(None, description="Comma-separated tags the task must have at least one of"),
     search: Optional[str] = Query(None, description="Search in title and description"),
     due_date_from: Optional[datetime] = Query(None, description="Filter tasks due from this date"),
     due_date_to: Optional[datetime] = Query(None, description="Filter tasks due until this date"),
@@ -75,65 +216,148 @@ async def get_tasks(
     created_to: Optional[datetime] = Query(None, description="Filter tasks created until this date"),
     sort_field: SortField = Query(SortField.created_at, description="Field to sort by"),
     sort_order: SortOrder = Query(SortOrder.desc, description="Sort order"),
+    include_archived: bool = Query(False, description="Also return archived completed/cancelled tasks"),
+    facets: Optional[str] = Query(None, description="Comma-separated fields to count values of: status, priority, assigned_to"),
     session: Session = Depends(get_session)
 ):
     """Get all tasks with advanced filtering, sorting, and pagination"""
+    filters = dict(
+        include_archived=include_archived,
+        facets=_facet_list(facets),
+        tags_all=_tag_list(tags_all),
+        tags_any=_tag_list(tags_any),
+        status=status,
+        priority=priority,
+        assigned_to=assigned_to,
+        search=search,
+        due_date_from=due_date_from,
+        due_date_to=due_date_to,
+        created_from=created_from,
+        created_to=created_to,
+        sort_field=sort_field,
+        sort_order=sort_order
+    )
     try:
-        tasks, total = TaskCRUD.get_tasks(
-            session, 
-            skip=skip, 
-            limit=limit, 
-            status=status, 
-            priority=priority,
-            assigned_to=assigned_to,
-            search=search,
-            due_date_from=due_date_from,
-            due_date_to=due_date_to,
-            created_from=created_from,
-            created_to=created_to,
-            sort_field=sort_field,
-            sort_order=sort_order
-        )
-        
-        task_responses = [TaskResponse.from_orm(task) for task in tasks]
-        
-        return TaskListResponse(
-            tasks=task_responses,
-            total=total,
-            skip=skip,
-            limit=limit,
-            has_more=(skip + limit) < total
+        return await _task_list_response(
+            "list_tasks",
+            ("tasks", skip, limit, *filters.items()),
+            request,
+            session,
+            skip,
+            limit,
+            lambda query_session: _list_tasks(query_session, skip=skip, limit=limit, **filters)
         )
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to retrieve tasks: {str(e)}")
 
 
 @router.get("/tasks/search", response_model=TaskListResponse, tags=["Tasks"])
 async def search_tasks(
+    request: Request,
     q: str = Query(..., description="Search term for title and description"),
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
+    facets: Optional[str] = Query(None, description="Comma-separated fields to count values of: status, priority, assigned_to"),
+    fuzzy: bool = Query(False, description="Tolerate typos, ranking results by trigram similarity"),
+    threshold: float = Query(
+        TRIGRAM_SIMILARITY_THRESHOLD, ge=0, le=1, description="Minimum similarity for fuzzy matches"
+    ),
     session: Session = Depends(get_session)
 ):
     """Search tasks by title and description"""
+    facet_fields = _facet_list(facets)
+
+    def fetch(query_session: Session):
+        if not fuzzy:
+            return _list_tasks(query_session, skip=skip, limit=limit, search=q, facets=facet_fields)
+        tasks, total, facet_counts = TaskCRUD.fuzzy_search_tasks(
+            query_session, q, skip, limit, threshold, facet_fields
+        )
+        return tasks, total, facet_counts if facet_fields else None
+
     try:
-        tasks, total = TaskCRUD.search_tasks(session, q, skip=skip, limit=limit)
-        
-        task_responses = [TaskResponse.from_orm(task) for task in tasks]
-        
-        return TaskListResponse(
-            tasks=task_responses,
-            total=total,
-            skip=skip,
-            limit=limit,
-            has_more=(skip + limit) < total
+        return await _task_list_response(
+            "search_tasks",
+            ("search", q, skip, limit, facet_fields, fuzzy, threshold),
+            request,
+            session,
+            skip,
+            limit,
+            fetch
         )
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to search tasks: {str(e)}")
 
 
+@router.get("/tasks/calendar", response_model=CalendarResponse, tags=["Tasks"])
+async def get_task_calendar(
+    request: Request,
+    from_: datetime = Query(..., alias="from", description="Start of the first bucket; its UTC offset sets the day boundaries"),
+    to: datetime = Query(..., description="End of the range (exclusive)"),
+    bucket: CalendarBucket = Query(CalendarBucket.day, description="Bucket width"),
+    per_bucket: int = Query(0, ge=0, le=50, description="Number of earliest due tasks to include per bucket"),
+    status: Optional[TaskStatus] = Query(None, description="Filter by task status"),
+    priority: Optional[TaskPriority] = Query(None, description="Filter by task priority"),
+    assigned_to: Optional[str] = Query(None, description="Filter by assignee"),
+    session: Session = Depends(get_session)
+):
+    """Get task counts per due-date bucket"""
+    width = CALENDAR_BUCKET_WIDTHS[bucket]
+    if from_.tzinfo is None:
+        from_ = from_.replace(tzinfo=timezone.utc)
+    if to.tzinfo is None:
+        to = to.replace(tzinfo=timezone.utc)
+    if to <= from_:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if (to - from_) / width > CALENDAR_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Maximum {CALENDAR_MAX_BUCKETS} buckets allowed, use a wider bucket")
+
+    try:
+        buckets = await cancel_on_disconnect(request, run_guarded(
+            "task_calendar", _guarded_query, session,
+            TaskCRUD.get_calendar, from_, to, width, per_bucket, status, priority, assigned_to
+        ))
+        return CalendarResponse(bucket=bucket, total=sum(entry.count for entry in buckets), buckets=buckets)
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve task calendar: {str(e)}")
+
+
+@router.get("/tasks/deadlines", response_model=DeadlinesResponse, tags=["Tasks"])
+async def get_task_deadlines(
+    request: Request,
+    within_days: int = Query(7, ge=0, le=365, description="Days ahead that count as due soon"),
+    limit: int = Query(10, ge=0, le=100, description="Maximum number of tasks to return per category"),
+    priority: Optional[TaskPriority] = Query(None, description="Filter by task priority"),
+    assigned_to: Optional[str] = Query(None, description="Filter by assignee"),
+    session: Session = Depends(get_session)
+):
+    """Get pending and in-progress tasks that are overdue or due soon"""
+    now = datetime.now(timezone.utc)
+    within = timedelta(days=within_days)
+    try:
+        groups = await cancel_on_disconnect(request, run_guarded(
+            "task_deadlines", _guarded_query, session, TaskCRUD.get_deadlines, now, within, limit, priority, assigned_to
+        ))
+        return DeadlinesResponse(as_of=now, due_soon_until=now + within, **groups)
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve deadlines: {str(e)}")
+
+
 @router.get("/tasks/status/{status}", response_model=TaskListResponse, tags=["Tasks"])
 async def get_tasks_by_status(
+    request: Request,
     status: TaskStatus,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
@@ -141,23 +365,24 @@ async def get_tasks_by_status(
 ):
     """Get tasks filtered by status"""
     try:
-        tasks, total = TaskCRUD.get_tasks_by_status(session, status, skip=skip, limit=limit)
-        
-        task_responses = [TaskResponse.from_orm(task) for task in tasks]
-        
-        return TaskListResponse(
-            tasks=task_responses,
-            total=total,
-            skip=skip,
-            limit=limit,
-            has_more=(skip + limit) < total
+        return await _task_list_response(
+            "list_tasks",
+            ("status", status, skip, limit),
+            request,
+            session,
+            skip,
+            limit,
+            lambda query_session: _list_tasks(query_session, skip=skip, limit=limit, status=status)
         )
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to retrieve tasks by status: {str(e)}")
 
 
 @router.get("/tasks/priority/{priority}", response_model=TaskListResponse, tags=["Tasks"])
 async def get_tasks_by_priority(
+    request: Request,
     priority: TaskPriority,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
@@ -165,17 +390,17 @@ async def get_tasks_by_priority(
 ):
     """Get tasks filtered by priority"""
     try:
-        tasks, total = TaskCRUD.get_tasks_by_priority(session, priority, skip=skip, limit=limit)
-        
-        task_responses = [TaskResponse.from_orm(task) for task in tasks]
-        
-        return TaskListResponse(
-            tasks=task_responses,
-            total=total,
-            skip=skip,
-            limit=limit,
-            has_more=(skip + limit) < total
+        return await _task_list_response(
+            "list_tasks",
+            ("priority", priority, skip, limit),
+            request,
+            session,
+            skip,
+            limit,
+            lambda query_session: _list_tasks(query_session, skip=skip, limit=limit, priority=priority)
         )
+    except StatementTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to retrieve tasks by priority: {str(e)}")
 
@@ -220,13 +445,131 @@ async def bulk_delete_tasks(
         raise HTTPException(status_code=400, detail=f"Failed to bulk delete tasks: {str(e)}")
 
 
+@router.post("/tasks/claim", response_model=List[TaskResponse], tags=["Tasks"])
+async def claim_tasks(
+    claim: TaskClaim,
+    session: Session = Depends(get_session)
+):
+    """Mark the next pending tasks in_progress for an assignee and return them
+
+    Workers call this instead of listing and then updating, so no two workers
+    ever get the same task. Returns an empty list when nothing is claimable.
+    """
+    try:
+        params = claim.dict()
+        if write_pipeline.running:
+            tasks = await write_pipeline.submit(
+                lambda batch: TaskCRUD.claim_tasks(batch, **params, commit=False)
+            )
+        else:
+            tasks = TaskCRUD.claim_tasks(session, **params)
+        return [TaskResponse.from_orm(task) for task in tasks]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to claim tasks: {str(e)}")
+
+
+@router.post("/tasks/bulk-patch", tags=["Tasks"])
+async def bulk_patch_tasks(
+    bulk_patch: BulkTaskPatch,
+    session: Session = Depends(get_session)
+):
+    """Apply per-task changes to multiple tasks"""
+    try:
+        updated_count, missing_ids = TaskCRUD.bulk_patch_tasks(
+            session,
+            [(patch.id, patch.changes.dict(exclude_none=True)) for patch in bulk_patch.patches]
+        )
+        
+        return {
+            "message": f"Successfully updated {updated_count} out of {len(bulk_patch.patches)} tasks",
+            "updated_count": updated_count,
+            "total_count": len(bulk_patch.patches),
+            "missing_ids": missing_ids
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to bulk patch tasks: {str(e)}")
+
+
+@router.post("/batch", response_model=BatchResponse, tags=["Tasks"])
+async def execute_batch(
+    batch: BatchRequest,
+    session: Session = Depends(get_session)
+):
+    """Run an ordered list of create/update/delete/get operations in one transaction"""
+    try:
+        outcomes, committed = TaskCRUD.execute_batch(session, batch.operations, batch.atomic)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to execute batch: {str(e)}")
+
+    results = [
+        BatchOperationResult(
+            index=index,
+            op=operation.op,
+            status=status,
+            task=TaskResponse.from_orm(task) if task is not None else None,
+            error=error
+        )
+        for index, (operation, (status, task, error)) in enumerate(zip(batch.operations, outcomes))
+    ]
+    succeeded = sum(1 for result in results if result.status < 400)
+    return BatchResponse(
+        results=results,
+        committed=committed,
+        succeeded=succeeded,
+        failed=len(results) - succeeded
+    )
+
+
+def _task_batch_response(session: Session, task_ids: List[int]) -> TaskBatchResponse:
+    """Fetch tasks by ID and mark the ones that do not exist"""
+    tasks = TaskCRUD.get_tasks_by_ids(session, task_ids)
+    return TaskBatchResponse(
+        tasks=[TaskResponse.from_orm(task) if task is not None else None for task in tasks],
+        missing_ids=[task_id for task_id, task in zip(task_ids, tasks) if task is None]
+    )
+
+
+@router.get("/tasks/batch", response_model=TaskBatchResponse, tags=["Tasks"])
+async def get_tasks_batch(
+    ids: str = Query(..., description="Comma-separated task IDs (up to 1000)"),
+    session: Session = Depends(get_session)
+):
+    """Get many tasks by ID"""
+    try:
+        task_ids = [int(task_id) for task_id in ids.split(",") if task_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not task_ids:
+        raise HTTPException(status_code=400, detail="At least one task ID is required")
+    if len(task_ids) > 1000:
+        raise HTTPException(status_code=400, detail="Maximum 1000 task IDs allowed, use POST /tasks/batch for more")
+
+    try:
+        return _task_batch_response(session, task_ids)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve tasks: {str(e)}")
+
+
+@router.post("/tasks/batch", response_model=TaskBatchResponse, tags=["Tasks"])
+async def post_tasks_batch(
+    batch: TaskBatchRequest,
+    session: Session = Depends(get_session)
+):
+    """Get many tasks by ID, for ID sets too large for a query string"""
+    try:
+        return _task_batch_response(session, batch.ids)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve tasks: {str(e)}")
+
+
 @router.get("/tasks/{task_id}", response_model=TaskResponse, tags=["Tasks"])
 async def get_task(
     task_id: int,
     session: Session = Depends(get_session)
 ):
     """Get a specific task by ID"""
-    task = TaskCRUD.get_task(session, task_id)
+    # Archived tasks stay readable (with archived_at set) but can no longer be changed
+    task = TaskCRUD.get_task(session, task_id) or TaskCRUD.get_archived_task(session, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -247,7 +590,12 @@ async def update_task(
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
     try:
-        updated_task = TaskCRUD.update_task(session, task_id, update_data)
+        if write_pipeline.running:
+            updated_task = await write_pipeline.submit(
+                lambda batch: TaskCRUD.update_task(batch, task_id, update_data, commit=False)
+            )
+        else:
+            updated_task = TaskCRUD.update_task(session, task_id, update_data)
         if not updated_task:
             raise HTTPException(status_code=404, detail="Task not found")
         
@@ -266,4 +614,234 @@ async def delete_task(
     """Delete a task"""
     success = TaskCRUD.delete_task(session, task_id)
     if not success:
-        raise HTTPException(status_code=404, detail="Task not found") 
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Task not found") 
+
+
+def _task_tree_response(session: Session, task_id: int, fetch: Callable[[Session], list]) -> TaskTreeResponse:
+    """Build a subtree/ancestors/blockers response, 404 if the task does not exist"""
+    if TaskCRUD.get_task(session, task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    rows = fetch(session)
+    return TaskTreeResponse(
+        task_id=task_id,
+        tasks=[TaskTreeEntry(depth=depth, task=TaskResponse.from_orm(task)) for depth, task in rows],
+        total=len(rows)
+    )
+
+
+@router.put("/tasks/{task_id}/parent", response_model=TaskResponse, tags=["Task Hierarchy"])
+async def set_task_parent(
+    task_id: int,
+    parent: TaskParentUpdate,
+    session: Session = Depends(get_session)
+):
+    """Move a task, with all of its subtasks, under another task"""
+    try:
+        task = TaskCRUD.set_parent(session, task_id, parent.parent_id)
+    except TaskNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except CycleError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to move task: {str(e)}")
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return TaskResponse.from_orm(task)
+
+
+@router.get("/tasks/{task_id}/subtree", response_model=TaskTreeResponse, tags=["Task Hierarchy"])
+async def get_task_subtree(
+    task_id: int,
+    max_depth: Optional[int] = Query(None, ge=1, description="Only include subtasks up to this many levels down"),
+    session: Session = Depends(get_session)
+):
+    """Get all subtasks of a task, nearest levels first"""
+    return _task_tree_response(session, task_id, lambda s: TaskCRUD.get_subtree(s, task_id, max_depth))
+
+
+@router.get("/tasks/{task_id}/ancestors", response_model=TaskTreeResponse, tags=["Task Hierarchy"])
+async def get_task_ancestors(
+    task_id: int,
+    session: Session = Depends(get_session)
+):
+    """Get the parent, grandparent and so on up to the top-level task"""
+    return _task_tree_response(session, task_id, lambda s: TaskCRUD.get_ancestors(s, task_id))
+
+
+@router.get("/tasks/{task_id}/blockers", response_model=TaskTreeResponse, tags=["Task Hierarchy"])
+async def get_task_blockers(
+    task_id: int,
+    transitive: bool = Query(True, description="Include blockers of blockers"),
+    session: Session = Depends(get_session)
+):
+    """Get the tasks that must be done before this one"""
+    return _task_tree_response(session, task_id, lambda s: TaskCRUD.get_blockers(s, task_id, transitive))
+
+
+@router.post("/tasks/{task_id}/blockers", status_code=204, tags=["Task Hierarchy"])
+async def add_task_blocker(
+    task_id: int,
+    blocker: TaskBlockerCreate,
+    session: Session = Depends(get_session)
+):
+    """Add a task that must be done before this one"""
+    try:
+        added = TaskCRUD.add_blocker(session, task_id, blocker.blocker_id)
+    except CycleError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to add blocker: {str(e)}")
+    if not added:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+
+@router.delete("/tasks/{task_id}/blockers/{blocker_id}", status_code=204, tags=["Task Hierarchy"])
+async def remove_task_blocker(
+    task_id: int,
+    blocker_id: int,
+    session: Session = Depends(get_session)
+):
+    """Remove a blocking task"""
+    if not TaskCRUD.remove_blocker(session, task_id, blocker_id):
+        raise HTTPException(status_code=404, detail="Dependency not found")
+
+
+@router.get("/assignees", response_model=List[AssigneeResponse], tags=["Assignees"])
+async def get_assignees(session: Session = Depends(get_session)):
+    """Get all assignees with the number of tasks assigned to each"""
+    try:
+        return TaskCRUD.get_assignees(session)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve assignees: {str(e)}")
+
+
+@router.get("/tags", response_model=List[TagResponse], tags=["Tags"])
+async def get_tags(session: Session = Depends(get_session)):
+    """Get all tags with the number of tasks carrying each"""
+    try:
+        return TaskCRUD.get_tags(session)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve tags: {str(e)}")
+
+
+async def _submit_job(response: Response, kind: str, params: dict) -> JobResponse:
+    """Queue a background job and point the client at its status URL"""
+    if not job_runner.running:
+        raise HTTPException(status_code=503, detail="Background jobs are not available")
+    try:
+        job = await run_in_threadpool(job_runner.submit, kind, params)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to queue job: {str(e)}")
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return JobResponse.from_orm(job)
+
+
+@router.post("/jobs/bulk-update", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def bulk_update_tasks_job(bulk_update: BulkTaskUpdateJob, response: Response):
+    """Queue a bulk update of any size; poll the returned job for progress"""
+    return await _submit_job(response, "bulk_update", {
+        "task_ids": bulk_update.task_ids,
+        "updates": bulk_update.updates.model_dump(mode="json", exclude_none=True),
+    })
+
+
+@router.post("/jobs/bulk-delete", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def bulk_delete_tasks_job(bulk_delete: BulkTaskDeleteJob, response: Response):
+    """Queue a bulk deletion of any size; poll the returned job for progress"""
+    return await _submit_job(response, "bulk_delete", {"task_ids": bulk_delete.task_ids})
+
+
+@router.post("/jobs/archive", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def archive_tasks_job(request: ArchiveJobRequest, response: Response):
+    """Queue an archiving run for old completed and cancelled tasks"""
+    return await _submit_job(response, "archive", {"older_than_days": request.older_than_days})
+
+
+@router.post("/jobs/compact", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def compact_storage_job(response: Response):
+    """Queue a compaction run that releases every free page, then refreshes planner statistics"""
+    return await _submit_job(response, "compact", {})
+
+
+@router.get("/jobs", response_model=List[JobResponse], tags=["Jobs"])
+async def get_jobs(
+    status: Optional[JobStatus] = Query(None, description="Filter by job status"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs to return")
+):
+    """Get the most recent background jobs"""
+    try:
+        return await run_in_threadpool(job_runner.list, status, limit)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to retrieve jobs: {str(e)}")
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: int):
+    """Get the status and progress of a background job"""
+    job = await run_in_threadpool(job_runner.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse, tags=["Jobs"])
+async def cancel_job(job_id: int):
+    """Cancel a queued or running job; running jobs stop after their current chunk"""
+    job = await run_in_threadpool(job_runner.cancel, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in (JobStatus.succeeded, JobStatus.failed):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status.value}")
+    return job
+
+
+def _require_profiling(x_profile_token: Optional[str] = Header(None)) -> None:
+    """Only serve profiles when profiling is on, and only to holders of the token
+
+    Profiles include SQL text, so without a configured token they are not served at all.
+    """
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.token_matches(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing profiling token")
+
+
+def _get_profile(profile_id: str) -> "profiling.Profile":
+    profile = profiling.profile_store.get(profile_id)
+    if profile is None:
+        # Profiles stay in the worker that served the request (see X-Profile-Worker)
+        raise HTTPException(status_code=404, detail=f"Profile not found in worker {profiling.worker_id()}")
+    return profile
+
+
+@router.get(
+    "/admin/profiles", response_model=List[ProfileSummary],
+    dependencies=[Depends(_require_profiling)], tags=["Admin"]
+)
+async def list_profiles():
+    """Get the most recent request profiles of this process"""
+    return [ProfileSummary.from_orm(profile) for profile in profiling.profile_store.list()]
+
+
+@router.get(
+    "/admin/profiles/{profile_id}", response_model=ProfileResponse,
+    dependencies=[Depends(_require_profiling)], tags=["Admin"]
+)
+async def get_profile(profile_id: str):
+    """Get a request profile with the SQL statements it executed"""
+    return ProfileResponse.from_orm(_get_profile(profile_id))
+
+
+@router.get("/admin/profiles/{profile_id}/collapsed", dependencies=[Depends(_require_profiling)], tags=["Admin"])
+async def get_profile_stacks(profile_id: str):
+    """Get the sampled stacks of a request profile in collapsed format, for speedscope or flamegraph.pl"""
+    return Response(content=_get_profile(profile_id).collapsed(), media_type="text/plain")
+
+
+@router.get("/admin/storage", response_model=StorageStatus, tags=["Admin"])
+async def get_storage_status():
+    """Get the database's free space and the storage maintainer's recent activity"""
+    try:
+        return StorageStatus(**await run_in_threadpool(storage_maintainer.status))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read storage status: {str(e)}")
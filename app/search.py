@@ -0,0 +1,158 @@
+"""Typo-tolerant task search over a trigram index
+
+On SQLite the index is the ``task_trigram`` posting table, kept current at
+commit time from the ids CRUD records as changed. Trigrams follow pg_trgm:
+each lower-cased word padded with two spaces in front and one behind. A task
+matches when it contains at least ``threshold`` of the query's trigrams, found
+by reading only the postings of those trigrams. On PostgreSQL, pg_trgm's
+word similarity and a GIN index over the same text do the work instead.
+"""
+import argparse
+import functools
+import math
+import os
+import re
+import time
+from typing import FrozenSet, Iterable, Optional, Set
+
+from sqlalchemy import bindparam, create_engine, delete, func, insert, literal, select
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session
+
+from .migrations import upgrade
+from .models import Task, TaskTrigram
+
+# Fuzzy search configuration
+TRIGRAM_SIMILARITY_THRESHOLD = float(os.getenv("TRIGRAM_SIMILARITY_THRESHOLD", "0.6"))
+TRIGRAM_INDEX_BATCH_SIZE = int(os.getenv("TRIGRAM_INDEX_BATCH_SIZE", "5000"))
+
+_WORD = re.compile(r"\w+")
+_CHUNK_SIZE = 900  # ids per IN list, below SQLite's bound parameter limit
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_trigrams(word: str) -> FrozenSet[str]:
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Distinct pg_trgm-style trigrams of a text"""
+    grams: Set[str] = set()
+    for word in _WORD.findall((text or "").lower()):
+        grams.update(_word_trigrams(word))
+    return grams
+
+
+def index_tasks(connection: Connection, task_ids: Iterable[int]) -> None:
+    """Bring the postings of these tasks in line with their current text
+
+    Only the difference is written, so a change that leaves title and
+    description alone costs one read of the task's postings. Tasks that no
+    longer exist lose all their postings.
+    """
+    table = TaskTrigram.__table__
+    ids = sorted(set(task_ids))
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        chunk = ids[start:start + _CHUNK_SIZE]
+        wanted = {
+            (gram, task_id)
+            for task_id, title, description in connection.execute(
+                select(Task.id, Task.title, Task.description).where(Task.id.in_(chunk))  # type: ignore
+            )
+            for gram in trigrams(title) | trigrams(description)
+        }
+        existing = set(connection.execute(
+            select(table.c.trigram, table.c.task_id).where(table.c.task_id.in_(chunk))
+        ).all())
+        stale = existing - wanted
+        if stale:
+            connection.execute(
+                delete(table).where(table.c.trigram == bindparam("gram"), table.c.task_id == bindparam("tid")),
+                [{"gram": gram, "tid": task_id} for gram, task_id in stale]
+            )
+        new = wanted - existing
+        if new:
+            connection.execute(insert(table), [{"trigram": gram, "task_id": task_id} for gram, task_id in new])
+
+
+def rebuild_trigram_index(bind: Engine, batch_size: int = TRIGRAM_INDEX_BATCH_SIZE) -> int:
+    """Re-index every task from scratch, one transaction per id range; returns the number of tasks
+
+    Postings go through one DBAPI executemany per range, in primary key
+    order, skipping per-row statement handling.
+    """
+    with bind.begin() as conn:
+        conn.execute(delete(TaskTrigram.__table__))
+        bounds = conn.execute(select(func.min(Task.id), func.max(Task.id))).first()
+    if not bounds or bounds[0] is None:
+        return 0
+
+    indexed = 0
+    low, high = bounds
+    for start in range(low, high + 1, batch_size):
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(Task.id, Task.title, Task.description)
+                .where(Task.id >= start, Task.id < start + batch_size)  # type: ignore
+            ).all()
+            postings = sorted(
+                (gram, task_id)
+                for task_id, title, description in rows
+                for gram in trigrams(title) | trigrams(description)
+            )
+            if postings:
+                conn.exec_driver_sql("INSERT INTO task_trigram (trigram, task_id) VALUES (?, ?)", postings)
+        indexed += len(rows)
+    return indexed
+
+
+def fuzzy_matches(session: Session, search_term: str, threshold: float = TRIGRAM_SIMILARITY_THRESHOLD):
+    """Subquery of (task_id, score) for tasks similar to the search term; None when it has no trigrams
+
+    The score is the fraction of the term's trigrams found in the task's title
+    or description, which tolerates typos and ignores text around the match.
+    """
+    if session.connection().dialect.name == "postgresql":
+        document = Task.title + " " + func.coalesce(Task.description, "")
+        # <% compares against this setting and is what the GIN index can answer
+        session.exec(select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True)))
+        return (
+            select(Task.id.label("task_id"), func.word_similarity(search_term, document).label("score"))  # type: ignore
+            .where(literal(search_term).op("<%")(document))
+            .subquery()
+        )
+
+    grams = trigrams(search_term)
+    if not grams:
+        return None
+    shared = func.count()
+    # Sharing fewer trigrams than this cannot reach the threshold; HAVING drops those tasks before any join
+    needed = max(1, math.ceil(threshold * len(grams) - 1e-9))
+    return (
+        select(TaskTrigram.task_id.label("task_id"), (shared * 1.0 / len(grams)).label("score"))  # type: ignore
+        .where(TaskTrigram.trigram.in_(sorted(grams)))  # type: ignore
+        .group_by(TaskTrigram.task_id)
+        .having(shared >= needed)
+        .subquery()
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the trigram index used by fuzzy task search")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./task_management.db"))
+    parser.add_argument("--batch-size", type=int, default=TRIGRAM_INDEX_BATCH_SIZE, help="Tasks indexed per transaction")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    upgrade(engine)
+    if engine.dialect.name == "postgresql":
+        print("✅ PostgreSQL uses the pg_trgm index; nothing to rebuild")
+        return
+    start = time.perf_counter()
+    indexed = rebuild_trigram_index(engine, args.batch_size)
+    print(f"✅ Indexed {indexed:,} tasks in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
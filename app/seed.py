@@ -0,0 +1,335 @@
+"""
+Synthetic data generator for benchmarking and capacity planning
+
+Usage:
+    python -m app.seed --rows 5000000
+    python -m app.seed --rows 100000 --status pending=50,in_progress=20,completed=25,cancelled=5
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from sqlalchemy import MetaData, Table, delete, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import create_engine
+
+from .migrations import upgrade
+from .models import (
+    ArchivedTask, Assignee, Tag, Task, TaskClosure, TaskDependency, TaskPriority, TaskStatus, TaskTag, TaskTrigram
+)
+from .search import rebuild_trigram_index
+
+WORDS = [
+    "api", "database", "frontend", "backend", "deploy", "review", "refactor", "release",
+    "testing", "documentation", "authentication", "migration", "cache", "search", "report",
+    "dashboard", "invoice", "export", "import", "onboarding", "billing", "payment", "mobile",
+    "android", "ios", "design", "prototype", "research", "customer", "support", "incident",
+    "monitoring", "alerting", "metrics", "logging", "security", "audit", "compliance", "backup",
+    "restore", "performance", "latency", "throughput", "index", "query", "schema", "cleanup",
+    "sprint", "roadmap", "planning", "estimate", "meeting", "feedback", "bug", "fix", "feature",
+]
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy",
+    "Mallory", "Niaj", "Olivia", "Peggy", "Rupert", "Sybil", "Trent", "Victor", "Walter", "Yara",
+]
+LAST_NAMES = [
+    "Anderson", "Brown", "Chen", "Davis", "Evans", "Garcia", "Hughes", "Ivanova", "Johnson", "Kim",
+    "Lopez", "Martin", "Nguyen", "Okafor", "Patel", "Quinn", "Rossi", "Smith", "Tanaka", "Wilson",
+]
+
+
+class SeedConfig(BaseModel):
+    """Shape of the generated dataset"""
+    rows: int = Field(1_000_000, ge=1, description="Number of tasks to generate")
+    batch_size: int = Field(50_000, ge=1, description="Rows per INSERT batch and transaction")
+    seed: int = Field(42, description="Random seed; equal seeds produce identical datasets")
+    status_weights: Dict[TaskStatus, float] = Field(
+        default={TaskStatus.pending: 30, TaskStatus.in_progress: 15, TaskStatus.completed: 45, TaskStatus.cancelled: 10}
+    )
+    priority_weights: Dict[TaskPriority, float] = Field(
+        default={TaskPriority.low: 25, TaskPriority.medium: 45, TaskPriority.high: 22, TaskPriority.urgent: 8}
+    )
+    assignees: int = Field(500, ge=1, description="Number of distinct assignees")
+    assignee_skew: float = Field(1.0, ge=0, description="Zipf exponent of the assignee distribution (0 = uniform)")
+    unassigned_ratio: float = Field(0.1, ge=0, le=1, description="Fraction of tasks without an assignee")
+    due_ratio: float = Field(0.7, ge=0, le=1, description="Fraction of tasks with a due date")
+    created_days: int = Field(365, ge=1, description="created_at is spread over this many past days")
+    due_days: Tuple[int, int] = Field((1, 90), description="Due date offset range from created_at, in days")
+    title_words: Tuple[int, int] = Field((2, 8), description="Title length range, in words")
+    description_words: Tuple[int, int] = Field((0, 60), description="Description length range, in words")
+    description_ratio: float = Field(0.8, ge=0, le=1, description="Fraction of tasks with a description")
+
+
+def assignee_names(count: int) -> List[str]:
+    """Deterministic, distinct assignee names"""
+    names = []
+    for index in range(count):
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        suffix = index // (len(FIRST_NAMES) * len(LAST_NAMES))
+        names.append(f"{first} {last}" + (f" {suffix + 1}" if suffix else ""))
+    return names
+
+
+TEXT_POOL_SIZE = 8192
+
+
+def _text_pool(rng: random.Random, words: Tuple[int, int], max_length: int) -> List[str]:
+    """Pre-generate texts; sampling from a pool is much cheaper than composing every row"""
+    low, high = words
+    return [" ".join(rng.choices(WORDS, k=rng.randint(low, high)))[:max_length] for _ in range(TEXT_POOL_SIZE)]
+
+
+def generate_batches(config: SeedConfig) -> Iterator[List[dict]]:
+    """Yield lists of task rows following the configured distributions"""
+    rng = random.Random(config.seed)
+    statuses = list(config.status_weights)
+    status_weights = list(config.status_weights.values())
+    priorities = list(config.priority_weights)
+    priority_weights = list(config.priority_weights.values())
+    names = assignee_names(config.assignees)
+    name_weights = [1 / (rank + 1) ** config.assignee_skew for rank in range(len(names))]
+
+    titles = [title.capitalize() or "Untitled" for title in _text_pool(rng, config.title_words, 200)]
+    descriptions = _text_pool(rng, config.description_words, 1000)
+
+    now = datetime.now(timezone.utc)
+    created_span = config.created_days * 86_400
+    due_low, due_high = (days * 86_400 for days in config.due_days)
+    due_span = due_high - due_low
+
+    remaining = config.rows
+    while remaining > 0:
+        count = min(config.batch_size, remaining)
+        remaining -= count
+
+        # Sample whole columns at once; choices() with weights is far cheaper per batch than per row
+        batch_statuses = rng.choices(statuses, weights=status_weights, k=count)
+        batch_priorities = rng.choices(priorities, weights=priority_weights, k=count)
+        batch_assignees = rng.choices(names, weights=name_weights, k=count)
+
+        batch_titles = rng.choices(titles, k=count)
+        batch_descriptions = rng.choices(descriptions, k=count)
+
+        rows = []
+        random_ = rng.random
+        for status, priority, assignee, title, description in zip(
+            batch_statuses, batch_priorities, batch_assignees, batch_titles, batch_descriptions
+        ):
+            created_at = now - timedelta(seconds=int(random_() * created_span))
+            due_date = None
+            if random_() < config.due_ratio:
+                due_date = created_at + timedelta(seconds=due_low + int(random_() * due_span))
+            updated_at = None
+            if status != TaskStatus.pending:
+                updated_at = min(now, created_at + timedelta(seconds=int(random_() * created_span / 4)))
+            rows.append({
+                "title": title,
+                "description": description if random_() < config.description_ratio else None,
+                "status": status,
+                "priority": priority,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "due_date": due_date,
+                "assigned_to": None if random_() < config.unassigned_ratio else assignee,
+            })
+        yield rows
+
+
+def _tune_for_bulk_load(conn: Connection) -> None:
+    """Relax durability for the loading connection only"""
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        conn.exec_driver_sql("PRAGMA temp_store=MEMORY")
+        conn.exec_driver_sql("PRAGMA cache_size=-262144")
+        conn.commit()
+
+
+def _row_writer(conn: Connection) -> Callable[[List[dict]], None]:
+    """Build a batch writer issuing one DBAPI executemany per batch
+
+    Values go through each column type's own bind processor, so the stored
+    representation matches what the ORM would write, without per-row statement
+    compilation overhead.
+    """
+    columns = [column for column in Task.__table__.columns if not column.primary_key]
+    paramstyle = conn.dialect.paramstyle
+    if paramstyle not in ("qmark", "format", "pyformat"):
+        def write_with_core(rows: List[dict]) -> None:
+            conn.execute(insert(Task), rows)
+        return write_with_core
+
+    marker = "?" if paramstyle == "qmark" else "%s"
+    sql = (
+        f"INSERT INTO {Task.__tablename__} ({', '.join(column.name for column in columns)}) "
+        f"VALUES ({', '.join(marker for _ in columns)})"
+    )
+    dialect = conn.dialect
+    converters = [(column.name, column.type.dialect_impl(dialect).bind_processor(dialect)) for column in columns]
+
+    def write(rows: List[dict]) -> None:
+        conn.exec_driver_sql(sql, [
+            tuple(process(row.get(name)) if process else row.get(name) for name, process in converters)
+            for row in rows
+        ])
+
+    return write
+
+
+def _assignee_resolver(conn: Connection) -> Callable[[List[dict]], None]:
+    """Build a batch step replacing assigned_to names by assignee ids, creating new assignees"""
+    ids: Dict[str, int] = dict(conn.execute(select(Assignee.name, Assignee.id)).all())  # type: ignore
+
+    def resolve(rows: List[dict]) -> None:
+        new_names = {row["assigned_to"] for row in rows if row["assigned_to"] is not None} - ids.keys()
+        if new_names:
+            conn.execute(insert(Assignee), [{"name": name, "task_count": 0} for name in sorted(new_names)])
+            ids.update(conn.execute(
+                select(Assignee.name, Assignee.id).where(Assignee.name.in_(new_names))  # type: ignore
+            ).all())
+        for row in rows:
+            name = row.pop("assigned_to")
+            row["assignee_id"] = ids[name] if name is not None else None
+
+    return resolve
+
+
+def _drop_secondary_indexes(engine: Engine) -> List:
+    """Drop the task table's secondary indexes and return their reflected definitions"""
+    table = Table(Task.__tablename__, MetaData(), autoload_with=engine)
+    indexes = list(table.indexes)
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+    return indexes
+
+
+def seed_tasks(
+    engine: Engine,
+    config: SeedConfig,
+    truncate: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+    index_trigrams: bool = True
+) -> int:
+    """Bulk load generated tasks, deferring index builds until the data is in place
+
+    Rows bypass the ORM, so the fuzzy search trigram index is rebuilt
+    afterwards unless ``index_trigrams`` is off.
+    """
+    upgrade(engine)
+
+    if truncate:
+        with engine.begin() as conn:
+            # Rows referring to tasks go first: left behind, they would attach to the newly seeded tasks
+            conn.execute(delete(TaskTag))
+            conn.execute(delete(TaskTrigram))
+            conn.execute(delete(TaskClosure))
+            conn.execute(delete(TaskDependency))
+            conn.execute(delete(Task))
+            conn.execute(delete(ArchivedTask))
+            conn.execute(update(Tag).values(task_count=0))
+
+    indexes = _drop_secondary_indexes(engine)
+    inserted = 0
+    try:
+        with engine.connect() as conn:
+            _tune_for_bulk_load(conn)
+            resolve_assignees = _assignee_resolver(conn)
+            conn.commit()
+            write = _row_writer(conn)
+            for rows in generate_batches(config):
+                # One transaction per batch: large enough to amortize commits, small enough to bound the journal
+                with conn.begin():
+                    resolve_assignees(rows)
+                    write(rows)
+                inserted += len(rows)
+                if progress:
+                    progress(inserted)
+    finally:
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(conn)
+            conn.execute(text(
+                "UPDATE assignee SET task_count = (SELECT count(*) FROM task WHERE task.assignee_id = assignee.id)"
+            ))
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql("ANALYZE")
+    if index_trigrams and engine.dialect.name == "sqlite":
+        rebuild_trigram_index(engine)
+    return inserted
+
+
+def _weights(enum_cls):
+    def parse(value: str) -> Dict:
+        weights = {}
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            weights[enum_cls(name.strip())] = float(weight)
+        return weights
+    return parse
+
+
+def _range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic tasks for benchmarking")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of tasks to generate")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./task_management.db"))
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per batch/transaction")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--truncate", action="store_true", help="Delete existing tasks first")
+    parser.add_argument("--skip-trigram-index", action="store_true", help="Leave fuzzy search unindexed")
+    parser.add_argument("--status", type=_weights(TaskStatus), help="Status weights, e.g. pending=30,completed=70")
+    parser.add_argument("--priority", type=_weights(TaskPriority), help="Priority weights, e.g. low=1,urgent=1")
+    parser.add_argument("--assignees", type=int, default=500, help="Number of distinct assignees")
+    parser.add_argument("--assignee-skew", type=float, default=1.0, help="Zipf exponent (0 = uniform)")
+    parser.add_argument("--unassigned-ratio", type=float, default=0.1, help="Fraction of unassigned tasks")
+    parser.add_argument("--due-ratio", type=float, default=0.7, help="Fraction of tasks with a due date")
+    parser.add_argument("--created-days", type=int, default=365, help="Spread of created_at into the past")
+    parser.add_argument("--due-days", type=_range, default=(1, 90), help="Due date offset range, e.g. 1-90")
+    parser.add_argument("--title-words", type=_range, default=(2, 8), help="Title length range, e.g. 2-8")
+    parser.add_argument("--description-words", type=_range, default=(0, 60), help="Description length range")
+    args = parser.parse_args(argv)
+
+    options = {
+        "rows": args.rows,
+        "batch_size": args.batch_size,
+        "seed": args.seed,
+        "assignees": args.assignees,
+        "assignee_skew": args.assignee_skew,
+        "unassigned_ratio": args.unassigned_ratio,
+        "due_ratio": args.due_ratio,
+        "created_days": args.created_days,
+        "due_days": args.due_days,
+        "title_words": args.title_words,
+        "description_words": args.description_words,
+    }
+    if args.status:
+        options["status_weights"] = args.status
+    if args.priority:
+        options["priority_weights"] = args.priority
+    config = SeedConfig(**options)
+
+    engine = create_engine(args.database_url)
+    start = time.perf_counter()
+
+    def report(inserted: int):
+        elapsed = time.perf_counter() - start
+        print(f"  {inserted:>12,} rows  {inserted / elapsed:>10,.0f} rows/s", flush=True)
+
+    print(f"🔄 Seeding {config.rows:,} tasks into {args.database_url}...")
+    inserted = seed_tasks(
+        engine, config, truncate=args.truncate, progress=report, index_trigrams=not args.skip_trigram_index
+    )
+    print(f"✅ Inserted {inserted:,} tasks in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Production entry point: pre-fork multi-worker server
+
+The supervisor applies pending migrations, binds the listening socket and forks
+the workers, which share the socket and nothing else. The supervisor never
+imports the application: each worker imports it after the fork, and migrations
+run in a child process, so a reload starts workers on the code and schema
+currently deployed.
+
+Usage:
+    python -m app.server --workers 8 --port 8000
+
+Signals (sent to the supervisor):
+    SIGHUP           graceful reload: migrate, start a fresh set of workers on the deployed code, then drain the old ones
+    SIGTERM/SIGINT   graceful shutdown
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import uvicorn
+
+logger = logging.getLogger("app.server")
+
+
+def default_workers() -> int:
+    """Worker count from WEB_CONCURRENCY, defaulting to the number of cores"""
+    return int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Create the listening socket shared by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+APP = "app.main:app"
+
+
+def prepare_schema() -> None:
+    """Apply pending migrations before a generation of workers starts
+
+    Runs the migration CLI in a child process so that the supervisor itself
+    never imports application code, which its forks would inherit. Raises
+    CalledProcessError if the migrations fail.
+    """
+    subprocess.run([sys.executable, "-m", "app.migrations", "upgrade"], check=True)
+    os.environ["SCHEMA_INITIALIZED"] = "1"
+
+
+class Supervisor:
+    """Forks, monitors, reloads and stops worker processes"""
+
+    def __init__(self, app: str, sock: socket.socket, workers: int, config: dict, graceful_timeout: int):
+        self.app = app
+        self.sock = sock
+        self.worker_count = workers
+        self.config = config
+        self.graceful_timeout = graceful_timeout
+        self.workers: Dict[int, int] = {}  # pid -> generation
+        self.generation = 0
+        self.stopping = False
+        self.pending_signals: List[int] = []
+
+    def spawn_worker(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return pid
+
+        # Worker process: restore default signal handling before uvicorn installs its own
+        for signum in (signal.SIGHUP, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            # Imported here, after the fork, so every generation runs the code on disk
+            server = uvicorn.Server(uvicorn.Config(
+                self.app,
+                timeout_graceful_shutdown=self.graceful_timeout,
+                **self.config,
+            ))
+            server.run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def spawn_generation(self) -> None:
+        self.generation += 1
+        for _ in range(self.worker_count):
+            self.spawn_worker()
+        logger.info("Started %d workers (generation %d)", self.worker_count, self.generation)
+
+    def stop_workers(self, pids: List[int]) -> None:
+        """Ask workers to finish in-flight requests and exit; kill stragglers after the timeout"""
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while any(pid in self.workers for pid in pids) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in pids:
+            if pid in self.workers:
+                logger.warning("Worker %s did not stop in time, killing it", pid)
+                self._signal(pid, signal.SIGKILL)
+        while any(pid in self.workers for pid in pids):
+            self.reap()
+            time.sleep(0.05)
+
+    def reap(self) -> None:
+        """Collect exited workers, replacing those of the current generation"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.workers.pop(pid, None)
+            if not self.stopping and generation == self.generation:
+                logger.warning("Worker %s exited unexpectedly (status %s), restarting", pid, status)
+                self.spawn_worker()
+
+    def reload(self) -> None:
+        """Migrate and start a fresh generation first so capacity never drops, then drain the old one
+
+        If the migrations fail, the current workers keep serving.
+        """
+        try:
+            prepare_schema()
+        except subprocess.CalledProcessError:
+            logger.error("Migrations failed, keeping the current workers")
+            return
+        old = list(self.workers)
+        self.spawn_generation()
+        self.stop_workers(old)
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def _on_signal(self, signum, frame):
+        self.pending_signals.append(signum)
+
+    def run(self) -> None:
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+        self.spawn_generation()
+        while True:
+            while self.pending_signals:
+                signum = self.pending_signals.pop(0)
+                if signum == signal.SIGHUP:
+                    logger.info("Reloading workers")
+                    self.reload()
+                elif signum in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("Shutting down %d workers", len(self.workers))
+                    self.stopping = True
+                    self.stop_workers(list(self.workers))
+                    return
+            self.reap()
+            time.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Task Management API with multiple workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY or the number of cores)")
+    parser.add_argument("--backlog", type=int, default=2048, help="Listen backlog")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="Seconds a worker may spend draining requests on reload/shutdown")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(process)d] %(message)s")
+
+    prepare_schema()
+    config = {"log_level": args.log_level, "proxy_headers": True, "backlog": args.backlog}
+
+    if args.workers <= 1 or not hasattr(os, "fork"):
+        # Platforms without fork() (or a single worker) run the server in-process
+        uvicorn.run(APP, host=args.host, port=args.port, **config)
+        return
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    # Lets per-process caches such as the columnar store know they only see part of the writes
+    os.environ["SERVER_WORKERS"] = str(args.workers)
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    Supervisor(APP, sock, args.workers, config, args.graceful_timeout).run()
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Single-flight request coalescing: concurrent identical reads share one execution"""
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from .metrics import Counter
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced read calls by whether they executed (leader) or joined a running call (shared)",
+    ("group", "outcome"),
+)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A running execution and the number of callers still waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls with the same key
+
+    The first caller starts the work as a separate task; callers arriving while
+    it runs await the same task and receive the same result (or exception).
+    The work is detached from any single caller, so one client going away does
+    not fail the others; it is cancelled only once every caller has gone.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(work()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            SINGLEFLIGHT_CALLS.inc(self.group, "leader")
+        else:
+            SINGLEFLIGHT_CALLS.inc(self.group, "shared")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Mark the exception as retrieved even if every caller has gone away
+            call.task.exception()
@@ -0,0 +1,164 @@
+"""Group-commit write pipeline: concurrent mutations share one transaction"""
+import asyncio
+import logging
+import os
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from .database import begin_explicit, engine
+from .metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Write pipeline configuration
+WRITE_PIPELINE_ENABLED = os.getenv("WRITE_PIPELINE_ENABLED", "false").lower() in ("1", "true", "yes")
+WRITE_PIPELINE_MAX_BATCH = int(os.getenv("WRITE_PIPELINE_MAX_BATCH", "256"))
+WRITE_PIPELINE_MAX_DELAY_MS = float(os.getenv("WRITE_PIPELINE_MAX_DELAY_MS", "2"))
+
+WRITE_BATCH_SIZE = Histogram(
+    "write_pipeline_batch_size",
+    "Mutations committed per group-commit transaction",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+WRITE_BATCH_FALLBACKS = Counter(
+    "write_pipeline_fallbacks_total",
+    "Batches whose commit failed and were retried one mutation per transaction",
+)
+
+T = TypeVar("T")
+Operation = Callable[[Session], Any]
+
+
+class WritePipeline:
+    """Single writer that batches pending mutations into one transaction
+
+    Route handlers submit operations, callables taking a session that perform
+    their change and flush without committing (e.g. ``TaskCRUD.create_task(...,
+    commit=False)``). The writer drains whatever is pending, waits up to
+    ``max_delay`` for more, runs the batch in one session and commits once.
+    Each operation runs in its own savepoint, so one that fails only rolls
+    back its own changes and fails its own caller while the rest still commit
+    together. Only if the commit itself fails are the successful operations
+    retried one transaction each.
+    """
+
+    def __init__(self, bind: Engine, max_batch: int = WRITE_PIPELINE_MAX_BATCH,
+                 max_delay: float = WRITE_PIPELINE_MAX_DELAY_MS / 1000):
+        self.bind = bind
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Commit everything already submitted, then stop the writer"""
+        if not self.running or self._queue is None or self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    async def submit(self, operation: Callable[[Session], T]) -> T:
+        """Queue an operation and wait until the transaction containing it commits"""
+        if not self.running or self._queue is None:
+            raise RuntimeError("Write pipeline is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            stopping = self._drain(batch)
+            if not stopping and len(batch) < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                stopping = self._drain(batch)
+
+            operations = [operation for operation, _ in batch]
+            try:
+                outcomes = await run_in_threadpool(self._execute, operations)
+            except Exception as exc:  # pragma: no cover - _execute reports per operation
+                outcomes = [(False, exc)] * len(batch)
+
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _drain(self, batch: List) -> bool:
+        """Move pending submissions into the batch; True when the stop sentinel was seen"""
+        assert self._queue is not None
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _execute(self, operations: List[Operation]) -> List[Tuple[bool, Any]]:
+        WRITE_BATCH_SIZE.observe(len(operations))
+        with Session(self.bind, expire_on_commit=False) as session:
+            begin_explicit(session)
+            outcomes: List[Tuple[bool, Any]] = []
+            for operation in operations:
+                try:
+                    with session.begin_nested():
+                        result = operation(session)
+                except Exception as exc:
+                    outcomes.append((False, exc))
+                else:
+                    outcomes.append((True, result))
+            try:
+                session.commit()
+                session.expunge_all()
+                return outcomes
+            except Exception as exc:
+                session.rollback()
+                succeeded = sum(ok for ok, _ in outcomes)
+                if succeeded <= 1:
+                    return [(False, exc) if ok else (ok, value) for ok, value in outcomes]
+                logger.warning("Group commit of %d writes failed (%s), retrying individually", succeeded, exc)
+
+        WRITE_BATCH_FALLBACKS.inc()
+        return [
+            self._execute_one(operation) if ok else (ok, value)
+            for operation, (ok, value) in zip(operations, outcomes)
+        ]
+
+    def _execute_one(self, operation: Operation) -> Tuple[bool, Any]:
+        with Session(self.bind, expire_on_commit=False) as session:
+            try:
+                result = operation(session)
+                session.commit()
+                session.expunge_all()
+                return True, result
+            except Exception as exc:
+                session.rollback()
+                return False, exc
+
+
+write_pipeline = WritePipeline(engine)
@@ -0,0 +1,66 @@
+"""
+Benchmark runner for the Task Management API
+
+Usage:
+    python -m benchmarks --sizes 10000,100000 --output results.json
+    python -m benchmarks --suite api --compare results.json
+"""
+import argparse
+import sys
+import tempfile
+
+from . import crud_bench, load
+from .common import compare_results, ensure_dataset, save_results
+
+
+def parse_sizes(value: str):
+    return [int(size.replace("_", "")) for size in value.split(",") if size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task Management API benchmark suite")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10_000, 100_000, 1_000_000],
+                        help="Comma separated dataset sizes (default: 10000,100000,1000000)")
+    parser.add_argument("--suite", choices=["crud", "api", "all"], default="all", help="Which suite to run")
+    parser.add_argument("--data-dir", default=".benchmarks", help="Where seeded datasets are cached")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed repetitions per CRUD benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients for the API suite")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint for the API suite")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write JSON results")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative p50 slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        for size in args.sizes:
+            print(f"🔄 Preparing dataset with {size} tasks...")
+            dataset = ensure_dataset(args.data_dir, size)
+
+            if args.suite in ("crud", "all"):
+                print(f"⏱  CRUD benchmarks @ {size}")
+                results.extend(crud_bench.run(dataset, size, args.repeat, scratch_dir))
+
+            if args.suite in ("api", "all"):
+                print(f"⏱  API load @ {size} (concurrency {args.concurrency})")
+                results.extend(load.run(dataset, size, args.concurrency, args.requests, scratch_dir))
+
+    print(f"\n{'benchmark':<60} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for result in results:
+        label = f"{result['suite']}:{result['name']}@{result['size']}"
+        print(f"{label:<60} {result['p50_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['ops_per_sec']:>10.1f}")
+
+    save_results(args.output, results)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(args.compare, results, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Shared helpers for the benchmark suite: datasets, timing and result files"""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import sqlalchemy
+from sqlmodel import Session, create_engine, func, select
+
+from app.migrations import upgrade
+from app.models import Task
+from app.seed import SeedConfig, assignee_names, seed_tasks
+
+# Fixed seed so every run benchmarks the same dataset
+DATASET_SEED = 20240101
+ASSIGNEES = assignee_names(200)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None) -> Dict[str, float]:
+    """Summarize per-operation latencies (seconds) into milliseconds and throughput"""
+    ordered = sorted(samples)
+    total = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "n": len(ordered),
+        "mean_ms": (sum(ordered) / len(ordered)) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "ops_per_sec": len(ordered) / total if total else 0.0,
+    }
+
+
+def time_operation(
+    operation: Callable[[], object],
+    repeat: int,
+    warmup: int = 2,
+    setup: Optional[Callable[[], object]] = None
+) -> Dict[str, float]:
+    """Run an operation repeatedly and summarize its latency; ``setup`` runs untimed before each call"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        operation()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def dataset_path(directory: str, size: int) -> str:
+    """Path of the cached SQLite dataset for a given size"""
+    return os.path.join(directory, f"bench_{size}.db")
+
+
+def make_engine(path: str):
+    """Create an engine for a benchmark database file"""
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+
+def ensure_dataset(directory: str, size: int) -> str:
+    """Create (or reuse) a seeded SQLite database with `size` tasks"""
+    os.makedirs(directory, exist_ok=True)
+    path = dataset_path(directory, size)
+    if os.path.exists(path):
+        engine = make_engine(path)
+        # Datasets cached by an older checkout are migrated to the current schema
+        upgrade(engine)
+        with Session(engine) as session:
+            existing = session.exec(select(func.count(Task.id))).first()  # type: ignore
+        engine.dispose()
+        if existing == size:
+            return path
+        os.remove(path)
+
+    engine = make_engine(path)
+    # No benchmark runs fuzzy search, and indexing trigrams dominates seeding time at 1M rows
+    seed_tasks(engine, SeedConfig(rows=size, seed=DATASET_SEED, assignees=len(ASSIGNEES)), index_trigrams=False)
+    engine.dispose()
+    return path
+
+
+def environment_info() -> Dict[str, str]:
+    """Describe the environment a result file was produced in"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlalchemy": sqlalchemy.__version__,
+    }
+
+
+def save_results(path: str, results: List[dict]) -> None:
+    """Write benchmark results as JSON"""
+    with open(path, "w") as fh:
+        json.dump({"environment": environment_info(), "results": results}, fh, indent=2)
+
+
+def result_key(result: dict) -> tuple:
+    return (result["suite"], result["name"], result["size"])
+
+
+def compare_results(baseline_path: str, results: List[dict], threshold: float) -> List[str]:
+    """Compare results against a baseline file; return lines describing regressions"""
+    with open(baseline_path) as fh:
+        baseline = {result_key(result): result for result in json.load(fh)["results"]}
+
+    regressions = []
+    print(f"\n{'benchmark':<60} {'base p50':>10} {'new p50':>10} {'change':>8}")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if not previous or not previous["p50_ms"]:
+            continue
+        change = (result["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"]
+        label = f"{result['suite']}:{result['name']}@{result['size']}"
+        marker = " !" if change > threshold else ""
+        print(f"{label:<60} {previous['p50_ms']:>10.3f} {result['p50_ms']:>10.3f} {change:>+7.1%}{marker}")
+        if change > threshold:
+            regressions.append(label)
+    return regressions
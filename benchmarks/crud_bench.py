@@ -0,0 +1,130 @@
+"""Micro-benchmarks for TaskCRUD against seeded datasets"""
+import os
+import random
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from app.crud import TaskCRUD
+from app.models import SortField, SortOrder, Task, TaskPriority, TaskStatus
+
+from .common import ASSIGNEES, DATASET_SEED, make_engine, time_operation
+
+REFERENCE_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def read_cases(size: int) -> List[Tuple[str, Dict]]:
+    """get_tasks/search argument combinations covering filters, sorts and page depth"""
+    return [
+        ("list_default", {}),
+        ("filter_status", {"status": TaskStatus.pending}),
+        ("filter_priority", {"priority": TaskPriority.urgent}),
+        ("filter_assignee", {"assigned_to": ASSIGNEES[7]}),
+        ("filter_status_priority", {"status": TaskStatus.in_progress, "priority": TaskPriority.high}),
+        ("filter_due_range", {
+            "due_date_from": REFERENCE_DATE - timedelta(days=30),
+            "due_date_to": REFERENCE_DATE,
+        }),
+        ("filter_created_range", {
+            "created_from": REFERENCE_DATE - timedelta(days=7),
+            "created_to": REFERENCE_DATE,
+        }),
+        ("sort_title_asc", {"sort_field": SortField.title, "sort_order": SortOrder.asc}),
+        ("sort_priority_desc", {"sort_field": SortField.priority, "sort_order": SortOrder.desc}),
+        ("sort_due_date_asc", {"sort_field": SortField.due_date, "sort_order": SortOrder.asc}),
+        ("sort_assignee_asc", {"sort_field": SortField.assigned_to, "sort_order": SortOrder.asc}),
+        ("page_skip_1000", {"skip": min(1000, size - 100)}),
+        ("page_skip_middle", {"skip": size // 2}),
+        ("page_skip_last", {"skip": max(0, size - 100)}),
+        ("search_common", {"search": "authentication"}),
+        ("search_miss", {"search": "no-such-term"}),
+        ("search_filtered", {"search": "deploy", "status": TaskStatus.pending}),
+    ]
+
+
+def run_reads(session: Session, size: int, repeat: int) -> List[dict]:
+    """Time read paths of TaskCRUD"""
+    results = []
+    for name, kwargs in read_cases(size):
+        stats = time_operation(lambda: TaskCRUD.get_tasks(session, **kwargs), repeat)
+        results.append({"suite": "crud", "name": f"get_tasks:{name}", "size": size, **stats})
+
+    rng = random.Random(DATASET_SEED)
+    stats = time_operation(lambda: TaskCRUD.get_task(session, rng.randint(1, size)), repeat * 10)
+    results.append({"suite": "crud", "name": "get_task", "size": size, **stats})
+
+    stats = time_operation(lambda: TaskCRUD.search_tasks(session, "migration", limit=20), repeat)
+    results.append({"suite": "crud", "name": "search_tasks", "size": size, **stats})
+    return results
+
+
+def run_writes(session: Session, size: int, repeat: int) -> List[dict]:
+    """Time single and bulk write paths of TaskCRUD"""
+    rng = random.Random(DATASET_SEED)
+    due = datetime.now(timezone.utc) + timedelta(days=7)
+
+    def create():
+        TaskCRUD.create_task(session, {
+            "title": "Benchmark task",
+            "description": "Created by the benchmark suite",
+            "priority": TaskPriority.high,
+            "assigned_to": rng.choice(ASSIGNEES),
+            "due_date": due,
+        })
+
+    def update():
+        TaskCRUD.update_task(session, rng.randint(1, size), {"status": rng.choice(list(TaskStatus))})
+
+    def bulk_update():
+        ids = rng.sample(range(1, size + 1), min(100, size))
+        TaskCRUD.bulk_update_tasks(session, ids, {"priority": rng.choice(list(TaskPriority))})
+
+    def delete():
+        # Delete the most recent benchmark-created row so the dataset keeps its shape
+        newest = session.exec(select(func.max(Task.id))).first()  # type: ignore
+        TaskCRUD.delete_task(session, newest)
+
+    doomed: List[int] = []
+
+    def create_doomed():
+        # Throwaway rows for the next bulk delete, created outside the timed region
+        tasks = [TaskCRUD.create_task(session, {"title": "Benchmark task"}, commit=False) for _ in range(100)]
+        session.commit()
+        doomed[:] = [task.id for task in tasks]
+
+    def bulk_delete():
+        TaskCRUD.bulk_delete_tasks(session, doomed)
+
+    operations: List[Tuple[str, Callable[[], object], int, Optional[Callable[[], object]]]] = [
+        ("create_task", create, repeat * 3, None),
+        ("update_task", update, repeat, None),
+        ("bulk_update_tasks:100", bulk_update, repeat, None),
+        ("delete_task", delete, repeat, None),
+        ("bulk_delete_tasks:100", bulk_delete, max(1, repeat // 5), create_doomed),
+    ]
+    results = []
+    for name, operation, count, setup in operations:
+        stats = time_operation(operation, count, warmup=1, setup=setup)
+        results.append({"suite": "crud", "name": name, "size": size, **stats})
+    return results
+
+
+def run(dataset: str, size: int, repeat: int, scratch_dir: str) -> List[dict]:
+    """Run the CRUD micro-benchmarks; writes happen on a scratch copy of the dataset"""
+    engine = make_engine(dataset)
+    with Session(engine) as session:
+        results = run_reads(session, size, repeat)
+    engine.dispose()
+
+    scratch = os.path.join(scratch_dir, f"scratch_{size}.db")
+    shutil.copyfile(dataset, scratch)
+    engine = make_engine(scratch)
+    try:
+        with Session(engine) as session:
+            results.extend(run_writes(session, size, repeat))
+    finally:
+        engine.dispose()
+        os.remove(scratch)
+    return results
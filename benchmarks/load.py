@@ -0,0 +1,203 @@
+"""In-process ASGI load driver: exercises the FastAPI app without a network stack"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from .common import ASSIGNEES, DATASET_SEED, summarize
+
+# (name, method, path builder, body builder)
+Endpoint = Tuple[str, str, Callable[[random.Random, int], str], Optional[Callable[[random.Random], dict]]]
+
+
+def _future_due_date() -> str:
+    return (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+
+
+ENDPOINTS: List[Endpoint] = [
+    ("GET /tasks", "GET", lambda rng, size: "/api/v1/tasks?limit=50", None),
+    ("GET /tasks?filters", "GET", lambda rng, size: "/api/v1/tasks?" + urlencode({
+        "status": rng.choice(["pending", "in_progress"]),
+        "priority": rng.choice(["high", "urgent"]),
+        "limit": 50,
+    }), None),
+    ("GET /tasks?assigned_to", "GET", lambda rng, size: "/api/v1/tasks?" + urlencode({
+        "assigned_to": rng.choice(ASSIGNEES), "sort_field": "due_date", "sort_order": "asc",
+    }), None),
+    ("GET /tasks/{task_id}", "GET", lambda rng, size: f"/api/v1/tasks/{rng.randint(1, size)}", None),
+    ("GET /tasks/search", "GET", lambda rng, size: "/api/v1/tasks/search?" + urlencode({
+        "q": rng.choice(["deploy", "invoice", "migration"]), "limit": 20,
+    }), None),
+    ("POST /tasks", "POST", lambda rng, size: "/api/v1/tasks", lambda rng: {
+        "title": "Load test task",
+        "priority": rng.choice(["low", "medium", "high", "urgent"]),
+        "assigned_to": rng.choice(ASSIGNEES),
+        "due_date": _future_due_date(),
+    }),
+]
+
+
+class ASGIClient:
+    """Minimal HTTP/1.1-over-ASGI client"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, target: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+        path, _, query = target.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query.encode(),
+            "headers": [
+                (b"host", b"benchmark"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        request_sent = False
+        response_done = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+
+        status = 0
+        chunks = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    response_done.set()
+
+        await self.app(scope, receive, send)
+        response_done.set()
+        return status, b"".join(chunks)
+
+    async def lifespan(self):
+        """Run the application's lifespan startup and return a shutdown coroutine"""
+        startup_done = asyncio.Event()
+        shutdown_done = asyncio.Event()
+        queue: asyncio.Queue = asyncio.Queue()
+        await queue.put({"type": "lifespan.startup"})
+
+        async def receive():
+            return await queue.get()
+
+        async def send(message):
+            if message["type"].startswith("lifespan.startup"):
+                startup_done.set()
+            elif message["type"].startswith("lifespan.shutdown"):
+                shutdown_done.set()
+
+        task = asyncio.create_task(self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send))
+        await startup_done.wait()
+
+        async def shutdown():
+            await queue.put({"type": "lifespan.shutdown"})
+            await shutdown_done.wait()
+            await task
+
+        return shutdown
+
+
+async def _drive(client: ASGIClient, endpoint: Endpoint, size: int, concurrency: int, requests: int) -> dict:
+    name, method, build_path, build_body = endpoint
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(worker_id: int):
+        nonlocal remaining, errors
+        rng = random.Random(DATASET_SEED + worker_id)
+        while remaining > 0:
+            remaining -= 1
+            body = build_body(rng) if build_body else None
+            start = time.perf_counter()
+            status, _ = await client.request(method, build_path(rng, size), body)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"name": name, "errors": errors, "concurrency": concurrency, **summarize(latencies, elapsed)}
+
+
+async def _run(size: int, concurrency: int, requests: int) -> List[dict]:
+    from app.main import app
+
+    client = ASGIClient(app)
+    shutdown = await client.lifespan()
+    try:
+        results = []
+        for endpoint in ENDPOINTS:
+            stats = await _drive(client, endpoint, size, concurrency, requests)
+            results.append({"suite": "api", "size": size, **stats})
+        return results
+    finally:
+        await shutdown()
+
+
+def run(dataset: str, size: int, concurrency: int, requests: int, scratch_dir: str) -> List[dict]:
+    """Drive every endpoint in a fresh interpreter against a scratch copy of the dataset"""
+    # The application binds its engine at import time, so each dataset gets its own process
+    scratch = os.path.join(scratch_dir, f"load_{size}.db")
+    shutil.copyfile(dataset, scratch)
+    try:
+        completed = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.load",
+                "--dataset", scratch,
+                "--size", str(size),
+                "--concurrency", str(concurrency),
+                "--requests", str(requests),
+            ],
+            capture_output=True, text=True, check=True,
+        )
+    finally:
+        os.remove(scratch)
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process ASGI load driver")
+    parser.add_argument("--dataset", required=True, help="SQLite database to serve")
+    parser.add_argument("--size", type=int, required=True, help="Number of tasks in the dataset")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent simulated clients")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.dataset}"
+    results = asyncio.run(_run(args.size, args.concurrency, args.requests))
+    json.dump(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.admission import (
+    AdmissionControlMiddleware, ConcurrencyLimiter, Rejected, TokenBucketRateLimiter, classify
+)
+
+
+def make_scope(path, method="GET", client="10.0.0.1"):
+    return {"type": "http", "method": method, "path": path, "headers": [], "client": (client, 1234)}
+
+
+async def call(app, scope):
+    """Invoke an ASGI app and return (status, headers)"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+class TestAdmission:
+    """Test concurrency budgets and rate limits"""
+
+    def test_classify(self):
+        """Test list/search/bulk routes are heavy and single reads are light"""
+        assert classify("GET", "/api/v1/tasks") == "heavy"
+        assert classify("GET", "/api/v1/tasks/search") == "heavy"
+        assert classify("POST", "/api/v1/tasks/bulk-update") == "heavy"
+        assert classify("GET", "/api/v1/tasks/42") == "light"
+        assert classify("POST", "/api/v1/tasks") == "light"
+
+    def test_limiter_queues_then_rejects(self):
+        """Test the bounded queue hands slots over and rejects overflow"""
+        async def scenario():
+            limiter = ConcurrencyLimiter("test", limit=1, max_queue=1, timeout=1.0)
+            await limiter.acquire()
+            queued = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+
+            with pytest.raises(Rejected) as rejected:
+                await limiter.acquire()
+            assert rejected.value.status_code == 503
+
+            limiter.release()
+            await queued
+            assert limiter.in_flight == 1
+            limiter.release()
+            assert limiter.in_flight == 0
+
+        asyncio.run(scenario())
+
+    def test_limiter_queue_timeout(self):
+        """Test waiting requests give up after the queue timeout"""
+        async def scenario():
+            limiter = ConcurrencyLimiter("test", limit=1, max_queue=5, timeout=0.01)
+            await limiter.acquire()
+            with pytest.raises(Rejected):
+                await limiter.acquire()
+            limiter.release()
+            assert limiter.in_flight == 0
+
+        asyncio.run(scenario())
+
+    def test_token_bucket(self):
+        """Test burst allowance, refill and Retry-After estimate"""
+        limiter = TokenBucketRateLimiter(rate=2, burst=2)
+        limiter.check("a", now=0)
+        limiter.check("a", now=0)
+        with pytest.raises(Rejected) as rejected:
+            limiter.check("a", now=0)
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after == pytest.approx(0.5)
+
+        limiter.check("b", now=0)
+        limiter.check("a", now=0.5)
+
+    def test_middleware_sheds_heavy_requests(self):
+        """Test saturated heavy budget returns 503 while light routes still pass"""
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/api/v1/tasks":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def scenario():
+            middleware = AdmissionControlMiddleware(
+                app, budgets={"light": (10, 10), "heavy": (1, 0)}, rate=0, queue_timeout=1.0
+            )
+            slow = asyncio.create_task(call(middleware, make_scope("/api/v1/tasks")))
+            await asyncio.sleep(0)
+
+            status, headers = await call(middleware, make_scope("/api/v1/tasks"))
+            assert status == 503
+            assert b"retry-after" in headers
+
+            status, _ = await call(middleware, make_scope("/api/v1/tasks/1"))
+            assert status == 200
+
+            release.set()
+            assert (await slow)[0] == 200
+
+        asyncio.run(scenario())
+
+    def test_middleware_rate_limits_per_client(self):
+        """Test 429 once a client exhausts its bucket"""
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def scenario():
+            middleware = AdmissionControlMiddleware(app, rate=1, burst=1)
+            assert (await call(middleware, make_scope("/api/v1/tasks/1")))[0] == 200
+            assert (await call(middleware, make_scope("/api/v1/tasks/1")))[0] == 429
+            assert (await call(middleware, make_scope("/api/v1/tasks/1", client="10.0.0.2")))[0] == 200
+            assert (await call(middleware, make_scope("/metrics")))[0] == 200
+
+        asyncio.run(scenario())
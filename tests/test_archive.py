@@ -0,0 +1,169 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.archive import ARCHIVER_LEASE, archive_tasks, run_archiver
+from app.crud import TaskCRUD
+from app.jobs import JobRunner
+from app.leases import acquire_lease, lease_holder
+from app.models import ArchivedTask, JobStatus, Lease, SortField, SortOrder, TaskResponse, TaskStatus
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def create(session, title, status=TaskStatus.pending, age_days=0, **fields):
+    task = TaskCRUD.create_task(session, {"title": title, "status": status, **fields})
+    task.created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+    session.add(task)
+    session.commit()
+    return task.id
+
+
+class TestArchive:
+    """Test moving old terminal tasks to the archive table"""
+
+    def test_archives_only_old_terminal_leaf_tasks(self):
+        """Test age, status and subtask rules, and that counts and tags follow the move"""
+        engine = make_engine()
+        with Session(engine) as session:
+            old_done = create(session, "Old done", TaskStatus.completed, 90, assigned_to="Ann", tags=["ops"])
+            old_parent = create(session, "Old parent", TaskStatus.cancelled, 90)
+            create(session, "Open child", parent_id=old_parent)
+            create(session, "Recent done", TaskStatus.completed, 1, tags=["ops"])
+            create(session, "Old pending", TaskStatus.pending, 90)
+
+        assert archive_tasks(engine, timedelta(days=30), batch_size=1) == 1
+        assert archive_tasks(engine, timedelta(days=30), batch_size=1) == 0
+
+        with Session(engine) as session:
+            assert TaskCRUD.get_task(session, old_done) is None
+            archived = TaskCRUD.get_archived_task(session, old_done)
+            assert (archived.title, archived.assigned_to, archived.tags) == ("Old done", "Ann", ["ops"])
+            assert archived.archived_at is not None
+            assert TaskResponse.from_orm(archived).archived_at is not None
+            assert {assignee.name: assignee.task_count for assignee in TaskCRUD.get_assignees(session)} == {"Ann": 0}
+            assert {tag.name: tag.task_count for tag in TaskCRUD.get_tags(session)} == {"ops": 1}
+            assert TaskCRUD.get_tasks(session)[1] == 4
+
+    def test_include_archived_merges_both_tables(self):
+        """Test filters, ordering and paging across live and archived tasks"""
+        engine = make_engine()
+        with Session(engine) as session:
+            ids = [
+                create(session, f"Task {age}", TaskStatus.completed, age, tags=["x"] if age % 40 == 0 else [])
+                for age in (100, 80, 60, 40, 20, 0)
+            ]
+        assert archive_tasks(engine, timedelta(days=50)) == 3
+
+        with Session(engine) as session:
+            tasks, total = TaskCRUD.get_tasks(
+                session, include_archived=True, sort_field=SortField.created_at, sort_order=SortOrder.asc
+            )
+            assert total == 6
+            assert [task.id for task in tasks] == ids
+            assert [isinstance(task, ArchivedTask) for task in tasks] == [True] * 3 + [False] * 3
+
+            tasks, total = TaskCRUD.get_tasks(session, include_archived=True, tags_all=["x"], skip=1, limit=2)
+            assert total == 3
+            assert [task.title for task in tasks] == ["Task 40", "Task 80"]
+            assert TaskCRUD.get_tasks(session, tags_all=["x"])[1] == 2
+
+    def test_archived_ids_are_never_reused(self):
+        """Test a task created after archiving and deleting the newest tasks gets a fresh id"""
+        engine = make_engine()
+        with Session(engine) as session:
+            ids = [create(session, f"Task {i}", TaskStatus.completed, 90) for i in range(4)]
+            newest = create(session, "Newest", TaskStatus.pending)
+        assert archive_tasks(engine, timedelta(days=30)) == 4
+
+        with Session(engine) as session:
+            TaskCRUD.delete_task(session, newest)
+            created = TaskCRUD.create_task(session, {"title": "Fresh"}).id
+            assert created == newest + 1
+            tasks, total = TaskCRUD.get_tasks(session, include_archived=True)
+            assert sorted(task.id for task in tasks) == ids + [created]
+
+    def test_archiver_runs_in_lease_holder_only(self):
+        """Test the periodic archiver skips its pass while another process holds the lease"""
+        engine = make_engine()
+        with Session(engine) as session:
+            create(session, "Old done", TaskStatus.completed, 90)
+            session.add(Lease(
+                name=ARCHIVER_LEASE, holder="other-host:1", expires_at=datetime.now(timezone.utc) + timedelta(minutes=1)
+            ))
+            session.commit()
+
+        assert run_archiver(engine) == 0
+        assert not acquire_lease(engine, ARCHIVER_LEASE, 60)
+
+        # Once the other worker's lease expires, this one takes over
+        with Session(engine) as session:
+            session.get(Lease, ARCHIVER_LEASE).expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+            session.commit()
+        assert run_archiver(engine) == 1
+        with Session(engine) as session:
+            assert session.get(Lease, ARCHIVER_LEASE).holder == lease_holder()
+
+    def test_concurrent_archive_skips_tasks_already_moved(self, tmp_path):
+        """Test two runs archiving the same tasks at once move each task once, without failing"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            ids = [create(session, f"Old {i}", TaskStatus.completed, 90) for i in range(3)]
+
+        # Hold each run after it reads the tasks, so both read before either writes if they can
+        both_read = threading.Barrier(2, timeout=1)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def wait_after_read(conn, cursor, statement, *args):
+            if statement.lstrip().startswith("SELECT task."):
+                try:
+                    both_read.wait()
+                except threading.BrokenBarrierError:
+                    pass
+
+        def run():
+            with Session(engine) as session:
+                moved.append(TaskCRUD.archive_tasks(session, ids))
+
+        moved = []
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(moved) == [0, 3]
+        with Session(engine) as session:
+            assert len(session.exec(select(ArchivedTask)).all()) == 3
+
+    def test_archive_job_waits_for_the_lease(self, tmp_path):
+        """Test the archive job does not run alongside the archiver of another process"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            create(session, "Old done", TaskStatus.completed, 90)
+            session.add(Lease(
+                name=ARCHIVER_LEASE, holder="other-host:1", expires_at=datetime.now(timezone.utc) + timedelta(minutes=1)
+            ))
+            session.commit()
+
+        runner = JobRunner(engine)
+        runner.start()
+        job = runner.wait(runner.submit("archive", {"older_than_days": 30}).id, timeout=10)
+        runner.stop()
+
+        assert job.status == JobStatus.failed and job.error == "Archiving is already running"
+        with Session(engine) as session:
+            assert session.exec(select(ArchivedTask)).first() is None
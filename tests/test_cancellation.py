@@ -0,0 +1,93 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.cancellation import (
+    ClientDisconnected, QueryCancelled, QueryGuard, StatementTimeout, cancel_on_disconnect, guarded, run_guarded
+)
+
+# Counts to a billion, far longer than any test should wait
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000000) SELECT count(*) FROM c"
+)
+
+
+def make_engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+class TestCancellation:
+    """Test statement timeouts and cancellation of running queries"""
+
+    def test_statement_timeout_interrupts_query(self):
+        """Test a query past its timeout is stopped and the connection is usable afterwards"""
+        engine = make_engine()
+        guard = QueryGuard("test", 0.05)
+        start = time.perf_counter()
+        with Session(engine) as session:
+            with pytest.raises(StatementTimeout):
+                with guarded(session, guard):
+                    session.exec(SLOW_QUERY)
+            assert time.perf_counter() - start < 2
+            # The guard no longer applies once its block has ended
+            assert session.exec(text("SELECT 1")).scalar() == 1
+
+    def test_cancelling_caller_stops_thread_query(self):
+        """Test cancelling the awaiting coroutine interrupts the query in its worker thread"""
+        engine = make_engine()
+        outcome = []
+
+        def work(guard):
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session, guarded(session, guard):
+                    session.exec(SLOW_QUERY)
+            except QueryCancelled:
+                outcome.append(time.perf_counter() - start)
+
+        async def scenario():
+            task = asyncio.ensure_future(run_guarded("test", work))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            for _ in range(100):
+                if outcome:
+                    break
+                await asyncio.sleep(0.02)
+
+        asyncio.run(scenario())
+        assert len(outcome) == 1 and outcome[0] < 2
+
+    def test_cancel_on_disconnect(self):
+        """Test work is cancelled when the client disconnects and returned when it finishes first"""
+        async def scenario():
+            disconnected = asyncio.Event()
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            request = SimpleNamespace(receive=receive)
+            assert await cancel_on_disconnect(request, asyncio.sleep(0, "done")) == "done"
+
+            work = asyncio.ensure_future(asyncio.sleep(10))
+            asyncio.get_running_loop().call_later(0.01, disconnected.set)
+            with pytest.raises(ClientDisconnected):
+                await cancel_on_disconnect(request, work)
+            await asyncio.sleep(0)
+            assert work.cancelled()
+
+        asyncio.run(scenario())
@@ -0,0 +1,184 @@
+import itertools
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.crud import TaskCRUD, register_write_hook, unregister_write_hook
+from app.models import FacetField, SortField, SortOrder, TaskPriority, TaskResponse, TaskStatus
+from app.seed import SeedConfig, seed_tasks
+
+pytest.importorskip("numpy")
+
+from app.columnar import ColumnarTaskStore  # noqa: E402
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def ids(result):
+    tasks, total = result
+    return [task.id for task in tasks], total
+
+
+@pytest.fixture
+def engine():
+    engine = make_engine()
+    seed_tasks(engine, SeedConfig(rows=600, batch_size=200, seed=3, assignees=12))
+    return engine
+
+
+class TestColumnarTaskStore:
+    """Test the columnar engine against TaskCRUD.get_tasks"""
+
+    def test_matches_sql_queries(self, engine):
+        """Test filters, sorting and pagination give the same results as SQL"""
+        store = ColumnarTaskStore(engine)
+        store.load()
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            assignee = TaskCRUD.get_tasks(session, limit=1)[0][0].assigned_to
+            filter_sets = [
+                {},
+                {"status": TaskStatus.pending},
+                {"priority": TaskPriority.urgent, "status": TaskStatus.in_progress},
+                {"assigned_to": assignee},
+                {"assigned_to": "nobody"},
+                {"search": "a"},
+                {"search": "e_s%"},
+                {"due_date_from": now, "due_date_to": now + timedelta(days=30)},
+                {"created_from": now - timedelta(days=60), "created_to": now - timedelta(days=10)},
+            ]
+            for filters, sort_field, sort_order in itertools.product(filter_sets, SortField, SortOrder):
+                for skip, limit in ((0, 25), (40, 100)):
+                    query = dict(filters, skip=skip, limit=limit, sort_field=sort_field, sort_order=sort_order)
+                    assert ids(store.get_tasks(**query)) == ids(TaskCRUD.get_tasks(session, **query)), query
+
+    def test_returns_task_values(self, engine):
+        """Test rows are rebuilt with the same field values"""
+        store = ColumnarTaskStore(engine)
+        store.load()
+        with Session(engine) as session:
+            expected = TaskCRUD.get_tasks(session, limit=50)[0]
+            actual = store.get_tasks(limit=50)[0]
+            assert [task.model_dump() for task in actual] == [task.model_dump() for task in expected]
+
+    def test_tag_filters_match_sql(self, engine):
+        """Test tag intersections and unions give the same tasks and tags as SQL"""
+        with Session(engine) as session:
+            task_ids = [task.id for task in TaskCRUD.get_tasks(session, limit=600)[0]]
+            TaskCRUD.bulk_patch_tasks(session, [
+                (task_id, {"tags": [tag for tag, step in (("a", 2), ("b", 3), ("c", 7)) if task_id % step == 0]})
+                for task_id in task_ids
+            ])
+        store = ColumnarTaskStore(engine)
+        store.load()
+        with Session(engine) as session:
+            filter_sets = [
+                {"tags_all": ["a"]},
+                {"tags_all": ["a", "b", "c"]},
+                {"tags_all": ["c", "missing"]},
+                {"tags_any": ["b", "c"]},
+                {"tags_any": ["missing"]},
+                {"tags_all": ["a"], "tags_any": ["b", "c"], "status": TaskStatus.completed},
+            ]
+            for filters in filter_sets:
+                query = dict(filters, limit=1000)
+                expected = TaskCRUD.get_tasks(session, **query)
+                assert ids(store.get_tasks(**query)) == ids(expected), query
+            expected = TaskCRUD.get_tasks(session, tags_any=["c"], limit=20)[0]
+            actual = store.get_tasks(tags_any=["c"], limit=20)[0]
+            assert [TaskResponse.from_orm(task) for task in actual] == [TaskResponse.from_orm(task) for task in expected]
+
+    def test_facets_match_sql(self, engine):
+        """Test facet counts equal the SQL grouping under the same filters"""
+        store = ColumnarTaskStore(engine)
+        store.load()
+        with Session(engine) as session:
+            for filters in ({}, {"status": TaskStatus.pending}, {"search": "a", "priority": TaskPriority.high}):
+                expected = TaskCRUD.get_tasks_with_facets(session, list(FacetField), limit=10, **filters)
+                actual = store.get_tasks_with_facets(list(FacetField), limit=10, **filters)
+                assert [task.id for task in actual[0]] == [task.id for task in expected[0]], filters
+                assert actual[1:] == expected[1:], filters
+
+    def test_write_hooks_keep_store_current(self):
+        """Test creates, updates and deletes are reflected after commit"""
+        engine = make_engine()
+        store = ColumnarTaskStore(engine)
+        store.load()
+        register_write_hook(store.apply_changes)
+        try:
+            with Session(engine) as session:
+                first = TaskCRUD.create_task(session, {"title": "First"})
+                second = TaskCRUD.create_task(session, {"title": "Second"})
+                TaskCRUD.update_task(session, first.id, {"status": TaskStatus.completed, "tags": ["done"]})
+                TaskCRUD.delete_task(session, second.id)
+
+                tasks, total = store.get_tasks()
+                assert total == 1
+                assert (tasks[0].title, tasks[0].status, tasks[0].tags) == ("First", TaskStatus.completed, ["done"])
+                assert store.get_tasks(tags_any=["done"])[1] == 1
+
+                TaskCRUD.create_task(session, {"title": "Rolled back"}, commit=False)
+                session.rollback()
+                assert len(store) == 1
+        finally:
+            unregister_write_hook(store.apply_changes)
+
+    def test_sort_orders_follow_writes(self, engine):
+        """Test cached sort orders are patched on writes, without a re-sort, and still match SQL"""
+        store = ColumnarTaskStore(engine)
+        store.load()
+        register_write_hook(store.apply_changes)
+        try:
+            with Session(engine) as session:
+                for sort_field in SortField:
+                    store.get_tasks(sort_field=sort_field)
+                orders = dict(store._orders)
+                tasks = TaskCRUD.get_tasks(session, limit=30)[0]
+                for task in tasks[:10]:
+                    TaskCRUD.update_task(session, task.id, {
+                        "title": f"Moved {task.id}", "priority": TaskPriority.low, "due_date": None,
+                        "assigned_to": "Zed",
+                    })
+                for task in tasks[10:20]:
+                    TaskCRUD.delete_task(session, task.id)
+                for i in range(10):
+                    TaskCRUD.create_task(session, {"title": f"New {i}", "assigned_to": "Amy" if i % 2 else None})
+
+                store.apply_pending()
+                # Patched in place of the old orders rather than dropped for the next read to sort again
+                assert all(store._orders[sort_field] is not orders[sort_field] for sort_field in SortField)
+                for sort_field, sort_order in itertools.product(SortField, SortOrder):
+                    query = {"sort_field": sort_field, "sort_order": sort_order, "limit": 1000}
+                    assert ids(store.get_tasks(**query)) == ids(TaskCRUD.get_tasks(session, **query)), query
+        finally:
+            unregister_write_hook(store.apply_changes)
+
+    def test_writes_are_applied_off_the_writer_thread(self):
+        """Test the write hook only notes ids and the applier thread reloads them"""
+        engine = make_engine()
+        store = ColumnarTaskStore(engine)
+        store.load()
+        store.start()
+        register_write_hook(store.apply_changes)
+        try:
+            with Session(engine) as session:
+                TaskCRUD.create_task(session, {"title": "Queued"})
+            for _ in range(100):
+                if len(store):
+                    break
+                time.sleep(0.01)
+            assert len(store) == 1
+        finally:
+            unregister_write_hook(store.apply_changes)
+            store.stop()
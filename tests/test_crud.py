@@ -1,10 +1,10 @@
 import pytest
 from datetime import datetime, timezone, timedelta
-from sqlmodel import Session, create_engine
+from sqlmodel import Session, create_engine, select
 from sqlmodel.pool import StaticPool
 
-from app.models import Task, TaskStatus, TaskPriority, SortField, SortOrder
-from app.crud import TaskCRUD
+from app.models import Task, TaskClosure, TaskStatus, TaskPriority, SortField, SortOrder, BatchOperation, FacetField
+from app.crud import CycleError, TaskCRUD, TaskNotFoundError
 
 
 @pytest.fixture
@@ -255,4 +255,262 @@ class TestTaskCRUD:
         tasks, total = TaskCRUD.get_tasks_by_priority(session, TaskPriority.urgent)
         
         assert total == 1
-        assert tasks[0].priority == TaskPriority.urgent 
\ No newline at end of file
+        assert tasks[0].priority == TaskPriority.urgent 
+
+    def test_execute_batch(self, session, sample_tasks):
+        """Test mixed batch operations report per-operation results and commit together"""
+        operations = [
+            BatchOperation(op="create", data={"title": "Batch task"}),
+            BatchOperation(op="update", task_id=sample_tasks[0].id, data={"status": "completed"}),
+            BatchOperation(op="create", data={"title": "  "}),
+            BatchOperation(op="delete", task_id=sample_tasks[1].id),
+            BatchOperation(op="get", task_id=9999),
+        ]
+        outcomes, committed = TaskCRUD.execute_batch(session, operations)
+
+        assert committed
+        assert [status for status, _, _ in outcomes] == [201, 200, 422, 204, 404]
+        assert outcomes[0][1].title == "Batch task"
+        assert outcomes[1][1].status == TaskStatus.completed
+        assert TaskCRUD.get_task(session, outcomes[0][1].id) is not None
+        assert TaskCRUD.get_task(session, sample_tasks[1].id) is None
+
+    def test_execute_batch_atomic_rolls_back(self, session, sample_tasks):
+        """Test an atomic batch is rolled back entirely when one operation fails"""
+        operations = [
+            BatchOperation(op="delete", task_id=sample_tasks[0].id),
+            BatchOperation(op="update", task_id=9999, data={"status": "completed"}),
+            BatchOperation(op="create", data={"title": "Never created"}),
+        ]
+        outcomes, committed = TaskCRUD.execute_batch(session, operations, atomic=True)
+
+        assert not committed
+        assert [status for status, _, _ in outcomes] == [424, 404, 424]
+        assert TaskCRUD.get_task(session, sample_tasks[0].id) is not None
+        _, total = TaskCRUD.get_tasks(session)
+        assert total == len(sample_tasks)
+
+    def test_bulk_patch_tasks(self, session, sample_tasks):
+        """Test per-task changes are applied and missing ids reported"""
+        patches = [
+            (sample_tasks[0].id, {"status": TaskStatus.completed}),
+            (sample_tasks[1].id, {"priority": TaskPriority.urgent, "title": "Renamed"}),
+            (sample_tasks[2].id, {"status": TaskStatus.cancelled}),
+            (9999, {"status": TaskStatus.completed}),
+        ]
+        updated_count, missing_ids = TaskCRUD.bulk_patch_tasks(session, patches)
+
+        assert updated_count == 3
+        assert missing_ids == [9999]
+        assert TaskCRUD.get_task(session, sample_tasks[0].id).status == TaskStatus.completed
+        renamed = TaskCRUD.get_task(session, sample_tasks[1].id)
+        assert (renamed.title, renamed.priority) == ("Renamed", TaskPriority.urgent)
+        assert renamed.updated_at is not None
+        assert TaskCRUD.get_task(session, sample_tasks[2].id).status == TaskStatus.cancelled
+        assert TaskCRUD.get_task(session, sample_tasks[3].id).status == TaskStatus.pending
+
+    def test_get_tasks_by_ids(self, session, sample_tasks):
+        """Test batch fetch keeps request order and marks missing ids"""
+        ids = [sample_tasks[2].id, 9999, sample_tasks[0].id, sample_tasks[2].id]
+        tasks = TaskCRUD.get_tasks_by_ids(session, ids)
+
+        assert [task.id if task else None for task in tasks] == [ids[0], None, ids[2], ids[3]]
+
+    def test_sort_by_priority_uses_rank_order(self, session, sample_tasks):
+        """Test priority sorts by urgency rather than alphabetically"""
+        tasks, _ = TaskCRUD.get_tasks(session, sort_field=SortField.priority, sort_order=SortOrder.desc)
+
+        assert [task.priority for task in tasks] == [
+            TaskPriority.urgent, TaskPriority.high, TaskPriority.medium, TaskPriority.low
+        ]
+
+    def test_assignees_are_interned_with_task_counts(self, session, sample_tasks):
+        """Test assignee names map to shared rows whose task counts follow writes"""
+        def counts():
+            return {assignee.name: assignee.task_count for assignee in TaskCRUD.get_assignees(session)}
+
+        extra = TaskCRUD.create_task(session, {"title": "Review PR", "assigned_to": "John Doe"})
+        assert extra.assignee_id == sample_tasks[0].assignee_id
+        assert counts() == {"Alice Johnson": 1, "Bob Wilson": 1, "Jane Smith": 1, "John Doe": 2}
+
+        TaskCRUD.update_task(session, extra.id, {"assigned_to": "New Hire"})
+        TaskCRUD.bulk_update_tasks(session, [sample_tasks[1].id], {"assigned_to": "New Hire"})
+        TaskCRUD.delete_task(session, sample_tasks[2].id)
+
+        assert counts() == {"Alice Johnson": 1, "Bob Wilson": 0, "Jane Smith": 0, "John Doe": 1, "New Hire": 2}
+        tasks, total = TaskCRUD.get_tasks(session, assigned_to="New Hire")
+        assert total == 2 and {task.assigned_to for task in tasks} == {"New Hire"}
+
+    def test_tags_filters_and_counts(self, session, sample_tasks):
+        """Test tags are stored once, filtered by all/any and counted per tag"""
+        first, second, third, fourth = (task.id for task in sample_tasks)
+        TaskCRUD.update_task(session, first, {"tags": ["backend", "urgent-fix"]})
+        TaskCRUD.update_task(session, second, {"tags": ["backend"]})
+        TaskCRUD.bulk_patch_tasks(session, [
+            (third, {"tags": ["docs", "backend"]}),
+            (fourth, {"status": TaskStatus.completed}),
+        ])
+
+        def matching(**filters):
+            tasks, total = TaskCRUD.get_tasks(session, sort_field=SortField.id, sort_order=SortOrder.asc, **filters)
+            return [task.id for task in tasks]
+
+        assert matching(tags_all=["backend"]) == [first, second, third]
+        assert matching(tags_all=["backend", "urgent-fix"]) == [first]
+        assert matching(tags_all=["backend", "unknown"]) == []
+        assert matching(tags_any=["docs", "urgent-fix", "unknown"]) == [first, third]
+        assert TaskCRUD.get_task(session, third).tags == ["backend", "docs"]
+
+        TaskCRUD.update_task(session, first, {"tags": []})
+        TaskCRUD.delete_task(session, third)
+        assert {tag.name: tag.task_count for tag in TaskCRUD.get_tags(session)} == \
+            {"backend": 1, "docs": 0, "urgent-fix": 0}
+        assert matching(tags_any=["backend", "docs"]) == [second]
+
+    def test_hierarchy_closure_follows_moves_and_deletes(self, session):
+        """Test subtree and ancestor queries after creates, moves and deletes, and cycle rejection"""
+        def create(title, parent=None):
+            return TaskCRUD.create_task(session, {"title": title, "parent_id": parent}).id
+
+        def closure():
+            rows = session.exec(select(TaskClosure)).all()
+            return sorted((row.ancestor_id, row.descendant_id, row.depth) for row in rows)
+
+        def expected_closure():
+            parents = {task.id: task.parent_id for task in session.exec(select(Task)).all()}
+            rows = []
+            for task_id in parents:
+                ancestor, depth = parents[task_id], 1
+                while ancestor is not None:
+                    rows.append((ancestor, task_id, depth))
+                    ancestor, depth = parents[ancestor], depth + 1
+            return sorted(rows)
+
+        epic = create("Epic")
+        story = create("Story", epic)
+        subtask = create("Subtask", story)
+        other = create("Other epic")
+
+        assert [(depth, task.id) for depth, task in TaskCRUD.get_subtree(session, epic)] == [(1, story), (2, subtask)]
+        assert [(depth, task.id) for depth, task in TaskCRUD.get_ancestors(session, subtask)] == [(1, story), (2, epic)]
+
+        TaskCRUD.set_parent(session, story, other)
+        assert TaskCRUD.get_subtree(session, epic) == []
+        assert [task.id for _, task in TaskCRUD.get_subtree(session, other)] == [story, subtask]
+        assert closure() == expected_closure()
+
+        with pytest.raises(CycleError):
+            TaskCRUD.set_parent(session, other, subtask)
+        session.rollback()
+        with pytest.raises(TaskNotFoundError, match="Parent task 9999 not found"):
+            TaskCRUD.set_parent(session, other, 9999)
+        session.rollback()
+
+        TaskCRUD.delete_task(session, story)
+        session.expire_all()
+        assert TaskCRUD.get_task(session, subtask).parent_id == other
+        assert closure() == expected_closure() == [(other, subtask, 1)]
+
+        TaskCRUD.set_parent(session, subtask, None)
+        assert closure() == []
+
+    def test_transitive_blockers_and_cycle_detection(self, session, sample_tasks):
+        """Test blockers of blockers are followed and cyclic dependencies are rejected"""
+        first, second, third, _ = (task.id for task in sample_tasks)
+        assert TaskCRUD.add_blocker(session, first, second)
+        assert TaskCRUD.add_blocker(session, second, third)
+        assert TaskCRUD.add_blocker(session, first, third)
+        assert not TaskCRUD.add_blocker(session, first, 9999)
+
+        assert [(depth, task.id) for depth, task in TaskCRUD.get_blockers(session, first)] == [(1, second), (1, third)]
+        assert [task.id for _, task in TaskCRUD.get_blockers(session, second, transitive=False)] == [third]
+        with pytest.raises(CycleError):
+            TaskCRUD.add_blocker(session, third, first)
+        session.rollback()
+        with pytest.raises(CycleError, match="A task cannot block itself"):
+            TaskCRUD.add_blocker(session, first, first)
+
+        TaskCRUD.delete_task(session, third)
+        assert [task.id for _, task in TaskCRUD.get_blockers(session, first)] == [second]
+        assert TaskCRUD.remove_blocker(session, first, second)
+        assert not TaskCRUD.remove_blocker(session, first, second)
+        assert TaskCRUD.get_blockers(session, first) == []
+
+    def test_claim_tasks_in_priority_order(self, session):
+        """Test claims take unassigned, unblocked pending tasks most urgent first, and never twice"""
+        now = datetime.now(timezone.utc)
+        def create(title, priority, **fields):
+            return TaskCRUD.create_task(session, {"title": title, "priority": priority, **fields}).id
+
+        later = create("Later", TaskPriority.high, due_date=now + timedelta(days=2))
+        sooner = create("Sooner", TaskPriority.high, due_date=now + timedelta(days=1))
+        undated = create("Undated", TaskPriority.high, tags=["ops"])
+        urgent = create("Urgent", TaskPriority.urgent)
+        low = create("Low", TaskPriority.low, tags=["ops"])
+        create("Taken", TaskPriority.urgent, assigned_to="Bob")
+        blocked = create("Blocked", TaskPriority.urgent)
+        TaskCRUD.add_blocker(session, blocked, low)
+
+        claimed = TaskCRUD.claim_tasks(session, "Ann", limit=3)
+        assert [task.id for task in claimed] == [urgent, sooner, later]
+        assert all(task.status == TaskStatus.in_progress and task.assigned_to == "Ann" for task in claimed)
+
+        assert [task.id for task in TaskCRUD.claim_tasks(session, "Cy", tags_all=["ops"])] == [undated]
+        assert TaskCRUD.claim_tasks(session, "Cy", min_priority=TaskPriority.medium) == []
+        assert [task.id for task in TaskCRUD.claim_tasks(session, "Cy", limit=5)] == [low]
+
+        TaskCRUD.update_task(session, low, {"status": TaskStatus.completed})
+        assert [task.id for task in TaskCRUD.claim_tasks(session, "Cy", limit=5)] == [blocked]
+        assert {assignee.name: assignee.task_count for assignee in TaskCRUD.get_assignees(session)} == {
+            "Ann": 3, "Bob": 1, "Cy": 3
+        }
+
+    def test_get_tasks_with_facets(self, session, sample_tasks):
+        """Test facet counts cover every matching task, not just the page"""
+        TaskCRUD.create_task(session, {"title": "Unassigned", "status": TaskStatus.pending})
+        facets = list(FacetField)
+
+        tasks, total, counts = TaskCRUD.get_tasks_with_facets(session, facets, limit=2, search="e")
+        expected_tasks, expected_total = TaskCRUD.get_tasks(session, limit=2, search="e")
+        assert ([task.id for task in tasks], total) == ([task.id for task in expected_tasks], expected_total) == (
+            [task.id for task in expected_tasks], 5
+        )
+        assert [(facet.value, facet.count) for facet in counts["status"]] == [
+            ("pending", 3), ("completed", 1), ("in_progress", 1)
+        ]
+        assert sum(facet.count for facet in counts["priority"]) == 5
+        assert [(facet.value, facet.count) for facet in counts["assigned_to"]][-1] == (None, 1)
+
+        _, total, counts = TaskCRUD.get_tasks_with_facets(session, [FacetField.priority], status=TaskStatus.pending)
+        assert total == 3
+        assert {facet.value: facet.count for facet in counts["priority"]} == {"high": 1, "urgent": 1, "medium": 1}
+        assert TaskCRUD.get_tasks_with_facets(session, facets, tags_all=["missing"]) == (
+            [], 0, {"status": [], "priority": [], "assigned_to": []}
+        )
+
+    def test_calendar_and_deadlines(self, session):
+        """Test due dates are bucketed from the range start and open tasks split into overdue and due soon"""
+        start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        def create(title, due, **fields):
+            return TaskCRUD.create_task(session, {"title": title, "due_date": due, **fields}).id
+
+        first = create("First", start + timedelta(hours=20))
+        second = create("Second", start + timedelta(hours=2), assigned_to="Ann")
+        third = create("Third", start + timedelta(days=2, hours=1), assigned_to="Ann")
+        outside = create("Outside", start + timedelta(days=3))
+        create("Undated", None)
+
+        buckets = TaskCRUD.get_calendar(session, start, start + timedelta(days=3), timedelta(days=1), per_bucket=1)
+        assert [(bucket.start.day, bucket.count) for bucket in buckets] == [(1, 2), (2, 0), (3, 1)]
+        assert [[task.id for task in bucket.tasks] for bucket in buckets] == [[second], [], [third]]
+        assert buckets[0].tasks[0].assigned_to == "Ann"
+
+        weeks = TaskCRUD.get_calendar(session, start, start + timedelta(days=10), timedelta(weeks=1), assigned_to="Ann")
+        assert [(week.count, week.tasks, week.end - week.start) for week in weeks] == [
+            (2, [], timedelta(weeks=1)), (0, [], timedelta(days=3))
+        ]
+
+        TaskCRUD.update_task(session, second, {"status": TaskStatus.completed})
+        deadlines = TaskCRUD.get_deadlines(session, start + timedelta(days=1), timedelta(days=3), limit=5)
+        assert (deadlines["overdue"].count, [task.id for task in deadlines["overdue"].tasks]) == (1, [first])
+        assert (deadlines["due_soon"].count, [task.id for task in deadlines["due_soon"].tasks]) == (2, [third, outside])
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import jobs
+from app.crud import TaskCRUD
+from app.jobs import JOB_KINDS, JobRunner
+from app.models import JobStatus, TaskStatus
+
+
+def make_engine(tmp_path):
+    """A file database, so the runner's threads each get their own connection"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def blocking_kind(monkeypatch, started, release):
+    """Register a job kind that reports progress until released"""
+    def handler(bind, params, context):
+        context.report(0, 2)
+        started.set()
+        release.wait(5)
+        context.report(1)
+        return {"done": True}
+
+    monkeypatch.setitem(JOB_KINDS, "blocking", handler)
+
+
+class TestJobs:
+    """Test the background job runner"""
+
+    def test_bulk_update_runs_in_chunks(self, monkeypatch, tmp_path):
+        """Test a bulk update job applies changes, tracks progress and records its result"""
+        monkeypatch.setattr(jobs, "JOBS_CHUNK_SIZE", 2)
+        engine = make_engine(tmp_path)
+        with Session(engine) as session:
+            ids = [TaskCRUD.create_task(session, {"title": f"Task {i}"}).id for i in range(5)]
+
+        runner = JobRunner(engine)
+        runner.start()
+        job = runner.submit("bulk_update", {"task_ids": ids + [999], "updates": {"status": "completed"}})
+        job = runner.wait(job.id, timeout=5)
+        runner.stop()
+
+        assert job.status == JobStatus.succeeded
+        assert (job.processed, job.total, job.progress) == (6, 6, 100.0)
+        assert job.result == {"updated_count": 5, "total_count": 6}
+        with Session(engine) as session:
+            assert TaskCRUD.get_tasks(session, status=TaskStatus.completed)[1] == 5
+
+    def test_cancel_queued_and_running_jobs(self, monkeypatch, tmp_path):
+        """Test queued jobs are cancelled at once and running jobs at their next report"""
+        started, release = threading.Event(), threading.Event()
+        blocking_kind(monkeypatch, started, release)
+        runner = JobRunner(make_engine(tmp_path), max_workers=1)
+        runner.start()
+
+        running = runner.submit("blocking", {})
+        assert started.wait(5)
+        queued = runner.submit("blocking", {})
+        assert runner.cancel(queued.id).status == JobStatus.cancelled
+        assert runner.cancel(running.id).cancel_requested
+        release.set()
+
+        assert runner.wait(running.id, timeout=5).status == JobStatus.cancelled
+        assert runner.wait(queued.id, timeout=5).started_at is None
+        assert [job.id for job in runner.list(JobStatus.cancelled)] == [queued.id, running.id]
+        runner.stop()
+
+    def test_interrupted_job_is_resumed(self, monkeypatch, tmp_path):
+        """Test a job stopped by shutdown is queued again and rerun on the next start"""
+        started, release = threading.Event(), threading.Event()
+        blocking_kind(monkeypatch, started, release)
+        engine = make_engine(tmp_path)
+        runner = JobRunner(engine)
+        runner.start()
+        job = runner.submit("blocking", {})
+        assert started.wait(5)
+
+        release.set()
+        runner.stop()
+        assert runner.get(job.id).status == JobStatus.queued
+
+        resumed = JobRunner(engine)
+        resumed.start()
+        job = resumed.wait(job.id, timeout=5)
+        resumed.stop()
+        assert (job.status, job.result) == (JobStatus.succeeded, {"done": True})
+
+    def test_live_runner_picks_up_jobs_requeued_elsewhere(self, monkeypatch, tmp_path):
+        """Test a job interrupted after another runner started is polled and run by that runner"""
+        monkeypatch.setattr(jobs, "JOBS_POLL_SECONDS", 0.05)
+        started, release = threading.Event(), threading.Event()
+        blocking_kind(monkeypatch, started, release)
+        engine = make_engine(tmp_path)
+        old = JobRunner(engine)
+        old.start()
+        job = old.submit("blocking", {})
+        assert started.wait(5)
+
+        # A reload starts the new generation before draining the old one
+        new = JobRunner(engine)
+        new.start()
+        release.set()
+        old.stop()
+        assert old.get(job.id).status == JobStatus.queued
+
+        for _ in range(100):
+            job = new.get(job.id)
+            if job.status == JobStatus.succeeded:
+                break
+            time.sleep(0.05)
+        new.stop()
+        assert (job.status, job.result) == (JobStatus.succeeded, {"done": True})
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+
+from app.jobs import JobRunner
+from app.maintenance import MAINTENANCE_LEASE, StorageMaintainer
+from app.migrations import upgrade
+from app.models import JobStatus, Lease
+
+
+def make_engine(tmp_path):
+    """A migrated file database with a bulk of deleted tasks on its freelist"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}", connect_args={"check_same_thread": False})
+    upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3000) "
+            "INSERT INTO task (title, description, status, priority, created_at, updated_at) "
+            "SELECT 'Task ' || i, hex(randomblob(400)), 'pending', 'medium', 0, 0 FROM n"
+        ))
+        conn.execute(text("DELETE FROM task WHERE id % 4 != 0"))
+    return engine
+
+
+class TestMaintenance:
+    """Test free-space reclamation and statistics refreshes"""
+
+    def test_reclaim_releases_free_pages_in_steps(self, tmp_path):
+        """Test a budgeted run stops early and a full run empties the freelist and shrinks the file"""
+        maintainer = StorageMaintainer(make_engine(tmp_path), busy=lambda: False)
+        before = maintainer.status()
+        assert before["auto_vacuum"] == "incremental"
+        assert before["free_ratio"] > 0.5
+
+        assert maintainer.reclaim(budget_seconds=0, step_pages=16) == 16
+        steps = []
+        reclaimed = maintainer.reclaim(
+            budget_seconds=None, step_pages=64, progress=lambda done, total: steps.append(total)
+        )
+        after = maintainer.status()
+
+        assert reclaimed == before["free_pages"] - 16
+        assert steps and set(steps) == {before["free_pages"] - 16}
+        assert after["free_pages"] == 0 and after["size_bytes"] < before["size_bytes"]
+        assert after["reclaimed_pages"] == before["free_pages"] and after["last_vacuum_at"] is not None
+
+    def test_run_once_waits_while_busy(self, tmp_path):
+        """Test a pass only reports while the API is busy, then reclaims and analyzes once it is idle"""
+        busy = [True]
+        maintainer = StorageMaintainer(make_engine(tmp_path), busy=lambda: busy[0])
+
+        maintainer.run_once()
+        assert maintainer.reclaiming and maintainer.reclaimed_pages == 0
+        assert maintainer.last_analyze_at is None
+
+        busy[0] = False
+        maintainer.run_once()
+        assert maintainer.reclaimed_pages > 0 and maintainer.last_analyze_at is not None
+        with maintainer.bind.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM sqlite_stat1")).scalar() > 0
+
+    def test_run_once_only_in_lease_holder(self, tmp_path):
+        """Test a pass does nothing while another worker holds the maintenance lease"""
+        engine = make_engine(tmp_path)
+        with Session(engine) as session:
+            session.add(Lease(
+                name=MAINTENANCE_LEASE, holder="other-host:1",
+                expires_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+            ))
+            session.commit()
+        maintainer = StorageMaintainer(engine, busy=lambda: False)
+
+        assert maintainer.run_once() is None
+        assert maintainer.reclaimed_pages == 0 and maintainer.last_analyze_at is None
+
+    def test_compact_job(self, tmp_path):
+        """Test the compact job releases every free page and reports its progress"""
+        engine = make_engine(tmp_path)
+        free_pages = StorageMaintainer(engine).status()["free_pages"]
+
+        runner = JobRunner(engine)
+        runner.start()
+        job = runner.wait(runner.submit("compact", {}).id, timeout=10)
+        runner.stop()
+
+        assert job.status == JobStatus.succeeded
+        assert (job.processed, job.total) == (free_pages, free_pages)
+        assert job.result["reclaimed_pages"] == free_pages and job.result["free_pages"] == 0
@@ -0,0 +1,65 @@
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app import metrics
+from app.metrics import Counter, Histogram, instrument_engine, normalize_statement
+from app.models import Task
+
+
+class TestMetrics:
+    """Test metric primitives and query instrumentation"""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test histogram exposition output"""
+        histogram = Histogram("test_latency_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        output = histogram.render()
+
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+        assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in output
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+        assert 'test_latency_seconds_count{route="/a"} 3' in output
+
+    def test_counter_requires_declared_labels(self):
+        """Test counters reject mismatched label sets"""
+        counter = Counter("test_events_total", "Test events", ("kind",))
+        counter.inc("a")
+        counter.inc("a", amount=2)
+
+        assert counter.value("a") == 3
+        with pytest.raises(ValueError):
+            counter.inc()
+
+    def test_normalize_statement(self):
+        """Test literals and parameter lists collapse to one statement shape"""
+        first = normalize_statement("SELECT * FROM task WHERE id IN (?, ?, ?) AND title = 'a'")
+        second = normalize_statement("SELECT *  FROM task\nWHERE id IN (?) AND title = 'bb'")
+
+        assert first == second == "SELECT * FROM task WHERE id IN (?) AND title = ?"
+
+    def test_instrument_engine_records_queries(self, monkeypatch):
+        """Test statement timings and slow query counting"""
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(engine)
+        instrument_engine(engine)
+        monkeypatch.setattr(metrics, "SLOW_QUERY_THRESHOLD_MS", 0)
+
+        checkouts = metrics.DB_POOL_CHECKOUT_DURATION.count()
+        with Session(engine) as session:
+            session.exec(select(Task).where(Task.id == 1)).first()
+
+        statement = next(
+            key[0] for key in metrics.DB_QUERY_DURATION._values
+            if key[0].startswith("SELECT task.id") and "WHERE task.id = ?" in key[0]
+        )
+        assert metrics.DB_QUERY_DURATION.count(statement) >= 1
+        assert metrics.DB_SLOW_QUERIES.value(statement) >= 1
+        assert metrics.DB_POOL_CHECKOUT_DURATION.count() > checkouts
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Assignee, Task, TaskPriority, TaskStatus
+from app.migrations import MigrationContext, current_version, history, load_migrations, upgrade
+from app.search import trigrams
+
+
+def make_engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+def describe_schema(engine):
+    """Tables with their column and index names"""
+    inspector = sa.inspect(engine)
+    return {
+        table: (
+            sorted(column["name"] for column in inspector.get_columns(table)),
+            sorted(index["name"] for index in inspector.get_indexes(table)),
+        )
+        for table in inspector.get_table_names()
+        if table != "schema_version"
+    }
+
+
+class TestMigrations:
+    """Test the migration runner and helpers"""
+
+    def test_upgrade_applies_all_revisions_once(self):
+        """Test a fresh database reaches the latest revision and re-runs are no-ops"""
+        engine = make_engine()
+        latest = load_migrations()[-1].revision
+
+        applied = upgrade(engine)
+
+        assert applied == [migration.revision for migration in load_migrations()]
+        assert current_version(engine) == latest
+        assert upgrade(engine) == []
+        assert all(entry["applied_at"] is not None for entry in history(engine))
+
+    def test_upgrade_to_target(self):
+        """Test stopping at an intermediate revision"""
+        engine = make_engine()
+
+        assert upgrade(engine, target=1) == [1]
+        assert current_version(engine) == 1
+
+    def test_migrated_schema_matches_models(self):
+        """Test migrations produce the same tables, columns and indexes as the models"""
+        migrated = make_engine()
+        upgrade(migrated)
+        declared = make_engine()
+        SQLModel.metadata.create_all(declared)
+
+        assert describe_schema(migrated) == describe_schema(declared)
+
+    def test_upgrade_adopts_unmanaged_database(self):
+        """Test a database created by create_all before migrations existed"""
+        engine = make_engine()
+        with engine.begin() as conn:
+            conn.execute(sa.text(
+                "CREATE TABLE task (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, description VARCHAR, "
+                "status VARCHAR(11) NOT NULL, priority VARCHAR(6) NOT NULL, created_at DATETIME NOT NULL, "
+                "updated_at DATETIME, due_date DATETIME, assigned_to VARCHAR)"
+            ))
+            conn.execute(sa.text(
+                "INSERT INTO task (title, status, priority, created_at) "
+                "VALUES ('Existing', 'pending', 'medium', '2024-01-01 00:00:00')"
+            ))
+
+        upgrade(engine)
+
+        with engine.connect() as conn:
+            assert conn.execute(sa.text("SELECT count(*) FROM task")).scalar() == 1
+        assert "ix_task_status_created_at" in {index["name"] for index in sa.inspect(engine).get_indexes("task")}
+
+    def test_compact_columns_convert_existing_rows(self):
+        """Test string enums and datetimes are converted to ranks and UTC epoch microseconds"""
+        engine = make_engine()
+        upgrade(engine, target=2)
+        with engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO task (title, status, priority, created_at, due_date) VALUES "
+                "('Old', 'completed', 'urgent', '2024-01-01 00:00:00.250000', NULL), "
+                "('Older', 'pending', 'low', '2023-06-30 12:30:00', '2024-02-01 08:00:00.000001')"
+            ))
+
+        upgrade(engine)
+
+        with Session(engine) as session:
+            old, older = session.exec(select(Task).order_by(Task.id)).all()
+        assert (old.status, old.priority) == (TaskStatus.completed, TaskPriority.urgent)
+        assert old.created_at == datetime(2024, 1, 1, 0, 0, 0, 250000, tzinfo=timezone.utc)
+        assert old.due_date is None
+        assert (older.status, older.priority) == (TaskStatus.pending, TaskPriority.low)
+        assert older.due_date == datetime(2024, 2, 1, 8, 0, 0, 1, tzinfo=timezone.utc)
+        assert "ix_task_priority" in {index["name"] for index in sa.inspect(engine).get_indexes("task")}
+
+    def test_assignees_are_normalized(self):
+        """Test assignee names move to the assignee table with per-name task counts"""
+        engine = make_engine()
+        upgrade(engine, target=3)
+        with engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO task (title, status, priority, created_at, assigned_to) VALUES "
+                "('A', 0, 1, 0, 'Jane'), ('B', 0, 1, 0, 'Bob'), ('C', 0, 1, 0, 'Jane'), ('D', 0, 1, 0, NULL)"
+            ))
+
+        upgrade(engine)
+
+        with Session(engine) as session:
+            tasks = session.exec(select(Task).order_by(Task.id)).all()
+            assert [task.assigned_to for task in tasks] == ["Jane", "Bob", "Jane", None]
+            assignees = session.exec(select(Assignee).order_by(Assignee.name)).all()
+            assert [(assignee.name, assignee.task_count) for assignee in assignees] == [("Bob", 1), ("Jane", 2)]
+        assert "ix_task_assignee_id" in {index["name"] for index in sa.inspect(engine).get_indexes("task")}
+
+    def test_trigram_index_covers_existing_tasks(self):
+        """Test the trigram migration indexes tasks created before it"""
+        engine = make_engine()
+        upgrade(engine, target=9)
+        with engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO task (title, description, status, priority, created_at) VALUES "
+                "('Fix login', 'Users cannot sign in', 0, 1, 0), ('Deploy', NULL, 0, 1, 0)"
+            ))
+
+        upgrade(engine, target=10)
+
+        with engine.connect() as conn:
+            postings = conn.execute(sa.text("SELECT task_id, trigram FROM task_trigram")).all()
+        assert {gram for task_id, gram in postings if task_id == 1} == trigrams("Fix login") | trigrams("Users cannot sign in")
+        assert {gram for task_id, gram in postings if task_id == 2} == trigrams("Deploy")
+
+    def test_add_column_and_backfill_in_chunks(self):
+        """Test online column addition and chunked backfill"""
+        engine = make_engine()
+        with engine.begin() as conn:
+            conn.execute(sa.text("CREATE TABLE item (id INTEGER PRIMARY KEY, name VARCHAR)"))
+            for index in range(1, 26):
+                conn.execute(sa.text("INSERT INTO item (id, name) VALUES (:id, 'x')"), {"id": index})
+
+        with engine.connect() as conn:
+            ctx = MigrationContext(engine, conn)
+            ctx.add_column("item", sa.Column("rank", sa.Integer, nullable=True))
+            ctx.add_column("item", sa.Column("rank", sa.Integer, nullable=True))
+            updated = ctx.backfill("item", "rank = id * :factor", where="rank IS NULL", params={"factor": 2}, chunk_size=7)
+            assert ctx.backfill("item", "rank = 0", where="rank IS NULL", chunk_size=7) == 0
+
+        assert updated == 25
+        with engine.connect() as conn:
+            assert conn.execute(sa.text("SELECT sum(rank) FROM item")).scalar() == 2 * sum(range(1, 26))
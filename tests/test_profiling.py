@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlmodel import Session, create_engine
+from sqlmodel.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+
+from app import profiling, routes
+from app.profiling import ProfileStore, ProfilingMiddleware, profile_engine
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 300000) SELECT count(*) FROM c"
+)
+
+
+def make_engine():
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+def make_scope(path, headers=()):
+    return {"type": "http", "method": "GET", "path": path, "headers": list(headers), "client": ("10.0.0.1", 1234)}
+
+
+async def call(app, scope):
+    """Invoke an ASGI app and return (status, headers)"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+def run_slow_query(engine):
+    with Session(engine) as session:
+        return session.exec(SLOW_QUERY).scalar()
+
+
+class TestProfiling:
+    """Test on-demand request profiling"""
+
+    def test_profiles_requests_with_token(self, monkeypatch):
+        """Test a request with the token is profiled with its SQL and worker-thread stacks"""
+        monkeypatch.setattr(profiling, "PROFILING_TOKEN", "secret")
+        monkeypatch.setattr(profiling, "PROFILING_INTERVAL_MS", 1)
+        engine = make_engine()
+        profile_engine(engine)
+        store = ProfileStore(max_profiles=2)
+
+        async def app(scope, receive, send):
+            await run_in_threadpool(run_slow_query, engine)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = ProfilingMiddleware(app, store)
+
+        async def scenario():
+            status, headers = await call(middleware, make_scope("/api/v1/tasks", [(b"x-profile-token", b"secret")]))
+            assert status == 200
+            profile = store.get(headers[b"x-profile-id"].decode())
+            assert headers[b"x-profile-worker"].decode() == profile.worker == profiling.worker_id()
+            assert (profile.path, profile.reason, profile.status_code) == ("/api/v1/tasks", "header", 200)
+            assert profile.statement_count == 1 and "WITH RECURSIVE" in profile.statements[0]["statement"]
+            assert profile.sql_ms > 0 and profile.samples > 0
+            # Worker stacks start at the work item, not in the thread pool
+            worker_stacks = [line for line in profile.collapsed().splitlines() if "run_slow_query" in line]
+            assert worker_stacks and all(line.startswith("run_slow_query") for line in worker_stacks)
+
+            # Wrong or missing tokens are not profiled
+            _, headers = await call(middleware, make_scope("/api/v1/tasks", [(b"x-profile-token", b"guess")]))
+            assert b"x-profile-id" not in headers
+            await call(middleware, make_scope("/api/v1/tasks"))
+            assert len(store.list()) == 1
+
+        asyncio.run(scenario())
+
+    def test_sampling_rate_and_ring_buffer(self, monkeypatch):
+        """Test sampled requests are profiled and only the most recent profiles are kept"""
+        monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+        store = ProfileStore(max_profiles=2)
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = ProfilingMiddleware(app, store)
+
+        async def scenario():
+            for path in ("/api/v1/tasks/1", "/api/v1/tasks/2", "/api/v1/tasks/3", "/api/v1/admin/profiles"):
+                await call(middleware, make_scope(path))
+
+        asyncio.run(scenario())
+        assert [(profile.path, profile.reason) for profile in store.list()] == [
+            ("/api/v1/tasks/3", "sampled"), ("/api/v1/tasks/2", "sampled")
+        ]
+
+    def test_admin_endpoints_require_token(self, monkeypatch):
+        """Test profiles are only served with the configured token, and never without one"""
+        monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+        for configured, sent in (("", None), ("", ""), ("secret", None), ("secret", "guess")):
+            monkeypatch.setattr(profiling, "PROFILING_TOKEN", configured)
+            with pytest.raises(HTTPException) as error:
+                routes._require_profiling(sent)
+            assert error.value.status_code == 403
+        routes._require_profiling("secret")
@@ -0,0 +1,77 @@
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.crud import TaskCRUD
+from app.models import FacetField, TaskStatus, TaskTrigram
+from app.search import rebuild_trigram_index, trigrams
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def postings(session):
+    return sorted(session.exec(select(TaskTrigram.task_id, TaskTrigram.trigram)).all())
+
+
+def titles(result):
+    tasks, total, _ = result
+    return [task.title for task in tasks], total
+
+
+class TestFuzzySearch:
+    """Test the trigram index and fuzzy search"""
+
+    def test_trigrams_follow_pg_trgm(self):
+        """Test words are lower-cased and padded like pg_trgm"""
+        assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+        assert trigrams("a-B") == {"  a", " a ", "  b", " b "}
+        assert trigrams(None) == trigrams("  ") == set()
+
+    def test_postings_follow_writes(self):
+        """Test creates, text updates, deletes and archiving keep the index exact"""
+        engine = make_engine()
+        with Session(engine) as session:
+            first = TaskCRUD.create_task(session, {"title": "Write docs", "description": "API reference"}).id
+            second = TaskCRUD.create_task(session, {"title": "Fix login"}).id
+            TaskCRUD.update_task(session, first, {"title": "Write guides"})
+            TaskCRUD.bulk_update_tasks(session, [first, second], {"status": TaskStatus.completed})
+            expected = postings(session)
+            assert expected == sorted(
+                [(first, gram) for gram in trigrams("Write guides API reference")]
+                + [(second, gram) for gram in trigrams("Fix login")]
+            )
+
+            assert rebuild_trigram_index(engine, batch_size=1) == 2
+            assert postings(session) == expected
+
+            TaskCRUD.delete_task(session, second)
+            newest = TaskCRUD.create_task(session, {"title": "Newest"}).id
+            TaskCRUD.archive_tasks(session, [first])
+            assert postings(session) == sorted((newest, gram) for gram in trigrams("Newest"))
+
+    def test_fuzzy_search_ranks_by_similarity(self):
+        """Test typos still match, closer matches rank first and the threshold prunes"""
+        engine = make_engine()
+        with Session(engine) as session:
+            for title in ("Implement authentication", "Authenticate webhooks", "Update documentation", "Login page"):
+                TaskCRUD.create_task(session, {"title": title})
+
+            assert TaskCRUD.get_tasks(session, search="authentcation")[1] == 0
+            assert titles(TaskCRUD.fuzzy_search_tasks(session, "authentcation")) == (["Implement authentication"], 1)
+            assert titles(TaskCRUD.fuzzy_search_tasks(session, "authentcation", threshold=0.4)) == (
+                ["Implement authentication", "Authenticate webhooks"], 2
+            )
+            assert titles(TaskCRUD.fuzzy_search_tasks(session, "authentcation", threshold=0.4, skip=1)) == (
+                ["Authenticate webhooks"], 2
+            )
+            _, total, counts = TaskCRUD.fuzzy_search_tasks(session, "documentaton", facets=[FacetField.status])
+            assert total == 1
+            assert [(facet.value, facet.count) for facet in counts["status"]] == [("pending", 1)]
+            assert TaskCRUD.fuzzy_search_tasks(session, "!!") == ([], 0, {})
@@ -0,0 +1,77 @@
+from sqlalchemy import inspect, text
+from sqlmodel import Session, SQLModel, create_engine, func, select
+from sqlmodel.pool import StaticPool
+
+from app.crud import TaskCRUD
+from app.models import Task, TaskClosure, TaskDependency, TaskStatus
+from app.seed import SeedConfig, generate_batches, seed_tasks
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestSeed:
+    """Test synthetic data generation"""
+
+    def test_generation_is_deterministic(self):
+        """Test equal seeds produce identical rows"""
+        config = SeedConfig(rows=50, batch_size=20, seed=7)
+        first = [row for batch in generate_batches(config) for row in batch]
+        second = [row for batch in generate_batches(config) for row in batch]
+
+        assert len(first) == 50
+        assert [(row["title"], row["status"], row["assigned_to"]) for row in first] == \
+            [(row["title"], row["status"], row["assigned_to"]) for row in second]
+
+    def test_generation_respects_distributions(self):
+        """Test zero-weight values and ratios are honoured"""
+        config = SeedConfig(
+            rows=200,
+            status_weights={TaskStatus.pending: 1, TaskStatus.completed: 0},
+            unassigned_ratio=1.0,
+            due_ratio=0.0,
+        )
+        rows = [row for batch in generate_batches(config) for row in batch]
+
+        assert all(row["status"] == TaskStatus.pending for row in rows)
+        assert all(row["assigned_to"] is None for row in rows)
+        assert all(row["due_date"] is None for row in rows)
+
+    def test_seed_tasks_inserts_and_restores_indexes(self):
+        """Test bulk load row count and deferred index rebuild"""
+        engine = make_engine()
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX ix_seed_title ON task (title)"))
+
+        inserted = seed_tasks(engine, SeedConfig(rows=1234, batch_size=500))
+
+        with Session(engine) as session:
+            assert session.exec(select(func.count(Task.id))).first() == 1234  # type: ignore
+            task = session.exec(select(Task)).first()
+            assert task is not None and task.created_at is not None
+        assert inserted == 1234
+        assert "ix_seed_title" in {index["name"] for index in inspect(engine).get_indexes("task")}
+
+    def test_truncate_removes_hierarchy_dependencies_and_archive(self):
+        """Test a reseed leaves no subtasks, blockers or archived tasks from the previous data"""
+        engine = make_engine()
+        with Session(engine) as session:
+            parent = TaskCRUD.create_task(session, {"title": "Parent"}).id
+            child = TaskCRUD.create_task(session, {"title": "Child", "parent_id": parent}).id
+            TaskCRUD.add_blocker(session, TaskCRUD.create_task(session, {"title": "Blocked"}).id, child)
+            TaskCRUD.archive_tasks(session, [TaskCRUD.create_task(session, {"title": "Archived"}).id])
+
+        seed_tasks(engine, SeedConfig(rows=10, batch_size=10), truncate=True)
+
+        with Session(engine) as session:
+            assert session.exec(select(func.count()).select_from(TaskClosure)).one() == 0
+            assert session.exec(select(func.count()).select_from(TaskDependency)).one() == 0
+            assert TaskCRUD.get_tasks(session, include_archived=True)[1] == 10
+
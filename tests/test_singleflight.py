@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test request coalescing"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical keys run once and distinct keys run separately"""
+        async def scenario():
+            flight = SingleFlight("test")
+            executions = []
+
+            async def work(key):
+                executions.append(key)
+                await asyncio.sleep(0.01)
+                return f"result-{key}"
+
+            results = await asyncio.gather(
+                *[flight.do("a", lambda: work("a")) for _ in range(10)],
+                flight.do("b", lambda: work("b")),
+            )
+
+            assert results[:10] == ["result-a"] * 10
+            assert results[10] == "result-b"
+            assert sorted(executions) == ["a", "b"]
+            assert flight.in_flight() == 0
+
+            # Completed calls are not cached
+            await flight.do("a", lambda: work("a"))
+            assert executions.count("a") == 2
+
+        asyncio.run(scenario())
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test a failing execution raises in all waiters"""
+        async def scenario():
+            flight = SingleFlight("test")
+
+            async def work():
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+
+            results = await asyncio.gather(*[flight.do("k", work) for _ in range(3)], return_exceptions=True)
+            assert all(isinstance(result, ValueError) for result in results)
+
+        asyncio.run(scenario())
+
+    def test_cancelled_caller_does_not_cancel_shared_work(self):
+        """Test work continues while any caller still waits, and stops when none do"""
+        async def scenario():
+            flight = SingleFlight("test")
+            started = asyncio.Event()
+
+            async def work():
+                started.set()
+                await asyncio.sleep(0.05)
+                return "done"
+
+            first = asyncio.create_task(flight.do("k", work))
+            await started.wait()
+            second = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0)
+
+            first.cancel()
+            assert await second == "done"
+            with pytest.raises(asyncio.CancelledError):
+                await first
+
+            lone = asyncio.create_task(flight.do("k2", work))
+            await asyncio.sleep(0.01)
+            lone.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await lone
+            await asyncio.sleep(0)
+            assert flight.in_flight() == 0
+
+        asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import asyncio
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.crud import TaskCRUD
+from app.models import Task
+from app.writer import WritePipeline
+
+
+def make_engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def count_commits(engine):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    return commits
+
+
+class TestWritePipeline:
+    """Test group-committed writes"""
+
+    def test_concurrent_creates_share_a_transaction(self):
+        """Test concurrent writes are committed together and each caller gets its row"""
+        engine = make_engine()
+        commits = count_commits(engine)
+
+        async def scenario():
+            pipeline = WritePipeline(engine, max_batch=100, max_delay=0.01)
+            await pipeline.start()
+            tasks = await asyncio.gather(*[
+                pipeline.submit(lambda s, i=i: TaskCRUD.create_task(s, {"title": f"Task {i}"}, commit=False))
+                for i in range(20)
+            ])
+            await pipeline.stop()
+            return tasks
+
+        tasks = asyncio.run(scenario())
+
+        assert [task.title for task in tasks] == [f"Task {i}" for i in range(20)]
+        assert len({task.id for task in tasks}) == 20
+        assert len(commits) == 1
+        with Session(engine) as session:
+            assert len(session.exec(select(Task)).all()) == 20
+
+    def test_failing_write_only_fails_its_caller(self):
+        """Test a failed write only rolls back its savepoint and the others still commit together"""
+        engine = make_engine()
+        commits = count_commits(engine)
+
+        def broken(session):
+            TaskCRUD.create_task(session, {"title": "ok"}, commit=False)
+            raise ValueError("boom")
+
+        async def scenario():
+            pipeline = WritePipeline(engine, max_delay=0.01)
+            await pipeline.start()
+            results = await asyncio.gather(
+                pipeline.submit(lambda s: TaskCRUD.create_task(s, {"title": "first"}, commit=False)),
+                pipeline.submit(broken),
+                pipeline.submit(lambda s: TaskCRUD.update_task(s, 999, {"title": "x"}, commit=False)),
+                return_exceptions=True,
+            )
+            await pipeline.stop()
+            return results
+
+        created, failed, missing = asyncio.run(scenario())
+
+        assert created.title == "first"
+        assert isinstance(failed, ValueError)
+        assert missing is None
+        assert len(commits) == 1
+        with Session(engine) as session:
+            assert [task.title for task in session.exec(select(Task)).all()] == ["first"]
+
+    def test_failed_commit_retries_writes_individually(self):
+        """Test writes are retried one transaction each when the group commit itself fails"""
+        engine = make_engine()
+
+        refused = []
+
+        def refuse(session):
+            # Savepoint releases fire before_commit too; only fail the first real commit
+            if not refused and not session.in_nested_transaction():
+                refused.append(session)
+                raise RuntimeError("disk full")
+
+        def fail_commit(session):
+            event.listen(session, "before_commit", refuse)
+            return TaskCRUD.create_task(session, {"title": "second"}, commit=False)
+
+        async def scenario():
+            pipeline = WritePipeline(engine, max_delay=0.01)
+            await pipeline.start()
+            results = await asyncio.gather(
+                pipeline.submit(lambda s: TaskCRUD.create_task(s, {"title": "first"}, commit=False)),
+                pipeline.submit(fail_commit),
+            )
+            await pipeline.stop()
+            return results
+
+        first, second = asyncio.run(scenario())
+
+        assert (first.title, second.title) == ("first", "second") and len(refused) == 1
+        with Session(engine) as session:
+            assert sorted(task.title for task in session.exec(select(Task)).all()) == ["first", "second"]
+
+    def test_stop_flushes_pending_writes(self):
+        """Test writes submitted before stop are committed"""
+        engine = make_engine()
+
+        async def scenario():
+            pipeline = WritePipeline(engine, max_delay=0.05)
+            await pipeline.start()
+            pending = asyncio.create_task(
+                pipeline.submit(lambda s: TaskCRUD.create_task(s, {"title": "late"}, commit=False))
+            )
+            await asyncio.sleep(0)
+            await pipeline.stop()
+            assert not pipeline.running
+            return await pending
+
+        assert asyncio.run(scenario()).id is not None